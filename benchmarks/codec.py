@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""Benchmark writing and reading storage files in each format
+
+Storage files with objects of every data model class are written and read
+in a temporary directory with each codec, at a few sizes. The objects are
+made up while the file is written and dropped as soon as they are read, so
+memory use doesn't grow with the size; the time taken to make them up is
+measured separately and subtracted from the save times. The seconds taken
+to save and load, and the size of each file, are reported. Run it from the
+root of the repository with `python3 -m benchmarks.codec`.
+
+"""
+
+
+from benchmarks.startup import CLASSES, ROOT
+import argparse
+import datetime
+import json
+import os
+import os.path
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, ROOT)
+from models.engine.codec import CODECS  # noqa: E402
+
+
+def objects(count, seed):
+    """Yield the key and dictionary of count made up objects"""
+
+    rng = random.Random(seed)
+    now = datetime.datetime(2024, 1, 1)
+    for n in range(count):
+        cls = CLASSES[n % len(CLASSES)]
+        id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        stamp = (now + datetime.timedelta(seconds=n)).isoformat()
+        obj = {
+            'id': id,
+            'created_at': stamp,
+            'updated_at': stamp,
+            'name': 'object {}'.format(n),
+            '__class__': cls
+        }
+        if cls == 'Place':
+            obj.update(
+                number_rooms=rng.randint(1, 8),
+                price_by_night=rng.randint(20, 500),
+                latitude=rng.uniform(25.0, 50.0),
+                longitude=rng.uniform(-125.0, -70.0),
+                amenity_ids=[]
+            )
+        yield cls + '.' + id, obj
+
+
+def measure(codec, count, seed):
+    """Return the seconds taken to save and load, and the file size"""
+
+    path = 'storage' + codec.extension
+    start = time.perf_counter()
+    with open(path, 'wb') as file:
+        codec.write(file, (
+            codec.encode(k, obj) for k, obj in objects(count, seed)
+        ))
+    save = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = 0
+    with open(path, 'rb') as file:
+        for k, obj in codec.read(file):
+            loaded += 1
+    load = time.perf_counter() - start
+    if loaded != count:
+        raise RuntimeError('loaded {} of {} objects'.format(loaded, count))
+    size = os.path.getsize(path)
+    os.remove(path)
+    return save, load, size
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 1000000, 5000000],
+                        help='numbers of objects '
+                             '(default: 100000 1000000 5000000)')
+    parser.add_argument('--codecs', nargs='+', default=sorted(CODECS),
+                        choices=sorted(CODECS),
+                        help='file extensions of the codecs (default: all)')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='runs per measurement (default: 1)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory() as cwd:
+        os.chdir(cwd)
+        for size in sorted(args.sizes):
+            made = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                for k, obj in objects(size, args.seed):
+                    pass
+                made.append(time.perf_counter() - start)
+            made = statistics.median(made)
+            for extension in args.codecs:
+                runs = [
+                    measure(CODECS[extension], size, args.seed)
+                    for _ in range(args.runs)
+                ]
+                results.append({
+                    'codec': extension,
+                    'objects': size,
+                    'save': max(
+                        statistics.median(r[0] for r in runs) - made, 0.0
+                    ),
+                    'load': statistics.median(r[1] for r in runs),
+                    'bytes': runs[0][2]
+                })
+        os.chdir(ROOT)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:>10}{:>10}{:>10}{:>10}{:>10}{:>12}'.format(
+        'objects', 'codec', 'save s', 'load s', 'MiB', 'vs JSON'
+    ))
+    sizes = {
+        r['objects']: r['bytes'] for r in results if r['codec'] == '.json'
+    }
+    for result in results:
+        json_size = sizes.get(result['objects'])
+        print('{:>10}{:>10}{:>10.2f}{:>10.2f}{:>10.1f}{:>12}'.format(
+            result['objects'],
+            result['codec'],
+            result['save'],
+            result['load'],
+            result['bytes'] / (1 << 20),
+            '' if json_size is None else '{:.0%}'.format(
+                result['bytes'] / json_size
+            )
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+"""Benchmark searching places by numeric ranges with and without columns
+
+Random places are added to storage in a temporary directory, and a search
+for places under a price, with enough guests, and within a bounding box is
+timed as a Python loop over storage.all(), as Storage.query checking every
+object, and as FileStorage.query using the column index, with and without
+NumPy if it's installed. Run it from the root of the repository with
+`python3 -m benchmarks.columns`.
+
+"""
+
+
+from benchmarks.startup import ROOT
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+from models.engine import index  # noqa: E402
+from models.engine.storage import Storage  # noqa: E402
+
+
+RANGES = {
+    'price_by_night': (None, 100),
+    'max_guest': (4, None),
+    'latitude': (30.0, 45.0),
+    'longitude': (-120.0, -80.0),
+}
+
+
+def generate(count, seed):
+    """Add count places with random numeric attributes to storage"""
+
+    rng = random.Random(seed)
+    Place = models.classes['Place']
+    for _ in range(count):
+        models.storage.new(Place(
+            id=str(uuid.uuid4()),
+            created_at='2019-06-27T15:55:30.100000',
+            updated_at='2019-06-27T15:55:30.100000',
+            __class__='Place',
+            number_rooms=rng.randint(1, 6),
+            number_bathrooms=rng.randint(1, 3),
+            max_guest=rng.randint(1, 10),
+            price_by_night=rng.randint(20, 500),
+            latitude=rng.uniform(25.0, 50.0),
+            longitude=rng.uniform(-125.0, -70.0)
+        ))
+
+
+def scan():
+    """Search with a loop over every place, the way callers used to"""
+
+    return [
+        obj.id for obj in models.storage.all('Place').values()
+        if obj.price_by_night <= 100 and obj.max_guest >= 4
+        and 30.0 <= obj.latitude <= 45.0
+        and -120.0 <= obj.longitude <= -80.0
+    ]
+
+
+def timed(search, runs):
+    """Return the median seconds a search takes and the IDs it found"""
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        found = search()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), found
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=1000000,
+                        help='number of places (default: 1000000)')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='runs per measurement (default: 5)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    searches = {
+        'loop over all': scan,
+        'Storage.query': lambda: Storage.query(
+            models.storage, 'Place', **RANGES
+        ),
+        'columns': lambda: models.storage.query('Place', **RANGES),
+    }
+    numpy = index.numpy
+    if numpy is not None:
+        searches['columns (numpy)'] = searches['columns']
+    results = []
+    expected = None
+    with tempfile.TemporaryDirectory() as cwd:
+        os.chdir(cwd)
+        models.storage.columns = True
+        generate(args.objects, args.seed)
+        for name, search in searches.items():
+            index.numpy = numpy if name == 'columns (numpy)' else None
+            seconds, found = timed(search, args.runs)
+            if expected is None:
+                expected = sorted(found)
+            elif sorted(found) != expected:
+                raise AssertionError(name + ' found different places')
+            results.append({
+                'search': name,
+                'objects': args.objects,
+                'found': len(found),
+                'seconds': seconds
+            })
+        index.numpy = numpy
+        os.chdir(ROOT)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<18}{:>10}{:>12}'.format('search', 'found', 'ms'))
+    for result in results:
+        print('{:<18}{:>10}{:>12.1f}'.format(
+            result['search'],
+            result['found'],
+            result['seconds'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
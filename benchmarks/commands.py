@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+"""Benchmark console commands by replaying a script against fixed datasets
+
+For each size, a fresh interpreter in a temporary directory fills storage
+with objects of every data model class, the same ones for a given seed, and
+then runs every line of a command script through HBNBCommand.onecmd, timing
+each one and throwing away what it prints. The script is generated unless
+--script names a file of recorded commands, one per line. Generated scripts
+mix create, show, update, destroy, count, and all, each typed both as a
+command and as a <Class>.<command>(...) call, and can be saved with
+--record to replay later. Every command in a script refers to objects from
+the smallest dataset, so the same script runs at every size.
+
+The latency distribution of each command is reported per size, along with
+how its median grows with the number of objects: a growth of 0 means the
+cost doesn't depend on the size, and 1 that it is proportional to it.
+Commands that grow more than --threshold are flagged. Fast commands are
+noisy, so sizes at least 10 times apart give steadier growths. Run it from
+the root of the repository with `python3 -m benchmarks.commands`.
+
+"""
+
+
+from benchmarks.memory import FIELDS
+from benchmarks.startup import CLASSES, ROOT
+from benchmarks.storage import ENGINES, STAMP, summary
+import argparse
+import contextlib
+import json
+import math
+import os
+import os.path
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+
+
+def dataset(size, seed):
+    """Return (class name, ID) pairs for the objects of a dataset
+
+    A dataset holds the first objects of every larger one with the same seed.
+
+    """
+
+    rng = random.Random(seed)
+    return [
+        (
+            CLASSES[n % len(CLASSES)],
+            str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        )
+        for n in range(size)
+    ]
+
+
+def generate(objects, count, seed):
+    """Return a shuffled list of count commands of each kind
+
+    Each object in the list of (class name, ID) pairs is destroyed at most
+    once, and never used after that.
+
+    """
+
+    rng = random.Random(seed)
+    pool = list(objects)
+    rng.shuffle(pool)
+    doomed = [pool.pop() for _ in range(min(2 * count, len(pool) - 1))]
+    kinds = [
+        lambda cls, id, n: 'create {}'.format(cls),
+        lambda cls, id, n: 'show {} {}'.format(cls, id),
+        lambda cls, id, n: 'update {} {} name "name {}"'.format(cls, id, n),
+        lambda cls, id, n: 'count {}'.format(cls),
+        lambda cls, id, n: 'all {}'.format(cls),
+        lambda cls, id, n: '{}.create()'.format(cls),
+        lambda cls, id, n: '{}.show("{}")'.format(cls, id),
+        lambda cls, id, n: '{}.update("{}", "name", "name {}")'.format(
+            cls, id, n
+        ),
+        lambda cls, id, n: '{}.update("{}", {{"number": {}}})'.format(
+            cls, id, n
+        ),
+        lambda cls, id, n: '{}.count()'.format(cls),
+        lambda cls, id, n: '{}.all()'.format(cls),
+    ]
+    script = []
+    for n in range(count):
+        for kind in kinds:
+            script.append(kind(*rng.choice(pool), n))
+    for n, (cls, id) in enumerate(doomed):
+        if n % 2 == 0:
+            script.append('destroy {} {}'.format(cls, id))
+        else:
+            script.append('{}.destroy("{}")'.format(cls, id))
+    rng.shuffle(script)
+    return script
+
+
+def label(line):
+    """Return the name a command line is reported under"""
+
+    word = line.split(maxsplit=1)[0] if line.strip() else ''
+    cls, dot, call = word.partition('.')
+    if dot and '(' in call:
+        return '<Class>.' + call.partition('(')[0] + '()'
+    return word
+
+
+def work(size, seed, path):
+    """Replay a script against models.storage and return the results"""
+
+    from console import HBNBCommand
+
+    storage = models.storage
+    for cls, id in dataset(size, seed):
+        storage.new(models.classes[cls](
+            **FIELDS[cls],
+            id=id,
+            created_at=STAMP,
+            updated_at=STAMP,
+            __class__=cls
+        ))
+    storage.save()
+    with open(path, 'rt') as file:
+        script = [line.rstrip('\n') for line in file]
+    console = HBNBCommand()
+    times = {}
+    with open(os.devnull, 'wt') as null, contextlib.redirect_stdout(null):
+        for line in script:
+            if line.strip() == '' or line.lstrip().startswith('#'):
+                continue
+            start = time.perf_counter()
+            console.onecmd(line)
+            elapsed = time.perf_counter() - start
+            times.setdefault(label(line), []).append(elapsed)
+    results = []
+    for name, found in sorted(times.items()):
+        result = summary(name, found)
+        result['command'] = result.pop('operation')
+        result['objects'] = size
+        results.append(result)
+    return results
+
+
+def measure(engine, size, seed, script):
+    """Replay a script for one engine and size in a new interpreter"""
+
+    env = dict(os.environ, PYTHONPATH=ROOT, **ENGINES[engine])
+    with tempfile.TemporaryDirectory() as cwd:
+        path = os.path.join(cwd, 'script.txt')
+        with open(path, 'wt') as file:
+            file.write(''.join(line + '\n' for line in script))
+        result = subprocess.run(
+            [
+                sys.executable, '-m', 'benchmarks.commands', '--worker',
+                '--sizes', str(size), '--seed', str(seed), '--script', path
+            ],
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True
+        )
+    return json.loads(result.stdout)
+
+
+def growth(results):
+    """Return how each command's median grows with the number of objects
+
+    The growth is the slope of log(median) against log(objects) between the
+    smallest and largest sizes the command ran at.
+
+    """
+
+    runs = {}
+    for result in results:
+        runs.setdefault(result['command'], []).append(result)
+    slopes = {}
+    for command, found in runs.items():
+        small = min(found, key=lambda r: r['objects'])
+        large = max(found, key=lambda r: r['objects'])
+        if large['objects'] > small['objects'] and small['p50'] > 0:
+            slopes[command] = (
+                math.log(large['p50'] / small['p50']) /
+                math.log(large['objects'] / small['objects'])
+            )
+    return slopes
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='numbers of objects (default: 1000 10000)')
+    parser.add_argument('--engine', default='file', choices=sorted(ENGINES),
+                        help='storage engine (default: file)')
+    parser.add_argument('--commands', type=int, default=20,
+                        help='commands of each kind in a generated script '
+                             '(default: 20)')
+    parser.add_argument('--script', metavar='FILE',
+                        help='replay the commands in a file instead')
+    parser.add_argument('--record', metavar='FILE',
+                        help='also write the script to a file')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='growth above which a command is flagged '
+                             '(default: 0.3)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    parser.add_argument('--worker', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if min(args.sizes) < 2:
+        parser.error('sizes must be at least 2')
+    if args.worker:
+        print(json.dumps(work(args.sizes[0], args.seed, args.script)))
+        return
+    if args.script is not None:
+        with open(args.script, 'rt') as file:
+            script = [line.rstrip('\n') for line in file]
+    else:
+        script = generate(
+            dataset(min(args.sizes), args.seed), args.commands, args.seed
+        )
+    if args.record is not None:
+        with open(args.record, 'wt') as file:
+            file.write(''.join(line + '\n' for line in script))
+    results = []
+    for size in sorted(args.sizes):
+        results.extend(measure(args.engine, size, args.seed, script))
+    slopes = growth(results)
+    if args.json:
+        print(json.dumps({
+            'engine': args.engine,
+            'results': results,
+            'growth': slopes,
+            'flagged': sorted(
+                c for c, slope in slopes.items() if slope > args.threshold
+            )
+        }, indent=4))
+        return
+    print('{:<18}{:>10}{:>8}{:>12}{:>10}{:>10}{:>10}{:>10}'.format(
+        'command', 'objects', 'count', 'ops/s', 'p50 ms', 'p90 ms', 'p99 ms',
+        'max ms'
+    ))
+    for result in sorted(results, key=lambda r: (r['command'], r['objects'])):
+        print('{:<18}{:>10}{:>8}{:>12.0f}{:>10.3f}{:>10.3f}{:>10.3f}'
+              '{:>10.3f}'.format(
+                  result['command'],
+                  result['objects'],
+                  result['count'],
+                  result['throughput'] or 0,
+                  result['p50'] * 1000,
+                  result['p90'] * 1000,
+                  result['p99'] * 1000,
+                  result['max'] * 1000
+              ))
+    if len(slopes) > 0:
+        print()
+        print('{:<18}{:>10}'.format('command', 'growth'))
+        for command, slope in sorted(slopes.items()):
+            print('{:<18}{:>10.2f}{}'.format(
+                command, slope,
+                '  grows with size' if slope > args.threshold else ''
+            ))
+
+
+if __name__ == '__main__':
+    main()
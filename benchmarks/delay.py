@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""Benchmark how long saving makes callers wait, with and without a delay
+
+Random places are added to storage in a temporary directory, growing it to
+each of a few sizes. At each size, creating a place and saving it the way
+the console's create command does is timed with saves written right away,
+and with saveDelay set so a background thread writes them later. The time
+flush then takes to write the last of the delayed saves is also reported.
+Run it from the root of the repository with `python3 -m benchmarks.delay`.
+
+"""
+
+
+from benchmarks.columns import generate
+from benchmarks.startup import ROOT
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+
+
+def timed(runs):
+    """Return the median seconds taken to create and save a place"""
+
+    Place = models.classes['Place']
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        Place().save()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help='numbers of places (default: 1000 10000 100000)')
+    parser.add_argument('--runs', type=int, default=20,
+                        help='saves per measurement (default: 20)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='saveDelay in seconds (default: 1)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    storage = models.storage
+    results = []
+    with tempfile.TemporaryDirectory() as cwd:
+        os.chdir(cwd)
+        for size in sorted(args.sizes):
+            generate(size - storage.count('Place'), args.seed + size)
+            for delay in (None, args.delay):
+                storage.saveDelay = delay
+                storage.save()
+                seconds = timed(args.runs)
+                start = time.perf_counter()
+                storage.flush()
+                results.append({
+                    'objects': size,
+                    'delay': delay,
+                    'seconds': seconds,
+                    'flush': time.perf_counter() - start
+                })
+        storage.saveDelay = None
+        os.chdir(ROOT)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:>10}{:>10}{:>14}{:>12}'.format(
+        'objects', 'delay', 'ms per save', 'flush ms'
+    ))
+    for result in results:
+        print('{:>10}{:>10}{:>14.3f}{:>12.1f}'.format(
+            result['objects'],
+            'none' if result['delay'] is None else result['delay'],
+            result['seconds'] * 1000,
+            result['flush'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""Benchmark searching places by distance with and without the grid index
+
+Random places are added to storage in a temporary directory, and searches
+for the places within a radius of random points and for the places nearest
+to them are timed as Storage.near and Storage.nearest measuring the
+distance to every place, and as FileStorage.near and FileStorage.nearest
+using the grid index. Run it from the root of the repository with
+`python3 -m benchmarks.geo`.
+
+"""
+
+
+from benchmarks.columns import generate
+from benchmarks.startup import ROOT
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+from models.engine.storage import Storage  # noqa: E402
+
+
+def timed(search, points, runs):
+    """Return the median seconds a search takes and what it found"""
+
+    times = []
+    for _ in range(runs):
+        found = []
+        start = time.perf_counter()
+        for latitude, longitude in points:
+            found.append(search(latitude, longitude))
+        times.append((time.perf_counter() - start) / len(points))
+    return statistics.median(times), found
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=1000000,
+                        help='number of places (default: 1000000)')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='runs per measurement (default: 3)')
+    parser.add_argument('--points', type=int, default=20,
+                        help='points searched around per run (default: 20)')
+    parser.add_argument('--radius', type=float, default=10.0,
+                        help='search radius in km (default: 10)')
+    parser.add_argument('--count', type=int, default=20,
+                        help='number of nearest places (default: 20)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    points = [
+        (rng.uniform(25.0, 50.0), rng.uniform(-125.0, -70.0))
+        for _ in range(args.points)
+    ]
+    storage = models.storage
+    searches = [
+        ('near', 'scan', lambda lat, lon: Storage.near(
+            storage, 'Place', lat, lon, args.radius
+        )),
+        ('near', 'grid', lambda lat, lon: storage.near(
+            'Place', lat, lon, args.radius
+        )),
+        ('nearest', 'scan', lambda lat, lon: Storage.nearest(
+            storage, 'Place', lat, lon, args.count
+        )),
+        ('nearest', 'grid', lambda lat, lon: storage.nearest(
+            'Place', lat, lon, args.count
+        )),
+    ]
+    results = []
+    expected = {}
+    with tempfile.TemporaryDirectory() as cwd:
+        os.chdir(cwd)
+        generate(args.objects, args.seed)
+        for search, method, function in searches:
+            seconds, found = timed(function, points, args.runs)
+            if expected.setdefault(search, found) != found:
+                raise AssertionError(search + ' found different places')
+            results.append({
+                'search': search,
+                'method': method,
+                'objects': args.objects,
+                'found': sum(len(ids) for ids in found) / len(points),
+                'seconds': seconds
+            })
+        os.chdir(ROOT)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<10}{:<8}{:>10}{:>12}'.format('search', 'method', 'found', 'ms'))
+    for result in results:
+        print('{:<10}{:<8}{:>10.1f}{:>12.3f}'.format(
+            result['search'],
+            result['method'],
+            result['found'],
+            result['seconds'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
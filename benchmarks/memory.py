@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""Benchmark the memory taken by data model instances, compact or not
+
+Each class is measured in a fresh interpreter, with and without
+HBNB_COMPACT set, by creating instances from dictionaries like reloading
+does and counting the bytes allocated with tracemalloc while they're
+created. That includes their time stamps, which are the same in both modes,
+but not the other values, which are shared with the dictionaries. Run it
+from the root of the repository with `python3 -m benchmarks.memory`.
+
+"""
+
+
+from benchmarks.startup import ROOT
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+FIELDS = {
+    'Amenity': {'name': 'Wifi'},
+    'City': {'state_id': 'ID', 'name': 'San Francisco'},
+    'Place': {
+        'city_id': 'ID', 'user_id': 'ID', 'name': 'Lovely place',
+        'description': 'Close to everything', 'number_rooms': 3,
+        'number_bathrooms': 1, 'max_guest': 6, 'price_by_night': 120,
+        'latitude': 37.77, 'longitude': -122.41, 'amenity_ids': []
+    },
+    'Review': {'place_id': 'ID', 'user_id': 'ID', 'text': 'Great stay'},
+    'State': {'name': 'California'},
+    'User': {
+        'email': 'user@example.com', 'password': 'secret',
+        'first_name': 'Betty', 'last_name': 'Holberton'
+    },
+}
+MEASURE = '''import json
+import models
+import time
+import tracemalloc
+import uuid
+cls = models.classes[{cls!r}]
+records = []
+for n in range({count}):
+    record = dict({fields!r}, id=str(uuid.uuid4()), __class__={cls!r})
+    record['created_at'] = record['updated_at'] = '2019-06-27T15:55:30.100000'
+    records.append(record)
+tracemalloc.start()
+start = time.perf_counter()
+objs = [cls(**record) for record in records]
+seconds = time.perf_counter() - start
+size = tracemalloc.get_traced_memory()[0]
+print(json.dumps([size, seconds]))
+'''
+
+
+def measure(cls, count, compact, cwd):
+    """Return bytes and seconds taken per instance of a data model class"""
+
+    env = dict(os.environ, PYTHONPATH=ROOT, HBNB_COMPACT=str(int(compact)))
+    code = MEASURE.format(cls=cls, count=count, fields=FIELDS[cls])
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+    )
+    size, seconds = json.loads(result.stdout)
+    return size / count, seconds / count
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=100000,
+                        help='number of instances per class (default: 100000)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory() as cwd:
+        for cls in FIELDS:
+            for compact in (False, True):
+                size, seconds = measure(cls, args.objects, compact, cwd)
+                results.append({
+                    'class': cls,
+                    'mode': 'compact' if compact else 'dict',
+                    'objects': args.objects,
+                    'bytes': size,
+                    'seconds': seconds
+                })
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<10}{:<10}{:>12}{:>12}'.format(
+        'class', 'mode', 'bytes', 'us to build'
+    ))
+    for result in results:
+        print('{:<10}{:<10}{:>12.0f}{:>12.2f}'.format(
+            result['class'],
+            result['mode'],
+            result['bytes'],
+            result['seconds'] * 1000000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""Benchmark searching places by the words in them and reloading the index
+
+Places with random names and descriptions are saved to storage in a
+temporary directory. Searches for a few words are timed as a loop looking
+for substrings in every place, as Storage.search indexing every place each
+time, and as FileStorage.search using the text index. Reloading is timed
+with the text index saved next to the storage file and with it rebuilt, as
+is saving. Run it from the root of the repository with
+`python3 -m benchmarks.search`.
+
+"""
+
+
+from benchmarks.startup import ROOT
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+from models.engine.storage import Storage  # noqa: E402
+
+
+SEARCH = 'quiet beach'
+
+
+def generate(count, seed, vocabulary=5000, length=20):
+    """Add count places with random text to storage"""
+
+    rng = random.Random(seed)
+    words = ['word{}'.format(n) for n in range(vocabulary)]
+    words[100] = 'quiet'
+    words[300] = 'beach'
+    weights = [1 / (n + 1) for n in range(vocabulary)]
+    Place = models.classes['Place']
+    for _ in range(count):
+        text = rng.choices(words, weights, k=length + 2)
+        models.storage.new(Place(
+            id=str(uuid.uuid4()),
+            created_at='2019-06-27T15:55:30.100000',
+            updated_at='2019-06-27T15:55:30.100000',
+            __class__='Place',
+            name=' '.join(text[:2]).title(),
+            description=' '.join(text[2:])
+        ))
+
+
+def scan():
+    """Search with a loop over every place, the way callers used to"""
+
+    found = []
+    for obj in models.storage.all('Place').values():
+        text = (obj.name + ' ' + obj.description).lower()
+        if any(word in text for word in SEARCH.split()):
+            found.append(obj.id)
+    return found
+
+
+def timed(function, runs):
+    """Return the median seconds a function takes and what it returned"""
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=100000,
+                        help='number of places (default: 100000)')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='runs per measurement (default: 3)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    storage = models.storage
+
+    def rebuild():
+        """Reload without the saved text index"""
+
+        if os.path.exists('storage.json.text'):
+            os.remove('storage.json.text')
+        storage.reload()
+
+    measurements = [
+        ('search', 'loop over all', scan),
+        ('search', 'Storage.search',
+         lambda: Storage.search(storage, 'Place', SEARCH)),
+        ('search', 'text index', lambda: storage.search('Place', SEARCH)),
+        ('save', 'text index', storage.save),
+        ('reload', 'saved index', storage.reload),
+        ('reload', 'rebuilt index', rebuild),
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as cwd:
+        os.chdir(cwd)
+        generate(args.objects, args.seed)
+        storage.save()
+        for task, method, function in measurements:
+            if task == 'reload':
+                storage.save()
+            seconds, found = timed(function, args.runs)
+            results.append({
+                'task': task,
+                'method': method,
+                'objects': args.objects,
+                'found': len(found) if task == 'search' else None,
+                'seconds': seconds
+            })
+        os.chdir(ROOT)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<8}{:<16}{:>10}{:>12}'.format('task', 'method', 'found', 'ms'))
+    for result in results:
+        print('{:<8}{:<16}{:>10}{:>12.1f}'.format(
+            result['task'],
+            result['method'],
+            '' if result['found'] is None else result['found'],
+            result['seconds'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""Benchmark how long programs take to start using the data models
+
+Each measurement runs in a fresh interpreter inside a temporary directory
+holding a generated "storage.json", so the numbers include everything a new
+console process pays for before it can answer a command. Run it from the root
+of the repository with `python3 -m benchmarks.startup`.
+
+"""
+
+
+import argparse
+import datetime
+import json
+import os
+import os.path
+import statistics
+import subprocess
+import sys
+import tempfile
+import uuid
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLASSES = ('Amenity', 'City', 'Place', 'Review', 'State', 'User')
+STEPS = {
+    'import models': 'import models',
+    'import console': 'import console',
+    'show one object': (
+        'import console\n'
+        'console.HBNBCommand().onecmd("show Place {id}")'
+    ),
+    'load everything': 'import models\nmodels.storage.all()',
+}
+TIMER = '''import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+'''
+
+
+def generate(path, count):
+    """Write a storage file with count objects and return a Place ID"""
+
+    now = datetime.datetime.now().isoformat()
+    place = None
+    with open(path, 'wt') as file:
+        file.write('{')
+        for n in range(count):
+            cls = CLASSES[n % len(CLASSES)]
+            id = str(uuid.uuid4())
+            if cls == 'Place':
+                place = id
+            record = {
+                'id': id,
+                'created_at': now,
+                'updated_at': now,
+                'name': 'object {}'.format(n),
+                '__class__': cls
+            }
+            if n > 0:
+                file.write(', ')
+            file.write(json.dumps(cls + '.' + id) + ': ' + json.dumps(record))
+        file.write('}')
+    return place
+
+
+def measure(code, cwd, env, runs):
+    """Return the median time in seconds to run code in new interpreters"""
+
+    times = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', TIMER.format(code=code)],
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True
+        )
+        times.append(float(result.stdout.split()[-1]))
+    return statistics.median(times)
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=100000,
+                        help='number of stored objects (default: 100000)')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='runs per measurement (default: 3)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory() as cwd:
+        id = generate(os.path.join(cwd, 'storage.json'), args.objects)
+        for mode, extra in (('eager', {}), ('lazy', {'HBNB_LAZY': '1'})):
+            env = dict(os.environ, PYTHONPATH=ROOT, **extra)
+            for step, code in STEPS.items():
+                seconds = measure(code.format(id=id), cwd, env, args.runs)
+                results.append({
+                    'mode': mode,
+                    'step': step,
+                    'objects': args.objects,
+                    'seconds': seconds
+                })
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<8}{:<20}{:>12}'.format('mode', 'step', 'ms'))
+    for result in results:
+        print('{:<8}{:<20}{:>12.1f}'.format(
+            result['mode'],
+            result['step'],
+            result['seconds'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/python3
+"""Benchmark storage engines reloading, saving, looking up, and scanning
+
+For each engine and size, a fresh interpreter in a temporary directory
+fills storage with objects of every data model class, saves them, and then
+times reload, save after changing one object, get and tryGet of random IDs,
+new, delete, and all(cls) for each class. Each operation's throughput and
+latency percentiles are reported, and the peak resident set size of each
+interpreter is reported once for its engine and size, since it covers every
+operation. Save the output of --json to a file and pass it to --compare
+later to flag operations that got slower. Run it from the root of
+the repository with `python3 -m benchmarks.storage`.
+
+"""
+
+
+from benchmarks.memory import FIELDS
+from benchmarks.startup import CLASSES, ROOT
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+
+
+ENGINES = {
+    'file': {},
+    'journal': {'HBNB_JOURNAL': '1'},
+    'lazy': {'HBNB_LAZY': '1'},
+    'marshal': {'HBNB_FILE_PATH': 'storage.marshal'},
+    'pickle': {'HBNB_FILE_PATH': 'storage.pickle'},
+    'sharded': {'HBNB_TYPE_STORAGE': 'sharded'},
+    'sqlite': {'HBNB_TYPE_STORAGE': 'sqlite'},
+    'cached': {'HBNB_TYPE_STORAGE': 'sqlite', 'HBNB_CACHE_ENTRIES': '10000'},
+}
+STAMP = '2019-06-27T15:55:30.100000'
+
+
+def make(cls, rng):
+    """Return a new instance of a data model class with a random ID"""
+
+    return models.classes[cls](
+        **FIELDS[cls],
+        id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        created_at=STAMP,
+        updated_at=STAMP,
+        __class__=cls
+    )
+
+
+def percentile(times, fraction):
+    """Return the value a fraction of the way through a sorted list"""
+
+    return times[min(int(len(times) * fraction), len(times) - 1)]
+
+
+def summary(name, times):
+    """Return the throughput and latency percentiles of an operation"""
+
+    times.sort()
+    return {
+        'operation': name,
+        'count': len(times),
+        'throughput': len(times) / sum(times) if sum(times) > 0 else None,
+        'p50': percentile(times, 0.5),
+        'p90': percentile(times, 0.9),
+        'p99': percentile(times, 0.99),
+        'max': times[-1]
+    }
+
+
+def timed(function, args):
+    """Call a function with each tuple of args, returning the seconds taken"""
+
+    times = []
+    for arg in args:
+        start = time.perf_counter()
+        function(*arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def work(size, operations, runs, seed):
+    """Measure models.storage in this interpreter
+
+    Return the operation results as "operations", and the peak resident set
+    size in bytes of the interpreter as "rss", or None if it's unknown.
+
+    """
+
+    storage = models.storage
+    rng = random.Random(seed)
+    ids = {cls: [] for cls in CLASSES}
+    for n in range(size):
+        obj = make(CLASSES[n % len(CLASSES)], rng)
+        ids[type(obj).__name__].append(obj.id)
+        storage.new(obj)
+    results = [summary('save all', timed(storage.save, [()]))]
+    results.append(summary('reload', timed(storage.reload, [()] * runs)))
+    keys = [(cls, id) for cls in CLASSES for id in ids[cls]]
+
+    def change(cls, id):
+        """Mark one object as updated and save"""
+
+        storage.new(storage.get(cls, id))
+        storage.save()
+
+    results.append(summary(
+        'save one', timed(change, [rng.choice(keys) for _ in range(runs)])
+    ))
+    lookups = [rng.choice(keys) for _ in range(operations)]
+    results.append(summary('get', timed(storage.get, lookups)))
+    results.append(summary('tryGet', timed(storage.tryGet, [
+        (cls, id if n % 2 else 'missing', None)
+        for n, (cls, id) in enumerate(lookups)
+    ])))
+    created = [
+        (make(CLASSES[n % len(CLASSES)], rng),) for n in range(operations)
+    ]
+    results.append(summary('new', timed(storage.new, created)))
+    results.append(summary('delete', timed(storage.delete, [
+        (type(obj).__name__, obj.id) for obj, in created
+    ])))
+    results.append(summary('scan', timed(storage.all, [
+        (cls,) for _ in range(runs) for cls in CLASSES
+    ])))
+    rss = None
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        rss *= 1 if sys.platform == 'darwin' else 1024
+    for result in results:
+        result['objects'] = size
+    return {'operations': results, 'rss': rss}
+
+
+def measure(engine, size, args, cwd):
+    """Run the measurements for an engine and size in a new interpreter
+
+    Return the list of operation results and the peak memory result.
+
+    """
+
+    env = dict(os.environ, PYTHONPATH=ROOT, **ENGINES[engine])
+    result = subprocess.run(
+        [
+            sys.executable, '-m', 'benchmarks.storage', '--worker',
+            '--sizes', str(size), '--operations', str(args.operations),
+            '--runs', str(args.runs), '--seed', str(args.seed)
+        ],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+    )
+    measured = json.loads(result.stdout)
+    for result in measured['operations']:
+        result['engine'] = engine
+    memory = {'engine': engine, 'objects': size, 'rss': measured['rss']}
+    return measured['operations'], memory
+
+
+def compare(results, path, threshold, out):
+    """Print how results changed since a saved run, returning regressions"""
+
+    with open(path, 'rt') as file:
+        saved = {
+            (r['engine'], r['objects'], r['operation']): r
+            for r in json.load(file)['operations']
+        }
+    print('{:<10}{:>10}  {:<10}{:>12}{:>12}{:>10}'.format(
+        'engine', 'objects', 'operation', 'old p50 ms', 'new p50 ms', 'ratio'
+    ), file=out)
+    regressions = 0
+    for result in results:
+        old = saved.get(
+            (result['engine'], result['objects'], result['operation'])
+        )
+        if old is None or old['p50'] <= 0:
+            continue
+        ratio = result['p50'] / old['p50']
+        flag = ''
+        if ratio > threshold:
+            flag = '  slower'
+            regressions += 1
+        print('{:<10}{:>10}  {:<10}{:>12.4f}{:>12.4f}{:>10.2f}{}'.format(
+            result['engine'], result['objects'], result['operation'],
+            old['p50'] * 1000, result['p50'] * 1000, ratio, flag
+        ), file=out)
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help='numbers of objects (default: 1000 10000 100000)')
+    parser.add_argument('--engines', nargs='+', default=['file', 'sqlite'],
+                        choices=sorted(ENGINES),
+                        help='engines to measure (default: file sqlite)')
+    parser.add_argument('--operations', type=int, default=10000,
+                        help='calls per lookup, new, and delete measurement '
+                             '(default: 10000)')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='calls per reload, save, and scan measurement '
+                             '(default: 5)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='JSON results of an earlier run to compare to')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='ratio of median latencies above which an '
+                             'operation is flagged as slower (default: 1.25)')
+    parser.add_argument('--worker', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if min(args.sizes) < 1:
+        parser.error('sizes must be at least 1')
+    if args.worker:
+        print(json.dumps(
+            work(args.sizes[0], args.operations, args.runs, args.seed)
+        ))
+        return
+    results = []
+    memory = []
+    for engine in args.engines:
+        for size in sorted(args.sizes):
+            with tempfile.TemporaryDirectory() as cwd:
+                operations, peak = measure(engine, size, args, cwd)
+            results.extend(operations)
+            memory.append(peak)
+    if args.json:
+        print(json.dumps(
+            {'operations': results, 'memory': memory}, indent=4
+        ))
+    else:
+        print('{:<10}{:>10}  {:<10}{:>12}{:>10}{:>10}{:>10}'.format(
+            'engine', 'objects', 'operation', 'ops/s', 'p50 ms', 'p90 ms',
+            'p99 ms'
+        ))
+        for result in results:
+            print('{:<10}{:>10}  {:<10}{:>12.0f}{:>10.4f}{:>10.4f}{:>10.4f}'
+                  .format(
+                      result['engine'],
+                      result['objects'],
+                      result['operation'],
+                      result['throughput'] or 0,
+                      result['p50'] * 1000,
+                      result['p90'] * 1000,
+                      result['p99'] * 1000
+                  ))
+        print()
+        print('{:<10}{:>10}{:>14}'.format('engine', 'objects', 'peak RSS MiB'))
+        for peak in memory:
+            print('{:<10}{:>10}{:>14}'.format(
+                peak['engine'], peak['objects'],
+                '' if peak['rss'] is None
+                else '{:.0f}'.format(peak['rss'] / (1 << 20))
+            ))
+    if args.compare is not None:
+        # keep the JSON on stdout valid
+        out = sys.stderr if args.json else sys.stdout
+        if compare(results, args.compare, args.threshold, out) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
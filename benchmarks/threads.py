@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+"""Benchmark reading storage from many threads while others write and save
+
+Random places are added to storage in a temporary directory. Reader threads
+then look up random places and search around random points for a few
+seconds, alone, while a thread changes places, and while another thread
+also saves over and over. The operations per second and the median and
+99th percentile read times are reported, which shows reads don't wait for
+saves to finish. Run it from
+the root of the repository with `python3 -m benchmarks.threads`.
+
+"""
+
+
+from benchmarks.columns import generate
+from benchmarks.startup import ROOT
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+
+
+def run(threads, seconds, seed, others):
+    """Run reader threads and the other named threads for some seconds
+
+    Return the latency of every read in seconds, and the number of times
+    each other thread did its work.
+
+    """
+
+    storage = models.storage
+    ids = [k.partition('.')[2] for k in storage.all('Place')]
+    done = threading.Event()
+    latencies = []
+    counts = {}
+
+    def read(n):
+        """Look up random places and search around random points"""
+
+        rng = random.Random(seed + n)
+        times = []
+        while not done.is_set():
+            start = time.perf_counter()
+            storage.get('Place', rng.choice(ids))
+            storage.near(
+                'Place', rng.uniform(25.0, 50.0), rng.uniform(-125.0, -70.0),
+                5.0
+            )
+            times.append(time.perf_counter() - start)
+        latencies.extend(times)
+
+    def write():
+        """Change the prices of random places"""
+
+        rng = random.Random(seed)
+        count = 0
+        while not done.is_set():
+            obj = storage.get('Place', rng.choice(ids))
+            obj.price_by_night = rng.randint(20, 500)
+            count += 1
+        counts['write'] = count
+
+    def save():
+        """Save storage over and over"""
+
+        count = 0
+        while not done.is_set():
+            storage.save()
+            count += 1
+        counts['save'] = count
+
+    workers = [
+        threading.Thread(target=read, args=(n,)) for n in range(threads)
+    ]
+    for name, target in (('write', write), ('save', save)):
+        if name in others:
+            workers.append(threading.Thread(target=target))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    done.set()
+    for worker in workers:
+        worker.join()
+    return latencies, counts
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=100000,
+                        help='number of places (default: 100000)')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='number of reader threads (default: 4)')
+    parser.add_argument('--seconds', type=float, default=3.0,
+                        help='seconds per measurement (default: 3)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    scenarios = [
+        ('read', ()),
+        ('read + write', ('write',)),
+        ('read + write + save', ('write', 'save')),
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as cwd:
+        os.chdir(cwd)
+        generate(args.objects, args.seed)
+        models.storage.save()
+        for name, others in scenarios:
+            latencies, counts = run(
+                args.threads, args.seconds, args.seed, others
+            )
+            latencies.sort()
+            results.append({
+                'scenario': name,
+                'objects': args.objects,
+                'threads': args.threads,
+                'reads': len(latencies) / args.seconds,
+                'writes': counts.get('write', 0) / args.seconds,
+                'saves': counts.get('save', 0),
+                'median': statistics.median(latencies),
+                'p99': latencies[int(len(latencies) * 0.99)]
+            })
+        os.chdir(ROOT)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<22}{:>12}{:>12}{:>8}{:>12}{:>12}'.format(
+        'scenario', 'reads/s', 'writes/s', 'saves', 'median ms', 'p99 ms'
+    ))
+    for result in results:
+        print('{:<22}{:>12.0f}{:>12.0f}{:>8}{:>12.3f}{:>12.3f}'.format(
+            result['scenario'],
+            result['reads'],
+            result['writes'],
+            result['saves'],
+            result['median'] * 1000,
+            result['p99'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""Benchmark converting time stamps and reloading objects that hold them
+
+The first part times decoding and encoding time stamps on their own, with
+the strptime format that BaseModel used to parse and with each format of
+models.engine.timestamps. The second part times reloading a generated
+"storage.json" in a fresh interpreter, once for each format, with the old
+strptime parser swapped back in for comparison. Run it from the root of the
+repository with `python3 -m benchmarks.timestamps`.
+
+"""
+
+
+from benchmarks.startup import CLASSES, measure, ROOT
+import argparse
+import datetime
+import json
+import os
+import os.path
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, ROOT)
+from models.engine import timestamps  # noqa: E402
+
+
+FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+CODECS = {
+    'strptime': (
+        lambda value: datetime.datetime.strptime(value, FORMAT),
+        datetime.datetime.isoformat,
+        False
+    ),
+    'isoformat': (timestamps.decode, timestamps.encode, False),
+    'epoch': (timestamps.decode, timestamps.encode, True),
+}
+RELOAD = '''import datetime
+import models
+from models.engine import timestamps
+if {strptime}:
+    timestamps.decode = lambda value: datetime.datetime.strptime(
+        value, {format!r}
+    )
+models.storage.all()
+'''
+
+
+def generate(path, count, epoch):
+    """Write a storage file with count objects in a time stamp format"""
+
+    timestamps.epoch = epoch
+    try:
+        now = timestamps.encode(datetime.datetime.now())
+    finally:
+        timestamps.epoch = False
+    with open(path, 'wt') as file:
+        file.write('{')
+        for n in range(count):
+            cls = CLASSES[n % len(CLASSES)]
+            id = str(uuid.uuid4())
+            record = {
+                'id': id,
+                'created_at': now,
+                'updated_at': now,
+                '__class__': cls
+            }
+            if n > 0:
+                file.write(', ')
+            file.write(json.dumps(cls + '.' + id) + ': ' + json.dumps(record))
+        file.write('}')
+
+
+def convert(count):
+    """Return seconds taken to decode and encode count time stamps per codec
+    """
+
+    now = datetime.datetime.now()
+    results = {}
+    for name, (decode, encode, epoch) in CODECS.items():
+        timestamps.epoch = epoch
+        try:
+            values = [encode(now)] * count
+            start = time.perf_counter()
+            for value in values:
+                decode(value)
+            middle = time.perf_counter()
+            for _ in range(count):
+                encode(now)
+            end = time.perf_counter()
+        finally:
+            timestamps.epoch = False
+        results[name] = (middle - start, end - middle)
+    return results
+
+
+def main(argv=None):
+    """Run the benchmark and print the results"""
+
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--objects', type=int, default=1000000,
+                        help='number of stored objects (default: 1000000)')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='runs per reload measurement (default: 1)')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args(argv)
+    results = []
+    # every object holds two time stamps
+    for codec, (decode, encode) in convert(args.objects * 2).items():
+        results.append({'codec': codec, 'step': 'decode', 'seconds': decode})
+        results.append({'codec': codec, 'step': 'encode', 'seconds': encode})
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    with tempfile.TemporaryDirectory() as cwd:
+        path = os.path.join(cwd, 'storage.json')
+        for codec, (decode, encode, epoch) in CODECS.items():
+            generate(path, args.objects, epoch)
+            code = RELOAD.format(strptime=codec == 'strptime', format=FORMAT)
+            results.append({
+                'codec': codec,
+                'step': 'reload',
+                'seconds': measure(code, cwd, env, args.runs)
+            })
+    for result in results:
+        result['objects'] = args.objects
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('{:<12}{:<10}{:>12}'.format('codec', 'step', 'ms'))
+    for result in results:
+        print('{:<12}{:<10}{:>12.1f}'.format(
+            result['codec'],
+            result['step'],
+            result['seconds'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
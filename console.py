@@ -5,9 +5,14 @@
 from ast import literal_eval
 import cmd
 import functools
+import itertools
+import math
 import models
 
 
+CHUNK_SIZE = 1000
+
+
 class HBNBCommand (cmd.Cmd):
     """Interpret commands for a pseudo-API in the AirBnB clone"""
 
@@ -38,7 +43,13 @@ class HBNBCommand (cmd.Cmd):
         if command == 'update':
             self.special_update(cls, piece)
         elif command == 'all':
-            self.do_all(cls, quote_objs=False)
+            line = cls
+            for name, value in zip(('limit', 'offset'), piece or ()):
+                line += ' {}={}'.format(name, value)
+            self.do_all(line, quote_objs=False)
+        elif command in ('near', 'nearest', 'search'):
+            line = cls + ' ' + ' '.join(str(arg) for arg in piece or ())
+            getattr(self, 'do_' + command)(line, quote_objs=False)
         else:
             line = command + ' ' + cls
             if piece is not None:
@@ -46,27 +57,59 @@ class HBNBCommand (cmd.Cmd):
             self.onecmd(line)
 
     def do_all(self, line, quote_objs=True):
-        """Print all data model objects, optionally filtered by class"""
+        """Print all data model objects, optionally filtered by class
 
-        cls = line.partition(' ')[0]
-        if cls == '':
-            objects = [
-                str(models.classes[k.partition('.')[0]](**v.to_dict()))
-                for k, v in models.storage.all().items()
-            ]
-        else:
-            if cls not in models.classes:
-                self.__print('** class doesn\'t exist **')
+        Objects are printed a chunk at a time straight from storage, and the
+        limit=N and offset=N options print only one page of them.
+
+        """
+
+        args = line.split()
+        cls = ''
+        if len(args) > 0 and '=' not in args[0]:
+            cls = args.pop(0)
+        if cls != '' and cls not in models.classes:
+            self.__print('** class doesn\'t exist **')
+            return
+        paging = {'limit': None, 'offset': 0}
+        for arg in args:
+            name, _, value = arg.partition('=')
+            if name not in paging:
+                continue
+            try:
+                paging[name] = int(value)
+            except ValueError:
+                paging[name] = -1
+            if paging[name] < 0:
+                self.__print('** invalid limit or offset **')
                 return
-            objects = [
-                str(models.classes[cls](**v.to_dict()))
-                for k, v in models.storage.all().items()
-                if k.partition('.')[0] == cls
-            ]
-        if quote_objs:
-            self.__print(objects)
-        else:
-            self.__print('[' + ', '.join(str(obj) for obj in objects) + ']')
+        stop = paging['limit']
+        if stop is not None:
+            stop += paging['offset']
+        # a copy, since a delayed save can change the dict while printing
+        objects = itertools.islice(
+            list(models.storage.all(cls or None).values()),
+            paging['offset'],
+            stop
+        )
+        self.__printList(objects, quote_objs)
+
+    def do_batch(self, line):
+        """Run the commands in a file, saving only once they're all done"""
+
+        path = line.partition(' ')[0]
+        if path == '':
+            self.__print('** file name missing **')
+            return
+        try:
+            file = open(path, 'rt')
+        except OSError:
+            self.__print('** file can\'t be read **')
+            return
+        with file, models.storage.batch():
+            for command in file:
+                if self.onecmd(command.rstrip('\n')):
+                    return 1
 
     def do_count(self, line):
         """Count the number of instances of a given class"""
@@ -78,11 +121,7 @@ class HBNBCommand (cmd.Cmd):
         if cls not in models.classes:
             self.__print('** class doesn\'t exist **')
             return
-        count = 0
-        for key, obj in models.storage.all().items():
-            if key.partition('.')[0] == cls:
-                count += 1
-        self.__print(count)
+        self.__print(models.storage.count(cls))
 
     def do_create(self, line):
         """Create a new data model instance and store it"""
@@ -118,6 +157,57 @@ class HBNBCommand (cmd.Cmd):
         models.storage.delete(cls, id)
         models.storage.save()
 
+    def do_near(self, line, quote_objs=True):
+        """Print the instances of a class within a radius of a location"""
+
+        args = self.__locate(line, 'radius')
+        if args is None:
+            return
+        cls, latitude, longitude, radius = args
+        if not radius >= 0:
+            self.__print('** invalid radius **')
+            return
+        ids = models.storage.near(cls, latitude, longitude, radius)
+        self.__printList(
+            (models.storage.get(cls, id) for id in ids),
+            quote_objs
+        )
+
+    def do_nearest(self, line, quote_objs=True):
+        """Print the instances of a class nearest to a location"""
+
+        args = self.__locate(line, 'count')
+        if args is None:
+            return
+        cls, latitude, longitude, count = args
+        if not 0 <= count < math.inf or count != int(count):
+            self.__print('** invalid count **')
+            return
+        ids = models.storage.nearest(cls, latitude, longitude, int(count))
+        self.__printList(
+            (models.storage.get(cls, id) for id in ids),
+            quote_objs
+        )
+
+    def do_search(self, line, quote_objs=True):
+        """Print the instances of a class that best match some words"""
+
+        cls, _, text = line.partition(' ')
+        if cls == '':
+            self.__print('** class name missing **')
+            return
+        if cls not in models.classes:
+            self.__print('** class doesn\'t exist **')
+            return
+        if text.strip() == '':
+            self.__print('** words missing **')
+            return
+        ids = models.storage.search(cls, text)
+        self.__printList(
+            (models.storage.get(cls, id) for id in ids),
+            quote_objs
+        )
+
     def do_show(self, line):
         """print string representation of an instance"""
 
@@ -138,6 +228,36 @@ class HBNBCommand (cmd.Cmd):
             return
         self.__print(obj)
 
+    def do_stats(self, line):
+        """Print or control measurements of where time is spent"""
+
+        from models.engine import stats
+
+        args = line.split()
+        option = args[0] if len(args) > 0 else ''
+        if option == '':
+            if not stats.enabled and len(stats.timings) == 0:
+                self.__print('** stats are off **')
+                return
+            self.__print(stats.report())
+        elif option == 'on':
+            stats.enable()
+        elif option == 'off':
+            stats.disable()
+        elif option == 'reset':
+            stats.reset()
+        elif option == 'profile':
+            stats.startProfile()
+        elif option == 'stop':
+            if stats.profiler is None:
+                self.__print('** not profiling **')
+                return
+            result = stats.stopProfile(args[1] if len(args) > 1 else None)
+            if len(args) < 2:
+                self.__print(result, end='')
+        else:
+            self.__print('** unknown option **')
+
     def do_update(self, line):
         """Update or add an attribute to a data model instance"""
 
@@ -190,9 +310,21 @@ class HBNBCommand (cmd.Cmd):
         """Help for all command"""
 
         self.__print(
-            'Usage: all [CLASS]',
-            'Prints a list of data model instances. If CLASS is given, print',
-            'only instances of that class. Otherwise, print them all.',
+            'Usage: all [CLASS] [limit=N] [offset=N]',
+            'Prints a list of data model instances. If CLASS is given,',
+            'print only instances of that class. Otherwise, print them all.',
+            'If limit or offset is given, skip the first offset instances and',
+            'print at most limit of the rest.',
+            sep='\n'
+        )
+
+    def help_batch(self):
+        """Help for batch command"""
+
+        self.__print(
+            'Usage: batch FILE',
+            'Runs the commands in FILE, one per line, and saves the changes',
+            'they make once at the end instead of after every command.',
             sep='\n'
         )
 
@@ -205,6 +337,49 @@ class HBNBCommand (cmd.Cmd):
             sep='\n'
         )
 
+    def help_near(self):
+        """Help for near command"""
+
+        self.__print(
+            'Usage: near CLASS LATITUDE LONGITUDE RADIUS',
+            'Prints a list of the instances of CLASS within RADIUS',
+            'kilometers of a location given in degrees, nearest first.',
+            sep='\n'
+        )
+
+    def help_nearest(self):
+        """Help for nearest command"""
+
+        self.__print(
+            'Usage: nearest CLASS LATITUDE LONGITUDE COUNT',
+            'Prints a list of the COUNT instances of CLASS nearest to a',
+            'location given in degrees, nearest first.',
+            sep='\n'
+        )
+
+    def help_search(self):
+        """Help for search command"""
+
+        self.__print(
+            'Usage: search CLASS WORDS...',
+            'Prints a list of the instances of CLASS whose text contains any',
+            'of the given words, best match first.',
+            sep='\n'
+        )
+
+    def help_stats(self):
+        """Help for stats command"""
+
+        self.__print(
+            'Usage: stats [on | off | reset | profile | stop [FILE]]',
+            'Prints the number of calls to each storage and data model method',
+            'and how long they took, once measuring is turned on. "reset"',
+            'forgets the calls measured so far. "profile" starts profiling',
+            'every function call, and "stop" prints the slowest functions, or',
+            'writes the whole profile to FILE for pstats.',
+            sep='\n'
+        )
+
     def special_update(self, cls, args):
         """Update a data model instance using the advanced syntax"""
 
@@ -237,6 +412,52 @@ class HBNBCommand (cmd.Cmd):
                 setattr(obj, name, value)
         obj.save()
 
+    def __locate(self, line, name):
+        """Parse a class, a location, and a number, or print what's wrong"""
+
+        args = line.split()
+        if len(args) == 0:
+            self.__print('** class name missing **')
+            return None
+        if args[0] not in models.classes:
+            self.__print('** class doesn\'t exist **')
+            return None
+        if len(args) < 3:
+            self.__print('** location missing **')
+            return None
+        if len(args) < 4:
+            self.__print('** {} missing **'.format(name))
+            return None
+        values = []
+        for arg in args[1:4]:
+            try:
+                values.append(float(arg))
+            except ValueError:
+                values.append(math.nan)
+        latitude, longitude, value = values
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            self.__print('** invalid location **')
+            return None
+        if math.isnan(value):
+            self.__print('** invalid {} **'.format(name))
+            return None
+        return args[0], latitude, longitude, value
+
+    def __printList(self, objects, quote_objs):
+        """Print a list of objects a chunk at a time"""
+
+        chunk = ['[']
+        separator = ''
+        for obj in objects:
+            text = str(obj)
+            chunk.append(separator + (repr(text) if quote_objs else text))
+            separator = ', '
+            if len(chunk) >= CHUNK_SIZE:
+                self.__print(''.join(chunk), end='')
+                chunk = []
+        chunk.append(']')
+        self.__print(''.join(chunk))
+
 
 if __name__ == '__main__':
     HBNBCommand().cmdloop()
@@ -1,21 +1,124 @@
 #!/usr/bin/python3
-"""Set up a FileStorage singleton shared by data models"""
+"""Set up a storage engine singleton shared by data models"""
 
 
+from collections.abc import MutableMapping
 from models.engine.file_storage import FileStorage
+from models.engine import compact, timestamps
+import os
 import pkgutil
 import importlib
 
 
-storage = FileStorage()
+class ClassRegistry (MutableMapping):
+    """Mapping of data model class names to classes, imported when needed
 
-classes = pkgutil.iter_modules(__path__)
-classes = (module[1] for module in classes if not module[2])
-classes = ((name.title().replace('_', ''), name) for name in classes)
-classes = (
-    (cls, importlib.import_module('models.' + mod))
-    for cls, mod in classes
-)
-classes = {cls: getattr(mod, cls) for cls, mod in classes}
+    The names come from the modules in this package, which are only imported
+    once their class is looked up or the registry is iterated over.
 
-storage.reload()
+    """
+
+    def __init__(self, path):
+        """Create a registry of the data models in the given package path"""
+
+        self.__path = path
+        self.__modules = None
+        self.__classes = {}
+
+    def __delitem__(self, name):
+        """Remove a data model class from the registry"""
+
+        found = self.__classes.pop(name, None) is not None
+        if self.__discover().pop(name, None) is None and not found:
+            raise KeyError(name)
+
+    def __getitem__(self, name):
+        """Return a data model class, importing its module if necessary"""
+
+        if name in self.__classes:
+            return self.__classes[name]
+        module = self.__discover()[name]
+        cls = getattr(importlib.import_module('models.' + module), name)
+        self.__classes[name] = cls
+        return cls
+
+    def __contains__(self, name):
+        """Check if a data model class exists without importing it"""
+
+        return name in self.__classes or name in self.__discover()
+
+    def __iter__(self):
+        """Iterate over the data model class names"""
+
+        names = list(self.__discover()) + list(self.__classes)
+        return iter(dict.fromkeys(names))
+
+    def __len__(self):
+        """Return the number of data model classes"""
+
+        return len(set(self.__discover()) | set(self.__classes))
+
+    def __setitem__(self, name, cls):
+        """Add a data model class to the registry"""
+
+        self.__classes[name] = cls
+
+    def __discover(self):
+        """Find the data model modules in the package the first time"""
+
+        if self.__modules is None:
+            modules = pkgutil.iter_modules(self.__path)
+            modules = (module[1] for module in modules if not module[2])
+            self.__modules = {
+                name.title().replace('_', ''): name
+                for name in modules
+            }
+        return self.__modules
+
+
+compact.enabled = os.getenv('HBNB_COMPACT', '0') != '0'
+timestamps.epoch = os.getenv('HBNB_EPOCH_TIMES', '0') != '0'
+
+# other engines are only imported when they're used
+if os.getenv('HBNB_TYPE_STORAGE', 'file') == 'sharded':
+    from models.engine.sharded_storage import ShardedStorage
+    storage = ShardedStorage(
+        os.getenv('HBNB_SHARDS_PATH', 'storage'),
+        shards=int(os.getenv('HBNB_SHARDS', '16'))
+    )
+elif os.getenv('HBNB_TYPE_STORAGE', 'file') == 'sqlite':
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(
+        os.getenv('HBNB_SQLITE_PATH', 'storage.db'),
+        cacheEntries=(
+            int(os.environ['HBNB_CACHE_ENTRIES'])
+            if 'HBNB_CACHE_ENTRIES' in os.environ else None
+        ),
+        cacheMemory=(
+            int(os.environ['HBNB_CACHE_MEMORY'])
+            if 'HBNB_CACHE_MEMORY' in os.environ else None
+        )
+    )
+else:
+    storage = FileStorage(
+        journal=os.getenv('HBNB_JOURNAL', '0') != '0',
+        lazy=os.getenv('HBNB_LAZY', '0') != '0',
+        saveDelay=(
+            float(os.environ['HBNB_SAVE_DELAY'])
+            if 'HBNB_SAVE_DELAY' in os.environ else None
+        ),
+        path=os.getenv('HBNB_FILE_PATH'),
+        columns=os.getenv('HBNB_COLUMNS', '0') != '0'
+    )
+
+classes = ClassRegistry(__path__)
+
+# measuring is only imported when it's asked for
+if os.getenv('HBNB_STATS', '0') != '0':
+    from models.engine import stats
+    stats.enable()
+if 'HBNB_PROFILE' in os.environ:
+    import atexit
+    from models.engine import stats
+    stats.startProfile()
+    atexit.register(stats.stopProfile, os.environ['HBNB_PROFILE'])
@@ -8,4 +8,6 @@ from models.base_model import BaseModel
 class Amenity (BaseModel):
     """class for stoing amenity information"""
 
+    __text__ = ('name',)
+
     name = ''
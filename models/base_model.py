@@ -3,10 +3,12 @@
 
 import datetime
 from models import storage
+from models.engine import timestamps
+from models.engine.compact import ModelType
 import uuid
 
 
-class BaseModel:
+class BaseModel (metaclass=ModelType):
     """Base class for data models
 
     Attributes:
@@ -16,25 +18,34 @@ class BaseModel:
 
     """
 
+    __fields__ = ('id', 'created_at', 'updated_at')
+
     def __init__(self, *args, **kwargs):
         """Create new instance of BaseModel"""
         if len(kwargs) == 0:
-            self.id = str(uuid.uuid4())
-            self.created_at = datetime.datetime.now()
-            self.updated_at = datetime.datetime.now()
+            self.__dict__.update(
+                id=str(uuid.uuid4()),
+                created_at=datetime.datetime.now(),
+                updated_at=datetime.datetime.now()
+            )
             storage.new(self)
         else:
             del(kwargs['__class__'])
-            kwargs['created_at'] = datetime.datetime.strptime(
-                kwargs['created_at'],
-                '%Y-%m-%dT%H:%M:%S.%f'
-            )
-            kwargs['updated_at'] = datetime.datetime.strptime(
-                kwargs['updated_at'],
-                '%Y-%m-%dT%H:%M:%S.%f'
-            )
-            for key, value in kwargs.items():
-                setattr(self, key, value)
+            kwargs['created_at'] = timestamps.decode(kwargs['created_at'])
+            kwargs['updated_at'] = timestamps.decode(kwargs['updated_at'])
+            self.__dict__.update(kwargs)
+
+    def __delattr__(self, name):
+        """Delete an attribute and tell storage this instance was modified"""
+
+        super().__delattr__(name)
+        storage.changed(self)
+
+    def __setattr__(self, name, value):
+        """Set an attribute and tell storage this instance was modified"""
+
+        super().__setattr__(name, value)
+        storage.changed(self)
 
     def __str__(self):
         """Return the instance's ID, class name, and attributes as a string"""
@@ -56,13 +67,13 @@ class BaseModel:
         """Return this instance's attributes as a dict
 
         The returned dict also contains a key called "__class__" containing the
-        instance's class name. datetime.datetime objects are converted to
-        strings in ISO 8601 format.
+        instance's class name. The time stamps are converted to strings in ISO
+        8601 format, or to integers if timestamps.epoch is true.
 
         """
 
         ret = dict(self.__dict__)
         ret['__class__'] = type(self).__name__
-        ret['created_at'] = ret['created_at'].isoformat()
-        ret['updated_at'] = ret['updated_at'].isoformat()
+        ret['created_at'] = timestamps.encode(ret['created_at'])
+        ret['updated_at'] = timestamps.encode(ret['updated_at'])
         return ret
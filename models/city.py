@@ -8,5 +8,8 @@ from models.base_model import BaseModel
 class City (BaseModel):
     """class for stoing US city information"""
 
+    __indexes__ = ('state_id',)
+    __text__ = ('name',)
+
     state_id = ''
     name = ''
@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+"""Module for using storage engines from asyncio code"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+from models.engine.file_storage import FileStorage
+import asyncio
+import functools
+import sys
+
+
+class AsyncStorage:
+    """Asyncio interface to a storage engine that runs it in worker threads
+
+    Each coroutine method calls the storage method of the same name without
+    the leading "a" in an executor, so file and database access never blocks
+    the event loop. By default, the executor has WORKERS threads, and a
+    single one keeps calls in order and works with engines that can't be
+    used from several threads at once.
+
+    """
+
+    BATCH = 1000
+    WORKERS = 1
+
+    def __init__(self, storage, executor=None):
+        """Wrap a storage engine, running it in an executor
+
+        Args:
+            storage (Storage): the storage engine to run
+            executor (concurrent.futures.Executor): if given, runs the
+                storage methods instead of a new executor with WORKERS
+                threads
+
+        """
+
+        self.storage = storage
+        self.executor = executor
+        if executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.WORKERS, type(self).__name__
+            )
+            self.__owned = True
+        else:
+            self.__owned = False
+
+    def __aiter__(self):
+        """Iterate over every stored object"""
+
+        return self.objects()
+
+    async def __aenter__(self):
+        """Return this object to use in an async with statement"""
+
+        return self
+
+    async def __aexit__(self, *args):
+        """Close this object at the end of an async with statement"""
+
+        await self.aclose()
+
+    async def aall(self, cls=None):
+        """Return a new dict of every stored object, or one class' objects"""
+
+        return await self.run(lambda: dict(self.storage.all(cls)))
+
+    async def aclose(self):
+        """Write delayed saves, then shut down an executor created here"""
+
+        await self.aflush()
+        if self.__owned:
+            self.executor.shutdown()
+
+    async def acontains(self, obj):
+        """Check if an object is in storage"""
+
+        return await self.run(self.storage.__contains__, obj)
+
+    async def acount(self, cls=None):
+        """Return the number of stored objects, optionally of one class"""
+
+        return await self.run(self.storage.count, cls)
+
+    async def adelete(self, cls, id):
+        """Delete an object from storage"""
+
+        await self.run(self.storage.delete, cls, id)
+
+    async def afind(self, cls, **equals):
+        """Return a list of objects of a class with the given attributes"""
+
+        return await self.run(self.storage.find, cls, **equals)
+
+    async def aflush(self):
+        """Make sure everything passed to save has been written"""
+
+        await self.run(self.storage.flush)
+
+    async def aget(self, cls, id):
+        """Retrieve an object from storage"""
+
+        return await self.run(self.storage.get, cls, id)
+
+    async def anear(self, cls, latitude, longitude, radius):
+        """Return IDs of objects of a class within radius of a point"""
+
+        return await self.run(
+            self.storage.near, cls, latitude, longitude, radius
+        )
+
+    async def anearest(self, cls, latitude, longitude, count):
+        """Return a list of IDs of the count objects nearest to a point"""
+
+        return await self.run(
+            self.storage.nearest, cls, latitude, longitude, count
+        )
+
+    async def anew(self, obj):
+        """Add an object to storage"""
+
+        await self.run(self.storage.new, obj)
+
+    async def aquery(self, cls, **ranges):
+        """Return a list of IDs of objects of a class with values in ranges"""
+
+        return await self.run(self.storage.query, cls, **ranges)
+
+    async def areload(self):
+        """Reload stored objects, discarding unsaved changes"""
+
+        await self.run(self.storage.reload)
+
+    async def asave(self):
+        """Save changes to stored objects"""
+
+        await self.run(self.storage.save)
+
+    async def asearch(self, cls, text, limit=None):
+        """Return IDs of objects of a class ranked by the words in text"""
+
+        return await self.run(self.storage.search, cls, text, limit)
+
+    async def atryGet(self, cls, id, default):
+        """Try to retrieve an object, instead returning default if not found"""
+
+        return await self.run(self.storage.tryGet, cls, id, default)
+
+    async def objects(self, cls=None):
+        """Iterate over every stored object, or over one class' objects
+
+        The objects are listed in the executor, then handed out, letting
+        other tasks run after every BATCH of them.
+
+        """
+
+        objs = await self.run(lambda: list(self.storage.all(cls).values()))
+        for n, obj in enumerate(objs, 1):
+            yield obj
+            if n % self.BATCH == 0:
+                await asyncio.sleep(0)
+
+    async def run(self, function, *args, **kwargs):
+        """Call a function in the executor and return its result"""
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(function, *args, **kwargs)
+        )
+
+
+class AsyncFileStorage (AsyncStorage):
+    """Asyncio interface to FileStorage that runs it in several threads
+
+    FileStorage can be used from several threads at once, so searches
+    don't have to wait for a save that is being written.
+
+    """
+
+    WORKERS = 4
+
+    def __init__(self, storage=None, executor=None):
+        """Wrap a FileStorage, or a new one by default"""
+
+        super().__init__(
+            FileStorage() if storage is None else storage, executor
+        )
+
+
+class AsyncSQLiteStorage (AsyncStorage):
+    """Asyncio interface to SQLiteStorage that runs it in one thread
+
+    SQLiteStorage makes threads take turns using its connection, so a
+    single worker thread is enough, and calls made directly from the event
+    loop, like BaseModel.save calling new, wait for the one running.
+
+    """
+
+    def __init__(self, storage=None, executor=None):
+        """Wrap an SQLiteStorage, or a new one by default"""
+
+        from models.engine.sqlite_storage import SQLiteStorage
+        super().__init__(
+            SQLiteStorage() if storage is None else storage, executor
+        )
+
+    async def aclose(self):
+        """Close the database connection and shut down the executor
+
+        Like SQLiteStorage.close, this discards any unsaved changes, so call
+        asave first to keep them.
+
+        """
+
+        await self.run(self.storage.close)
+        await super().aclose()
+
+
+def wrap(storage):
+    """Return the asyncio interface that suits a storage engine"""
+
+    if isinstance(storage, FileStorage):
+        return AsyncFileStorage(storage)
+    # an SQLiteStorage can only exist once its module has been imported
+    sqlite = sys.modules.get('models.engine.sqlite_storage')
+    if sqlite is not None and isinstance(storage, sqlite.SQLiteStorage):
+        return AsyncSQLiteStorage(storage)
+    return AsyncStorage(storage)
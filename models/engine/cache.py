@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""Module for keeping recently used objects in memory under a budget"""
+
+
+from collections import OrderedDict
+import sys
+
+
+def sizeof(obj):
+    """Return roughly how many bytes an object and its attributes take up
+
+    Only the instance, its attribute dictionary, and the attribute values
+    themselves are counted, not whatever those values refer to in turn.
+
+    """
+
+    size = sys.getsizeof(obj)
+    attributes = getattr(obj, '__dict__', None)
+    if type(attributes) is dict:
+        size += sys.getsizeof(attributes)
+    if attributes is not None:
+        size += sum(sys.getsizeof(value) for value in attributes.values())
+    return size
+
+
+class LRUCache:
+    """Objects kept in memory by key, least recently used evicted first
+
+    Objects are evicted as soon as there are more than entries of them or
+    their sizes add up to more than memory bytes, except for the one most
+    recently used. Each evicted object is passed to evict, which can write
+    it somewhere else first. The hits, misses, and writes counters are left
+    to the owner of the cache to count, since only it knows where else an
+    object could have been found and which evicted objects it wrote.
+
+    """
+
+    def __init__(self, entries=None, memory=None, evict=None):
+        """Create an empty cache
+
+        Args:
+            entries (int): most objects to keep, or None for no limit
+            memory (int): most bytes the objects kept can take up, as
+                measured by sizeof, or None for no limit
+            evict (callable): called with the key and object of each one
+                evicted, if given
+
+        """
+
+        self.entries = entries
+        self.memory = memory
+        self.evict = evict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.__objects = OrderedDict()
+
+    def __contains__(self, k):
+        """Check if an object is kept, without marking it as used"""
+
+        return k in self.__objects
+
+    def __len__(self):
+        """Return the number of objects kept"""
+
+        return len(self.__objects)
+
+    def __repr__(self):
+        """Return the contents and counters of the cache"""
+
+        return (
+            '<{} of {} objects, {} bytes: {} hits, {} misses, {} evictions, '
+            '{} writes>'.format(
+                type(self).__name__, len(self), self.size, self.hits,
+                self.misses, self.evictions, self.writes
+            )
+        )
+
+    def clear(self):
+        """Forget every object kept, without evicting them"""
+
+        self.__objects.clear()
+        self.size = 0
+
+    def get(self, k, default=None):
+        """Return a kept object and mark it as used, or default if missing"""
+
+        found = self.__objects.get(k)
+        if found is None:
+            return default
+        self.__objects.move_to_end(k)
+        return found[0]
+
+    @property
+    def hitRate(self):
+        """The fraction of lookups that were hits, or None if none yet"""
+
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else None
+
+    def pop(self, k, default=None):
+        """Forget a kept object without evicting it, returning it"""
+
+        found = self.__objects.pop(k, None)
+        if found is None:
+            return default
+        self.size -= found[1]
+        return found[0]
+
+    def put(self, k, obj):
+        """Keep an object as the most recently used, evicting old ones
+
+        Putting an object that is already kept measures its size again, in
+        case it changed.
+
+        """
+
+        self.pop(k)
+        size = sizeof(obj) if self.memory is not None else 0
+        self.__objects[k] = (obj, size)
+        self.size += size
+        while len(self.__objects) > 1 and (
+            self.entries is not None and len(self.__objects) > self.entries or
+            self.memory is not None and self.size > self.memory
+        ):
+            old, (evicted, size) = self.__objects.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            if self.evict is not None:
+                self.evict(old, evicted)
@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+"""Module for the formats storage files can be written in"""
+
+
+from abc import ABC, abstractmethod
+from models.engine.stream import records
+import json
+import marshal
+import os
+import os.path
+import pickle
+import struct
+
+
+class Codec (ABC):
+    """Format of a storage file mapping keys to object dictionaries
+
+    Each object is encoded to bytes on its own, so that a storage engine can
+    keep the bytes of objects that haven't changed and write them again
+    without encoding them again.
+
+    """
+
+    extension = None
+
+    def dump(self, file, objects):
+        """Write a dict of object dictionaries to a binary file"""
+
+        self.write(file, (self.encode(k, obj) for k, obj in objects.items()))
+
+    @abstractmethod
+    def encode(self, key, obj):
+        """Return the bytes for one object dictionary and its key"""
+        pass
+
+    @abstractmethod
+    def read(self, file, progress=None, chunkSize=1 << 20):
+        """Yield the key and dictionary of each object in a binary file
+
+        Args:
+            file (BinaryIO): file to read, positioned at its start
+            progress (Callable[[int, int], Any]): if given, called with the
+                number of bytes read so far and the size of the file in bytes
+                every time a chunk is read
+            chunkSize (int): number of bytes to read from the file at a time
+
+        """
+        pass
+
+    @abstractmethod
+    def write(self, file, encoded):
+        """Write objects encoded with encode to a binary file"""
+        pass
+
+
+class JSONCodec (Codec):
+    """Codec for a JSON object whose values are the object dictionaries"""
+
+    extension = '.json'
+
+    def encode(self, key, obj):
+        """Return the UTF-8 JSON for one key and value of the object"""
+
+        return (json.dumps(key) + ': ' + json.dumps(obj)).encode('utf-8')
+
+    def read(self, file, progress=None, chunkSize=1 << 20):
+        """Decode the JSON object in a file one key and value at a time"""
+
+        return records(file, progress, chunkSize)
+
+    def write(self, file, encoded):
+        """Write the keys and values between braces"""
+
+        file.write(b'{')
+        file.write(b', '.join(encoded))
+        file.write(b'}')
+
+
+class RecordCodec (Codec):
+    """Codec for a header line followed by length-prefixed binary records
+
+    Each record is a (key, dictionary) tuple serialized with dumps and
+    preceded by its length as a 4 byte little-endian unsigned integer.
+    Subclasses set the header and the serialization functions.
+
+    """
+
+    header = None
+    length = struct.Struct('<I')
+
+    @abstractmethod
+    def dumps(self, value):
+        """Serialize a (key, dictionary) tuple"""
+        pass
+
+    def encode(self, key, obj):
+        """Return the length-prefixed record for an object"""
+
+        data = self.dumps((key, obj))
+        return self.length.pack(len(data)) + data
+
+    @abstractmethod
+    def loads(self, data):
+        """Deserialize a (key, dictionary) tuple"""
+        pass
+
+    def read(self, file, progress=None, chunkSize=1 << 20):
+        """Decode the records in a file, reading it a chunk at a time
+
+        Raises ValueError if the file doesn't start with the header, ends in
+        the middle of a record, or holds a record that can't be loaded.
+
+        """
+
+        if file.read(len(self.header)) != self.header:
+            raise ValueError('storage file does not start with {!r}'.format(
+                self.header
+            ))
+        try:
+            size = os.fstat(file.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            size = None
+        done = len(self.header)
+        loads, unpack = self.loads, self.length.unpack_from
+        width = self.length.size
+        data, pos = b'', 0
+        while True:
+            end = pos + width
+            if end <= len(data):
+                end += unpack(data, pos)[0]
+            if end <= len(data):
+                try:
+                    record = loads(data[pos + width:end])
+                except Exception as error:
+                    message = 'corrupt record in storage file'
+                    raise ValueError(message) from error
+                yield record
+                pos = end
+                continue
+            chunk = file.read(max(chunkSize, end - len(data)))
+            if len(chunk) == 0:
+                if pos < len(data):
+                    raise ValueError('storage file ends inside a record')
+                return
+            done += len(chunk)
+            data, pos = data[pos:] + chunk, 0
+            if progress is not None:
+                progress(done, size)
+
+    def write(self, file, encoded):
+        """Write the header and then every record"""
+
+        file.write(self.header)
+        for data in encoded:
+            file.write(data)
+
+
+class MarshalCodec (RecordCodec):
+    """Record codec using marshal, which only handles built-in types
+
+    The marshal format may change between Python versions, so these files
+    are meant to be read by the same version that wrote them.
+
+    """
+
+    extension = '.marshal'
+    header = b'HBNB marshal %d\n' % marshal.version
+
+    def dumps(self, value):
+        """Serialize a (key, dictionary) tuple with marshal"""
+
+        return marshal.dumps(value)
+
+    def loads(self, data):
+        """Deserialize a (key, dictionary) tuple with marshal"""
+
+        return marshal.loads(data)
+
+
+class PickleCodec (RecordCodec):
+    """Record codec using pickle, whose files later Python versions can read
+
+    Loading a pickle can run arbitrary code, so only read files written by
+    a trusted program.
+
+    """
+
+    extension = '.pickle'
+    header = b'HBNB pickle\n'
+
+    def dumps(self, value):
+        """Serialize a (key, dictionary) tuple with pickle"""
+
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        """Deserialize a (key, dictionary) tuple with pickle"""
+
+        return pickle.loads(data)
+
+
+CODECS = {
+    codec.extension: codec
+    for codec in (JSONCodec(), MarshalCodec(), PickleCodec())
+}
+
+
+def forPath(path):
+    """Return the codec for a storage file, chosen by its extension"""
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in CODECS:
+        raise ValueError('no codec for storage file {!r}'.format(path))
+    return CODECS[extension]
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+"""Module for the compact representation of data model instances"""
+
+
+from collections.abc import MutableMapping
+
+
+enabled = False
+
+
+class Attributes (MutableMapping):
+    """Dictionary-like view of the attributes set on a Compact instance
+
+    Changing the view changes the instance directly, without going through
+    its class' __setattr__ or __delattr__, just like changing the __dict__
+    of an ordinary instance.
+
+    """
+
+    def __init__(self, obj):
+        """Create a view of an instance's attributes"""
+
+        self.__obj = obj
+
+    def __delitem__(self, name):
+        """Remove an attribute from the instance"""
+
+        try:
+            Compact.__delattr__(self.__obj, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __getitem__(self, name):
+        """Return the value of an attribute set on the instance"""
+
+        obj = self.__obj
+        if name in type(obj).__fields__:
+            try:
+                return object.__getattribute__(obj, name)
+            except AttributeError:
+                raise KeyError(name) from None
+        return (Compact.extra(obj, False) or {})[name]
+
+    def __iter__(self):
+        """Iterate over the names of the attributes set on the instance"""
+
+        obj = self.__obj
+        for name in type(obj).__fields__:
+            try:
+                object.__getattribute__(obj, name)
+            except AttributeError:
+                continue
+            yield name
+        yield from list(Compact.extra(obj, False) or ())
+
+    def __len__(self):
+        """Return the number of attributes set on the instance"""
+
+        return sum(1 for name in self)
+
+    def __repr__(self):
+        """Return the attributes formatted like a dict"""
+
+        return repr(dict(self))
+
+    def __setitem__(self, name, value):
+        """Set an attribute on the instance"""
+
+        Compact.__setattr__(self.__obj, name, value)
+
+    def update(self, *args, **kwargs):
+        """Set several attributes from a mapping or keyword arguments"""
+
+        obj = self.__obj
+        fields = type(obj).__fields__
+        for other in args + (kwargs,):
+            for name in other.keys():
+                if name in fields:
+                    object.__setattr__(obj, name, other[name])
+                else:
+                    Compact.extra(obj)[name] = other[name]
+
+
+class Compact:
+    """Base class for instances that keep their attributes in slots
+
+    The fields listed in a class' __fields__ each get a slot, and any other
+    attribute is kept in a dictionary that is only created once one is set.
+    Fields that haven't been set fall back on the class' __defaults__.
+
+    """
+
+    __slots__ = ('__weakref__', '__extra')
+    __fields__ = ()
+    __defaults__ = {}
+
+    def __delattr__(self, name):
+        """Remove an attribute from its slot or from the extra attributes"""
+
+        try:
+            object.__delattr__(self, name)
+        except AttributeError:
+            extra = Compact.extra(self, False)
+            if extra is None or name not in extra:
+                raise
+            del extra[name]
+
+    def __getattr__(self, name):
+        """Look up an attribute that isn't in a slot"""
+
+        if name != '_Compact__extra':
+            extra = Compact.extra(self, False)
+            if extra is not None and name in extra:
+                return extra[name]
+            if name in type(self).__defaults__:
+                return type(self).__defaults__[name]
+        raise AttributeError('{!r} object has no attribute {!r}'.format(
+            type(self).__name__, name
+        ))
+
+    def __setattr__(self, name, value):
+        """Set an attribute in its slot or with the extra attributes"""
+
+        if name in type(self).__fields__:
+            object.__setattr__(self, name, value)
+        else:
+            Compact.extra(self)[name] = value
+
+    @property
+    def __dict__(self):
+        """Return a view of the attributes set on this instance"""
+
+        return Attributes(self)
+
+    @staticmethod
+    def extra(obj, create=True):
+        """Return the dictionary of an instance's attributes without slots
+
+        If it doesn't exist yet, it's created, or None is returned if create
+        is false.
+
+        """
+
+        try:
+            return object.__getattribute__(obj, '_Compact__extra')
+        except AttributeError:
+            if not create:
+                return None
+        extra = {}
+        object.__setattr__(obj, '_Compact__extra', extra)
+        return extra
+
+
+class ModelType (type):
+    """Metaclass of data models that makes them compact when enabled
+
+    While enabled is true, data model classes created with this metaclass
+    derive from Compact, and their public class attributes that aren't
+    methods become slots, with their values kept in __defaults__ instead.
+    Classes are left alone otherwise, or if they define __slots__.
+
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        """Create a data model class, compact if enabled"""
+
+        if not enabled or '__slots__' in namespace:
+            return super().__new__(mcs, name, bases, namespace)
+        if not any(issubclass(base, Compact) for base in bases):
+            bases += (Compact,)
+        fields = []
+        defaults = {}
+        for base in reversed(bases):
+            fields.extend(getattr(base, '__fields__', ()))
+            defaults.update(getattr(base, '__defaults__', {}))
+        fields.extend(namespace.get('__fields__', ()))
+        namespace = dict(namespace)
+        for attribute, value in list(namespace.items()):
+            if attribute.startswith('_') or callable(value) or isinstance(
+                value, (classmethod, staticmethod, property)
+            ):
+                continue
+            defaults[attribute] = namespace.pop(attribute)
+            fields.append(attribute)
+        fields = tuple(dict.fromkeys(fields))
+        inherited = set()
+        for base in bases:
+            inherited.update(getattr(base, '__fields__', ()))
+        namespace['__slots__'] = tuple(f for f in fields if f not in inherited)
+        namespace['__fields__'] = fields
+        namespace['__defaults__'] = defaults
+        return super().__new__(mcs, name, bases, namespace)
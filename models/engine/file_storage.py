@@ -2,11 +2,25 @@
 """module for FileStorage class"""
 
 
-from collections.abc import Mapping
+from models.engine.codec import forPath
+from models.engine.index import AttributeIndex, ClassIndex, ColumnIndex
+from models.engine.index import GridIndex, IndexedDict, TextIndex, bounds
+from models.engine.index import number
+from models.engine.rwlock import ReadWriteLock
 from models.engine.storage import Storage
 import models
+import atexit
+import contextlib
+import os
 import os.path
 import json
+import threading
+import time
+import uuid
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 def key(cls, id):
@@ -17,65 +31,995 @@ def key(cls, id):
     return str(cls) + '.' + str(id)
 
 
+def entries(path, offset=0):
+    """Yield each entry in a journal file as a dict, starting at a byte offset
+
+    A final line without a line break is the remains of an interrupted write,
+    so it is ignored instead of being treated as an error.
+
+    """
+
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b'\n'):
+                break
+            yield json.loads(line)
+
+
+def replay(path, records):
+    """Apply the entries of a journal file to a dict of object records"""
+
+    for entry in entries(path):
+        if entry['op'] == 'delete':
+            records.pop(entry['key'], None)
+        else:
+            records[entry['key']] = entry['obj']
+    return records
+
+
+def signature(path):
+    """Return a list identifying the current contents of a file, or None"""
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+class Record:
+    """Stored object whose data model instance hasn't been created yet
+
+    Attributes are looked up in the object's dictionary from the storage file
+    and then in its class, so indexes can be built without creating the
+    instance. Time stamps are still strings.
+
+    """
+
+    __slots__ = ('cls', 'data')
+
+    def __init__(self, cls, data):
+        """Keep a data model class and the dictionary to create it from"""
+
+        if not isinstance(data, dict):
+            raise TypeError('stored object is not a JSON object')
+        self.cls = cls
+        self.data = data
+
+    def __getattr__(self, name):
+        """Look up an attribute of the object that will be created"""
+
+        if name in self.data:
+            return self.data[name]
+        # compact classes keep their defaults here, with slots in their place
+        defaults = getattr(self.cls, '__defaults__', None)
+        if isinstance(defaults, dict) and name in defaults:
+            return defaults[name]
+        value = getattr(self.cls, name)
+        # a data descriptor, like a slot, only has a value on an instance
+        if hasattr(type(value), '__set__') or hasattr(
+            type(value), '__delete__'
+        ):
+            raise AttributeError('{!r} object has no attribute {!r}'.format(
+                self.cls.__name__, name
+            ))
+        return value
+
+    @property
+    def __model__(self):
+        """The data model class, whose defaults the object starts with"""
+
+        return self.cls
+
+    def build(self):
+        """Create the data model instance"""
+
+        return self.cls(**self.data)
+
+
 class FileStorage (Storage):
-    """class used to store and retrieve data model instances using JSON"""
+    """class used to store and retrieve data model instances in a file"""
 
     __file_path = "storage.json"
-    __objects = {}
+    __log_path = __file_path + '.log'
+    __codec = forPath(__file_path)
+    __classes = ClassIndex()
+    __attributes = AttributeIndex()
+    __columns = ColumnIndex()
+    __grid = GridIndex()
+    __text = TextIndex()
+    __textVersion = None
+    # the other indexes are only built the first time they're used
+    __objects = IndexedDict([__classes])
+    __changes = {}
+    __encoded = {}
+    __compactor = None
+    __unbuilt = 0
+    __loaded = False
+    __seen = None
+    __checked = 0.0
+    __local = threading.local()
+    __files = threading.Lock()
+    __lock = ReadWriteLock()
+    __building = threading.Lock()
+    __wake = threading.Condition()
+    __writer = None
+    __saver = None
+    __due = None
+    __writing = False
+    __failed = False
+
+    def __init__(self, journal=False, compactSize=1 << 22, progress=None,
+                 lazy=False, refreshInterval=1.0, saveDelay=None, path=None,
+                 columns=False):
+        """Set up storage, optionally appending changes to a journal file
+
+        Args:
+            journal (bool): if true, save only appends the changes made since
+                the last save to a journal instead of rewriting the whole file
+            compactSize (int): journal size in bytes after which it is merged
+                into the main file by a background thread
+            progress (Callable[[int, int], Any]): if given, called with the
+                number of bytes read so far and the file size while reloading
+            lazy (bool): if true, reload keeps the dictionaries read from the
+                file, and only turns each one into a data model instance when
+                it is first retrieved
+            refreshInterval (float): seconds after which methods that read
+                stored objects first check for changes saved by other
+                processes, or None to only check when saving
+            saveDelay (float): if not None, save returns right away, and a
+                background thread writes the changes at most this many
+                seconds later, once for every save called meanwhile
+            path (str): if given, the storage file that every instance uses
+                from now on, written in the format its extension names; a
+                RuntimeError is raised instead if there are unsaved changes
+            columns (bool): if true, query searches the attributes declared
+                in a class' __columns__ in a column index, built the first
+                time it's needed
+
+        """
+
+        self.journal = journal
+        self.compactSize = compactSize
+        self.progress = progress
+        self.lazy = lazy
+        self.refreshInterval = refreshInterval
+        self.saveDelay = saveDelay
+        self.columns = columns
+        if path is not None and path != FileStorage.__file_path:
+            codec = forPath(path)
+            self.flush()
+            self.__waitForCompaction()
+            with FileStorage.__lock.writer:
+                if len(FileStorage.__changes) > 0:
+                    raise RuntimeError(
+                        'unsaved changes would be lost by switching to '
+                        '{!r}'.format(path)
+                    )
+                FileStorage.__file_path = path
+                FileStorage.__log_path = path + '.log'
+                FileStorage.__codec = codec
+                FileStorage.__loaded = False
+                FileStorage.__textVersion = None
 
     def __contains__(self, obj):
         """Check if an object is in storage"""
 
+        self.__ready()
+        # a single lookup is atomic, so it doesn't need to wait for writers
         if isinstance(obj, str):
             return obj in FileStorage.__objects
         return key(type(obj), obj.id) in FileStorage.__objects
 
-    def all(self):
-        """return __objects dictionary"""
-        return FileStorage.__objects
+    def all(self, cls=None):
+        """return __objects dictionary, or a new dict of one class' objects"""
+        self.__ready()
+        if cls is None:
+            if FileStorage.__unbuilt > 0:
+                with FileStorage.__lock.reader:
+                    for k in list(FileStorage.__objects):
+                        FileStorage.__build(k)
+                    FileStorage.__unbuilt = 0
+            return FileStorage.__objects
+        if isinstance(cls, type):
+            cls = cls.__name__
+        with FileStorage.__lock.reader:
+            return {
+                k: FileStorage.__build(k)
+                for k in FileStorage.__classes.keys(cls)
+            }
+
+    def batch(self):
+        """Write any delayed saves, then save once at the end of a block
+
+        Delayed saves are written first, so that discarding the changes
+        made in the block doesn't discard the ones saved before it.
+
+        """
+
+        self.flush()
+        return super().batch()
+
+    def changed(self, obj):
+        """Mark a stored object as updated and reindex its attributes"""
+
+        k = key(type(obj), getattr(obj, 'id', None))
+        with FileStorage.__lock.writer:
+            # checked while writing, so a delete can't slip in before it
+            if FileStorage.__objects.get(k) is not obj:
+                return
+            for index in FileStorage.__objects.indexes:
+                index.replace(k, obj, obj)
+            if k not in FileStorage.__changes:
+                FileStorage.__changes[k] = ('update', obj)
+
+    def compact(self, wait=False):
+        """Merge the journal into the main storage file in the background"""
+
+        if FileStorage.__compactor is not None:
+            if not wait and FileStorage.__compactor.is_alive():
+                return
+            FileStorage.__compactor.join()
+        segment = FileStorage.__log_path + '.1'
+        with FileStorage.__locked(True):
+            if not os.path.exists(segment):
+                if not os.path.exists(FileStorage.__log_path):
+                    return
+                current = FileStorage.__state() == FileStorage.__seen
+                os.replace(FileStorage.__log_path, segment)
+                if current:
+                    FileStorage.__seen = FileStorage.__state()
+        FileStorage.__compactor = threading.Thread(
+            target=FileStorage.__merge,
+            args=(FileStorage.__file_path, segment),
+            daemon=True
+        )
+        FileStorage.__compactor.start()
+        if wait:
+            FileStorage.__compactor.join()
+
+    def count(self, cls=None):
+        """Return the number of stored objects, optionally of only one class"""
+
+        self.__ready()
+        if cls is None:
+            return len(FileStorage.__objects)
+        if isinstance(cls, type):
+            cls = cls.__name__
+        return FileStorage.__classes.count(cls)
 
     def delete(self, cls, id):
         """Delete an object from storage"""
 
-        del FileStorage.__objects[key(cls, id)]
+        self.__ready()
+        k = key(cls, id)
+        with FileStorage.__lock.writer:
+            del FileStorage.__objects[k]
+            if FileStorage.__changes.get(k, ('',))[0] == 'new':
+                del FileStorage.__changes[k]
+            else:
+                FileStorage.__changes[k] = ('delete', None)
+
+    def find(self, cls, **equals):
+        """Return a list of objects of a class with the given attribute values
+
+        Attributes declared in the class' __indexes__ are looked up in an
+        index, and only the objects found that way are checked for the rest.
+
+        """
+
+        self.__ready()
+        if isinstance(cls, type):
+            cls = cls.__name__
+        missing = object()
+        attributes = FileStorage.__index(FileStorage.__attributes)
+        with FileStorage.__lock.reader:
+            keys = None
+            for name, value in equals.items():
+                found = attributes.find(cls, name, value)
+                if found is not None and (
+                    keys is None or len(found) < len(keys)
+                ):
+                    keys = found
+            if keys is None:
+                keys = FileStorage.__classes.keys(cls)
+            return [
+                FileStorage.__build(k) for k in keys
+                if all(
+                    getattr(FileStorage.__objects[k], name, missing) == value
+                    for name, value in equals.items()
+                )
+            ]
+
+    def flush(self):
+        """Write the changes of delayed saves now instead of later
+
+        A delayed save that is being written is waited for, and one that
+        failed is tried again, raising its error if it fails again.
+
+        """
+
+        wake = FileStorage.__wake
+        with wake:
+            while FileStorage.__writing:
+                wake.wait()
+            due = FileStorage.__due is not None or FileStorage.__failed
+            FileStorage.__due = None
+            FileStorage.__failed = False
+        if not due:
+            return
+        try:
+            self.__save()
+        except BaseException:
+            with wake:
+                FileStorage.__failed = True
+            raise
 
     def get(self, cls, id):
         """Retrieve an object from storage"""
 
-        return FileStorage.__objects[key(cls, id)]
+        self.__ready()
+        return FileStorage.__build(key(cls, id))
+
+    def near(self, cls, latitude, longitude, radius):
+        """Return a list of IDs of objects of a class within radius of a point
+
+        Only the objects in the cells of a grid index that the circle
+        overlaps are measured.
+
+        """
+
+        self.__ready()
+        if isinstance(cls, type):
+            cls = cls.__name__
+        grid = FileStorage.__index(FileStorage.__grid)
+        with FileStorage.__lock.reader:
+            found = grid.near(cls, latitude, longitude, radius)
+        return [k.partition('.')[2] for d, k in found]
+
+    def nearest(self, cls, latitude, longitude, count):
+        """Return a list of IDs of the count objects of a class nearest a point
+
+        The grid index is searched in widening circles around the point.
+
+        """
+
+        self.__ready()
+        if isinstance(cls, type):
+            cls = cls.__name__
+        grid = FileStorage.__index(FileStorage.__grid)
+        with FileStorage.__lock.reader:
+            found = grid.nearest(cls, latitude, longitude, count)
+        return [k.partition('.')[2] for d, k in found]
 
     def new(self, obj):
-        """add dictionary rep of obj to dictionary __objects"""
+        """add dictionary rep of obj to dictionary __objects
+
+        Adding an object that is already stored marks it as updated, so that
+        the next save writes it again.
+
+        """
+
+        self.__ready()
+        k = key(type(obj), obj.id)
+        with FileStorage.__lock.writer:
+            op = FileStorage.__changes.get(k, ('',))[0]
+            if op == 'delete' or op != 'new' and k in FileStorage.__objects:
+                op = 'update'
+            elif op != 'update':
+                op = 'new'
+            FileStorage.__objects[k] = obj
+            FileStorage.__changes[k] = (op, obj)
+
+    def query(self, cls, **ranges):
+        """Return a list of IDs of objects of a class with values in ranges
 
-        FileStorage.__objects[key(type(obj), obj.id)] = obj
+        If columns is true, attributes declared in the class' __columns__
+        are searched in a column index, and only the objects found that way
+        are checked for the rest. Otherwise every object of the class is
+        checked.
+
+        """
+
+        self.__ready()
+        if isinstance(cls, type):
+            cls = cls.__name__
+        columns = ()
+        if self.columns:
+            columns = FileStorage.__index(FileStorage.__columns).columns(cls)
+        indexed = {n: r for n, r in ranges.items() if n in columns}
+        limits = bounds(
+            {n: r for n, r in ranges.items() if n not in indexed}
+        )
+        with FileStorage.__lock.reader:
+            if len(indexed) > 0:
+                keys = FileStorage.__columns.select(cls, **indexed)
+            else:
+                keys = FileStorage.__classes.keys(cls)
+            objects = FileStorage.__objects
+            return [
+                k.partition('.')[2] for k in keys
+                if all(
+                    low <= number(getattr(objects[k], name, None)) <= high
+                    for name, low, high in limits
+                )
+            ]
 
     def reload(self):
-        """retreive repr of objects from JSON file and store in __objects"""
-        if not os.path.exists(FileStorage.__file_path):
+        """retreive repr of objects from JSON file and store in __objects
+
+        The file is decoded one object at a time, and each one is turned into
+        a data model instance right away, so the whole JSON document is never
+        held in memory at once. Other methods call this the first time they
+        are used if it hasn't been called yet.
+
+        """
+
+        self.flush()
+        self.__waitForCompaction()
+        with FileStorage.__locked(False):
+            self.__reload()
+
+    def refresh(self):
+        """Load the changes other processes saved since storage was last read
+
+        Unsaved changes are kept. If only a journal grew, just its new
+        entries are read. Otherwise the files are read again, but only the
+        objects whose stored dictionaries changed are created again, so other
+        instances stay the same. Methods that read stored objects call this
+        every refreshInterval seconds, and save calls it before writing.
+
+        """
+
+        if not FileStorage.__loaded:
+            self.reload()
             return
-        with open(FileStorage.__file_path, 'rt') as file:
-            toLoad = json.load(file)
-        if not isinstance(toLoad, Mapping):
-            raise ValueError('value in JSON file is not an object')
-        FileStorage.__objects = {
-            key: models.classes[key.partition('.')[0]](**obj)
-            for key, obj in toLoad.items()
-        }
+        with FileStorage.__locked(False), FileStorage.__lock.writer:
+            self.__refresh()
 
     def save(self):
-        """save the instances to the storage file"""
+        """save the instances to the storage file
 
-        toStore = {
-            key: obj.to_dict()
-            for key, obj in FileStorage.__objects.items()
-        }
-        with open(FileStorage.__file_path, 'wt') as file:
-            json.dump(toStore, file)
+        Objects that haven't changed since the last save are written as the
+        bytes they were encoded to back then instead of being re-encoded,
+        unless they have list or dict attributes. Nothing is done while a
+        batch is in progress. If saveDelay isn't None, a background thread
+        is told to save later instead.
+
+        """
+
+        if self.batching:
+            return
+        if self.saveDelay is None:
+            self.__save()
+            return
+        wake = FileStorage.__wake
+        with wake:
+            if FileStorage.__due is None:
+                FileStorage.__due = time.monotonic() + self.saveDelay
+                FileStorage.__saver = self
+            if FileStorage.__writer is None:
+                FileStorage.__writer = threading.Thread(
+                    target=FileStorage.__persist, daemon=True
+                )
+                FileStorage.__writer.start()
+                atexit.register(self.flush)
+            wake.notify_all()
+
+    def search(self, cls, text, limit=None):
+        """Return a list of IDs of objects of a class ranked by words in text
+
+        The words are looked up in a text index, which is saved next to the
+        storage file, and read back the first time it's searched instead of
+        being rebuilt if it's still up to date.
+
+        """
+
+        self.__ready()
+        if isinstance(cls, type):
+            cls = cls.__name__
+        index = FileStorage.__index(FileStorage.__text)
+        with FileStorage.__lock.reader:
+            found = index.search(cls, text, limit)
+        return [k.partition('.')[2] for score, k in found]
 
     def tryGet(self, cls, id, default):
         """Try to retrieve an object, instead returning default if not found"""
 
-        k = key(cls, id)
-        if k in FileStorage.__objects:
-            return FileStorage.__objects[k]
-        return default
+        self.__ready()
+        try:
+            return FileStorage.__build(key(cls, id))
+        except KeyError:
+            return default
+
+    def __append(self, changes):
+        """Append one journal entry per change made since the last save"""
+
+        if len(changes) == 0:
+            return
+        entries = []
+        for k, (op, obj) in changes.items():
+            FileStorage.__encoded.pop(k, None)
+            entry = {'op': op, 'key': k}
+            if obj is not None:
+                entry['obj'] = obj.to_dict()
+            entries.append(json.dumps(entry) + '\n')
+        with open(FileStorage.__log_path, 'at') as file:
+            file.write(''.join(entries))
+            size = file.tell()
+        if size >= self.compactSize:
+            self.compact()
+
+    @staticmethod
+    def __build(k):
+        """Return a stored object, creating its instance if it's a Record"""
+
+        obj = FileStorage.__objects[k]
+        if type(obj) is Record:
+            with FileStorage.__lock.reader, FileStorage.__building:
+                obj = FileStorage.__objects[k]
+                if type(obj) is Record:
+                    obj = obj.build()
+                    # the key and attribute values are the same, so skip the
+                    # indexes
+                    dict.__setitem__(FileStorage.__objects, k, obj)
+        return obj
+
+    @staticmethod
+    def __index(index):
+        """Return an index of every stored object, building it if it isn't
+
+        Once built, the index is kept up to date with the stored objects
+        until they're reloaded. The text index is read from its file instead
+        if that is up to date.
+
+        """
+
+        objects = FileStorage.__objects
+        if index not in objects.indexes:
+            # the files are locked first, as when reloading, so they can't
+            # change while the text index is read
+            with FileStorage.__locked(False), FileStorage.__lock.writer:
+                if index not in objects.indexes:
+                    if index is not FileStorage.__text or (
+                        not FileStorage.__loadText()
+                    ):
+                        index.clear()
+                        for k, obj in objects.items():
+                            index.add(k, obj)
+                    objects.indexes.append(index)
+        return index
+
+    @staticmethod
+    def __loadText():
+        """Read the saved text index and reindex the objects changed since
+
+        The index is only read if the objects in memory were loaded from
+        the storage files as they are now. Returns whether it was read.
+
+        """
+
+        text = FileStorage.__text
+        if FileStorage.__state() != FileStorage.__seen or (
+            not FileStorage.__readText(text, FileStorage.__file_path)
+        ):
+            return False
+        objects = FileStorage.__objects
+        changed = set(FileStorage.__changes)
+        for path in (FileStorage.__log_path + '.1', FileStorage.__log_path):
+            changed.update(entry['key'] for entry in entries(path))
+        for k in changed:
+            text.remove(k, None)
+            if k in objects:
+                text.add(k, objects[k])
+        return True
+
+    def __loader(self):
+        """Return a function that creates a stored object from its dict"""
+
+        if self.lazy:
+            def load(k, obj):
+                return Record(models.classes[k.partition('.')[0]], obj)
+        else:
+            def load(k, obj):
+                return models.classes[k.partition('.')[0]](**obj)
+        return load
+
+    @staticmethod
+    @contextlib.contextmanager
+    def __locked(exclusive, wait=True):
+        """Hold a lock on the storage files shared with other processes
+
+        Only one thread in a process holds the lock at a time. Across
+        processes, readers share an advisory lock, and a writer holds it
+        exclusively, except on systems without fcntl. Locking again in a
+        thread that holds the lock does nothing. Yields whether the lock is
+        held, which is only false if wait is false and the lock is busy.
+
+        """
+
+        local = FileStorage.__local
+        if getattr(local, 'locked', False):
+            yield True
+            return
+        if not FileStorage.__files.acquire(wait):
+            yield False
+            return
+        local.locked = True
+        try:
+            if fcntl is None:
+                yield True
+                return
+            with open(FileStorage.__file_path + '.lock', 'ab') as file:
+                flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                try:
+                    fcntl.flock(file, flags if wait else flags | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                yield True
+        finally:
+            local.locked = False
+            FileStorage.__files.release()
+
+    @staticmethod
+    def __merge(path, segment):
+        """Rewrite the storage file with a journal segment applied to it"""
+
+        with FileStorage.__locked(True):
+            if not os.path.exists(segment):
+                return
+            current = FileStorage.__state() == FileStorage.__seen
+            codec = forPath(path)
+            records = {}
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    records = dict(codec.read(file))
+            text = TextIndex()
+            indexed = FileStorage.__readText(text, path)
+            replay(segment, records)
+            with open(path + '.tmp', 'wb') as file:
+                codec.dump(file, records)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(path + '.tmp', path)
+            if indexed:
+                for entry in entries(segment):
+                    k = entry['key']
+                    text.remove(k, None)
+                    if entry['op'] != 'delete':
+                        cls = models.classes[k.partition('.')[0]]
+                        text.add(k, Record(cls, entry['obj']))
+                FileStorage.__writeText(text.dump(), path)
+                # the index in memory may not match the one just written
+                FileStorage.__textVersion = None
+            os.remove(segment)
+            if current:
+                FileStorage.__seen = FileStorage.__state()
+
+    @staticmethod
+    def __mutable(obj):
+        """Check if an object has list or dict attributes
+
+        Those can be changed in place without calling changed, so objects
+        with them are encoded again every time.
+
+        """
+
+        if type(obj) is Record:
+            return False
+        attributes = getattr(obj, '__dict__', None)
+        if attributes is None:
+            return False
+        return any(type(v) in (list, dict) for v in attributes.values())
+
+    @staticmethod
+    def __persist():
+        """Write delayed saves in the background as they become due"""
+
+        wake = FileStorage.__wake
+        while True:
+            with wake:
+                while FileStorage.__due is None or (
+                    FileStorage.__due > time.monotonic()
+                ):
+                    if FileStorage.__due is None:
+                        wake.wait()
+                    else:
+                        wake.wait(FileStorage.__due - time.monotonic())
+                storage = FileStorage.__saver
+                FileStorage.__due = None
+                FileStorage.__writing = True
+            try:
+                storage.__save()
+                failed = False
+            except Exception:
+                failed = True
+            with wake:
+                FileStorage.__writing = False
+                FileStorage.__failed = FileStorage.__failed or failed
+                wake.notify_all()
+
+    @staticmethod
+    def __readText(index, path):
+        """Load the text index saved for a storage file if it's up to date
+
+        The index is only loaded if it was saved for the current contents of
+        the file and the same text attributes of each class. Returns whether
+        it was loaded.
+
+        """
+
+        try:
+            with open(path + '.text.sig', 'rt') as file:
+                state = json.load(file)
+            if state['signature'] != signature(path):
+                return False
+            with open(path + '.text', 'rt') as file:
+                saved = json.load(file)
+            if saved['version'] != state['version']:
+                return False
+            for cls, names in saved['fields'].items():
+                if cls not in models.classes or list(
+                    getattr(models.classes[cls], '__text__', ())
+                ) != names:
+                    return False
+            index.load(saved)
+        except (OSError, ValueError, LookupError, TypeError, AttributeError):
+            index.clear()
+            return False
+        FileStorage.__textVersion = saved['version']
+        return True
+
+    def __ready(self):
+        """Load storage on first use, then refresh it every refreshInterval"""
+
+        if not FileStorage.__loaded:
+            self.__waitForCompaction()
+            with FileStorage.__locked(False):
+                # another thread may have loaded storage in the meantime
+                if not FileStorage.__loaded:
+                    self.__reload()
+        elif self.refreshInterval is not None and (
+            time.monotonic() - FileStorage.__checked >= self.refreshInterval
+        ):
+            # skip the check instead of waiting for a save to finish
+            with FileStorage.__locked(False, False) as held:
+                if held:
+                    with FileStorage.__lock.writer:
+                        self.__refresh()
+
+    def __refresh(self):
+        """Load changes saved by other processes while holding a lock"""
+
+        FileStorage.__checked = time.monotonic()
+        seen, state = FileStorage.__seen, FileStorage.__state()
+        if state == seen:
+            return
+        # another process may have saved a different text index
+        FileStorage.__textVersion = None
+        objects = FileStorage.__objects
+        changes = FileStorage.__changes
+        load = self.__loader()
+        log = state[2]
+        if state[:2] == seen[:2] and log is not None and (
+            seen[2] is None or seen[2][2] == log[2] and seen[2][0] <= log[0]
+        ):
+            offset = 0 if seen[2] is None else seen[2][0]
+            for entry in entries(FileStorage.__log_path, offset):
+                k = entry['key']
+                if k in changes:
+                    continue
+                if entry['op'] == 'delete':
+                    objects.pop(k, None)
+                else:
+                    objects[k] = load(k, entry['obj'])
+        else:
+            fresh = {}
+            for k, obj, journal in FileStorage.__scan():
+                if obj is None:
+                    fresh.pop(k, None)
+                elif k not in changes:
+                    old = objects.get(k)
+                    if old is None or not FileStorage.__unchanged(
+                        k, old, obj
+                    ):
+                        old = load(k, obj)
+                    fresh[k] = old
+            for k in [k for k in objects if k not in fresh]:
+                if k not in changes:
+                    del objects[k]
+            for k, obj in fresh.items():
+                if objects.get(k) is not obj:
+                    objects[k] = obj
+        if self.lazy:
+            FileStorage.__unbuilt = len(objects)
+        FileStorage.__seen = state
+
+    def __reload(self):
+        """Load every stored object while holding a lock on the files
+
+        The files are read before taking the lock on the objects in memory,
+        so other threads can keep reading them until they are replaced.
+
+        """
+
+        FileStorage.__seen = FileStorage.__state()
+        FileStorage.__checked = time.monotonic()
+        if not any(FileStorage.__seen):
+            FileStorage.__loaded = True
+            return
+        load = self.__loader()
+        toLoad = {}
+        for k, obj, journal in FileStorage.__scan(self.progress):
+            if obj is None:
+                toLoad.pop(k, None)
+            else:
+                toLoad[k] = load(k, obj)
+        with FileStorage.__lock.writer:
+            objects = FileStorage.__objects
+            objects.clear()
+            # looking up attributes of records is slow, so indexes that need
+            # them are built again when they're first used
+            objects.indexes = [FileStorage.__classes]
+            objects.update(toLoad)
+            FileStorage.__unbuilt = len(toLoad) if self.lazy else 0
+            FileStorage.__loaded = True
+            FileStorage.__changes = {}
+            FileStorage.__encoded = {}
+
+    def __save(self):
+        """Save right away while holding a lock on the files"""
+
+        if not self.journal:
+            self.__waitForCompaction()
+        with FileStorage.__locked(True):
+            with FileStorage.__lock.writer:
+                if FileStorage.__loaded:
+                    self.__refresh()
+                else:
+                    self.__reload()
+            # readers may search the text index while it is packed, since
+            # packing only replaces postings with equivalent ones
+            with FileStorage.__lock.reader:
+                changes, FileStorage.__changes = FileStorage.__changes, {}
+                text = None
+                if not self.journal:
+                    objects = dict(FileStorage.__objects)
+                    index = FileStorage.__text
+                    if index not in FileStorage.__objects.indexes:
+                        # an unbuilt index is out of date once this is saved
+                        FileStorage.__textVersion = None
+                    elif index.changed or FileStorage.__textVersion is None:
+                        text = index.dump()
+                        index.changed = False
+            try:
+                if self.journal:
+                    self.__append(changes)
+                else:
+                    FileStorage.__write(objects, changes, text)
+            except BaseException:
+                with FileStorage.__lock.writer:
+                    changes.update(FileStorage.__changes)
+                    FileStorage.__changes = changes
+                    if text is not None:
+                        FileStorage.__text.changed = True
+                raise
+            FileStorage.__seen = FileStorage.__state()
+
+    @staticmethod
+    def __scan(progress=None):
+        """Yield (key, dict, from journal) for each stored object, in order
+
+        Objects are read from the storage file and then the journals, with
+        None instead of a dict for deletions.
+
+        """
+
+        if os.path.exists(FileStorage.__file_path):
+            with open(FileStorage.__file_path, 'rb') as file:
+                for k, obj in FileStorage.__codec.read(file, progress):
+                    yield k, obj, False
+        for path in (FileStorage.__log_path + '.1', FileStorage.__log_path):
+            for entry in entries(path):
+                if entry['op'] == 'delete':
+                    yield entry['key'], None, True
+                else:
+                    yield entry['key'], entry['obj'], True
+
+    @staticmethod
+    def __state():
+        """Return the signatures of the storage file and its journals"""
+
+        return [
+            signature(FileStorage.__file_path),
+            signature(FileStorage.__log_path + '.1'),
+            signature(FileStorage.__log_path)
+        ]
+
+    @staticmethod
+    def __unchanged(k, obj, data):
+        """Check if a stored object is the same as its dict from a file
+
+        Objects written by the last full save are compared by the encoding
+        cached for them then, instead of by their dicts, so unchanged objects
+        don't need to be converted again.
+
+        """
+
+        if type(obj) is Record:
+            return obj.data == data
+        cached = FileStorage.__encoded.get(k)
+        if cached is not None and cached[0] is obj:
+            return FileStorage.__codec.encode(k, data) == cached[1]
+        return obj.to_dict() == data
+
+    @staticmethod
+    def __waitForCompaction():
+        """Block until a running background compaction has finished"""
+
+        if FileStorage.__compactor is not None:
+            FileStorage.__compactor.join()
+
+    @staticmethod
+    def __write(objects, changes, dumped):
+        """Write a copy of the stored objects and remove the journals
+
+        The file is written to a temporary file first and then moved over
+        the storage file, so it is never left half written. The dumped text
+        index, if any, is written after it.
+
+        """
+
+        codec = FileStorage.__codec
+        encoded = {}
+        for k, obj in objects.items():
+            cached = FileStorage.__encoded.get(k)
+            if cached is None or cached[0] is not obj or k in changes or (
+                FileStorage.__mutable(obj)
+            ):
+                if type(obj) is Record:
+                    cached = (obj, codec.encode(k, obj.data))
+                else:
+                    cached = (obj, codec.encode(k, obj.to_dict()))
+            encoded[k] = cached
+        FileStorage.__encoded = encoded
+        path = FileStorage.__file_path
+        with open(path + '.tmp', 'wb') as file:
+            codec.write(file, (data for obj, data in encoded.values()))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+        for log in (FileStorage.__log_path, FileStorage.__log_path + '.1'):
+            if os.path.exists(log):
+                os.remove(log)
+        FileStorage.__writeText(dumped, path)
+
+    @staticmethod
+    def __writeText(contents, path):
+        """Save a dumped text index next to the storage file it was made for
+
+        The index is saved with a new version, and a small signature file
+        records the version and the storage file it is up to date with. If
+        contents is None, the index saved last is still up to date, so only
+        the signature file is written.
+
+        """
+
+        if contents is not None:
+            version = uuid.uuid4().hex
+            saved = dict(contents, version=version)
+            with open(path + '.text.tmp', 'wt') as file:
+                file.write(json.dumps(saved))
+            os.replace(path + '.text.tmp', path + '.text')
+            FileStorage.__textVersion = version
+        state = {
+            'signature': signature(path),
+            'version': FileStorage.__textVersion
+        }
+        with open(path + '.text.sig.tmp', 'wt') as file:
+            file.write(json.dumps(state))
+        os.replace(path + '.text.sig.tmp', path + '.text.sig')
@@ -0,0 +1,805 @@
+#!/usr/bin/python3
+"""Module for secondary indexes kept over stored objects"""
+
+
+from abc import ABC, abstractmethod
+from array import array
+import base64
+import heapq
+import math
+import re
+import sys
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def number(value):
+    """Return a value as a float if it's a number, or NaN if it isn't"""
+
+    if isinstance(value, (int, float)):
+        return float(value)
+    return math.nan
+
+
+def bounds(ranges):
+    """Return (name, low, high) tuples for a dict of (low, high) by name
+
+    Either bound of a range can be None, which is replaced by an infinity
+    so that every number is on that side of it.
+
+    """
+
+    return [
+        (
+            name,
+            -math.inf if low is None else low,
+            math.inf if high is None else high
+        )
+        for name, (low, high) in ranges.items()
+    ]
+
+
+EARTH_RADIUS = 6371.0088
+
+
+def distance(latitude1, longitude1, latitude2, longitude2):
+    """Return the great-circle distance in km between two points in degrees"""
+
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(
+        phi2
+    ) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def location(obj):
+    """Return an object's (latitude, longitude) in degrees, or None
+
+    The object's __geo__ tuple, normally set by its class, names its latitude
+    and longitude attributes. None is returned if it has none, if either
+    value isn't a number within range, or if both are still the defaults of
+    its class, which is its __model__ attribute if it has one.
+
+    """
+
+    names = getattr(obj, '__geo__', ())
+    if len(names) != 2:
+        return None
+    latitude = number(getattr(obj, names[0], None))
+    longitude = number(getattr(obj, names[1], None))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    cls = getattr(obj, '__model__', type(obj))
+    # compact classes keep their defaults apart, with slots in their place
+    defaults = getattr(cls, '__defaults__', None)
+    if not isinstance(defaults, dict):
+        defaults = {}
+    if (latitude, longitude) == tuple(
+        number(defaults.get(name, getattr(cls, name, None)))
+        for name in names
+    ):
+        return None
+    return latitude, longitude
+
+
+def pack(values):
+    """Return a base64 string of unsigned integers in little-endian order"""
+
+    values = array('I', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def unpack(text):
+    """Return an array of the unsigned integers in a string from pack"""
+
+    values = array('I', base64.b64decode(text))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def words(text):
+    """Return the list of lowercase words in a string, in order"""
+
+    return re.findall(r'\w+', text.casefold())
+
+
+class Index (ABC):
+    """Base class for indexes notified whenever stored objects change"""
+
+    @abstractmethod
+    def add(self, key, obj):
+        """Index an object stored under the given key"""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """Forget every indexed object"""
+        pass
+
+    @abstractmethod
+    def remove(self, key, obj):
+        """Stop indexing an object that was stored under the given key"""
+        pass
+
+    def replace(self, key, old, obj):
+        """Index an object that replaced another one under the same key"""
+
+        self.remove(key, old)
+        self.add(key, obj)
+
+
+class AttributeIndex (Index):
+    """Index of stored keys by the values of their objects' attributes
+
+    Only the attributes named in the __indexes__ tuple of the first object
+    seen with a given class name, which is normally set by its class, are
+    indexed, and only while their values are hashable.
+
+    """
+
+    def __init__(self):
+        """Create an empty index"""
+
+        self.__keys = {}
+        self.__names = {}
+        self.__values = {}
+
+    def add(self, key, obj):
+        """Index the values of an object's declared attributes"""
+
+        cls = key.partition('.')[0]
+        names = self.__indexed(cls, obj)
+        if len(names) == 0:
+            return
+        values = {}
+        for name in names:
+            value = getattr(obj, name, None)
+            try:
+                keys = self.__keys.setdefault((cls, name), {})
+                keys.setdefault(value, {})[key] = None
+            except TypeError:
+                continue
+            values[name] = value
+        self.__values[key] = values
+
+    def clear(self):
+        """Forget every indexed value"""
+
+        self.__keys = {}
+        self.__names = {}
+        self.__values = {}
+
+    def find(self, cls, name, value):
+        """Return a list of keys of a class with an attribute set to value
+
+        None is returned instead if that attribute isn't indexed for the class
+        or if value isn't hashable, since the index can't answer then.
+
+        """
+
+        keys = self.__keys.get((cls, name))
+        if keys is None:
+            return None
+        try:
+            return list(keys.get(value, ()))
+        except TypeError:
+            return None
+
+    def remove(self, key, obj):
+        """Stop indexing the values of an object's attributes"""
+
+        cls = key.partition('.')[0]
+        for name, value in self.__values.pop(key, {}).items():
+            self.__discard(cls, name, value, key)
+
+    def replace(self, key, old, obj):
+        """Reindex only the attributes whose values changed"""
+
+        values = self.__values.get(key)
+        if values is None or old is not obj:
+            self.remove(key, old)
+            self.add(key, obj)
+            return
+        cls = key.partition('.')[0]
+        for name in self.__indexed(cls, obj):
+            value = getattr(obj, name, None)
+            if name in values:
+                if values[name] is value or values[name] == value:
+                    continue
+                self.__discard(cls, name, values.pop(name), key)
+            try:
+                keys = self.__keys.setdefault((cls, name), {})
+                keys.setdefault(value, {})[key] = None
+            except TypeError:
+                continue
+            values[name] = value
+
+    def __discard(self, cls, name, value, key):
+        """Remove one key from the keys indexed under an attribute value"""
+
+        keys = self.__keys[(cls, name)]
+        keys[value].pop(key, None)
+        if len(keys[value]) == 0:
+            del keys[value]
+
+    def __indexed(self, cls, obj):
+        """Return the names of the attributes indexed for a class name"""
+
+        if cls not in self.__names:
+            self.__names[cls] = tuple(getattr(obj, '__indexes__', ()))
+        return self.__names[cls]
+
+
+class ClassIndex (Index):
+    """Index of stored keys by the class name they start with"""
+
+    def __init__(self):
+        """Create an empty index"""
+
+        self.__keys = {}
+
+    def add(self, key, obj):
+        """Index a key under its class name"""
+
+        cls = key.partition('.')[0]
+        if cls not in self.__keys:
+            self.__keys[cls] = {}
+        self.__keys[cls][key] = None
+
+    def clear(self):
+        """Forget every indexed key"""
+
+        self.__keys = {}
+
+    def count(self, cls):
+        """Return the number of keys indexed under a class name"""
+
+        return len(self.__keys.get(cls, ()))
+
+    def keys(self, cls):
+        """Return a list of the keys indexed under a class name"""
+
+        return list(self.__keys.get(cls, ()))
+
+    def remove(self, key, obj):
+        """Stop indexing a key"""
+
+        cls = key.partition('.')[0]
+        keys = self.__keys.get(cls, {})
+        keys.pop(key, None)
+        if len(keys) == 0:
+            self.__keys.pop(cls, None)
+
+    def replace(self, key, old, obj):
+        """Do nothing, since the key's class name can't have changed"""
+        pass
+
+
+class ColumnIndex (Index):
+    """Index of numeric attribute values kept in one array per attribute
+
+    Only the attributes named in the __columns__ tuple of the first object
+    seen with a given class name are kept. Each one is stored as a float,
+    or as NaN if it isn't a number, so ranges of values can be searched
+    without looking at the objects. NumPy is used if it's installed.
+
+    """
+
+    def __init__(self):
+        """Create an empty index"""
+
+        self.clear()
+
+    def add(self, key, obj):
+        """Add a row with the values of an object's declared attributes"""
+
+        cls = key.partition('.')[0]
+        names = self.__columns(cls, obj)
+        if len(names) == 0:
+            return
+        table = self.__tables.get(cls)
+        if table is None:
+            table = self.__tables[cls] = (
+                [], {}, {name: array('d') for name in names}
+            )
+        keys, rows, columns = table
+        rows[key] = len(keys)
+        keys.append(key)
+        for name in names:
+            columns[name].append(number(getattr(obj, name, None)))
+
+    def clear(self):
+        """Forget every indexed value"""
+
+        self.__names = {}
+        self.__tables = {}
+
+    def columns(self, cls):
+        """Return the names of the attributes kept for a class name"""
+
+        return self.__names.get(cls, ())
+
+    def remove(self, key, obj):
+        """Remove an object's row, moving the last row into its place"""
+
+        table = self.__tables.get(key.partition('.')[0])
+        if table is None or key not in table[1]:
+            return
+        keys, rows, columns = table
+        row = rows.pop(key)
+        last = keys.pop()
+        if last != key:
+            keys[row] = last
+            rows[last] = row
+        for column in columns.values():
+            value = column.pop()
+            if last != key:
+                column[row] = value
+
+    def replace(self, key, old, obj):
+        """Update the values in an object's row"""
+
+        cls = key.partition('.')[0]
+        table = self.__tables.get(cls)
+        if table is None or key not in table[1]:
+            self.add(key, obj)
+            return
+        row = table[1][key]
+        for name, column in table[2].items():
+            column[row] = number(getattr(obj, name, None))
+
+    def select(self, cls, **ranges):
+        """Return a list of keys whose values are within inclusive ranges
+
+        Each keyword argument names a column and gives a (low, high) tuple,
+        where either bound can be None. None is returned instead if one of
+        the attributes isn't kept for the class.
+
+        """
+
+        if any(name not in self.columns(cls) for name in ranges):
+            return None
+        table = self.__tables.get(cls)
+        if table is None:
+            return []
+        keys, rows, columns = table
+        limits = [
+            (columns[name], low, high) for name, low, high in bounds(ranges)
+        ]
+        if len(limits) == 0:
+            return list(keys)
+        if numpy is not None:
+            found = numpy.ones(len(keys), dtype=bool)
+            for column, low, high in limits:
+                values = numpy.frombuffer(column, dtype=numpy.float64)
+                found &= (values >= low) & (values <= high)
+                del values
+            return [keys[row] for row in numpy.flatnonzero(found).tolist()]
+        column, low, high = limits[0]
+        found = [
+            row for row, value in enumerate(column) if low <= value <= high
+        ]
+        for column, low, high in limits[1:]:
+            found = [row for row in found if low <= column[row] <= high]
+        return [keys[row] for row in found]
+
+    def __columns(self, cls, obj):
+        """Return the names of the attributes kept for a class name"""
+
+        if cls not in self.__names:
+            self.__names[cls] = tuple(getattr(obj, '__columns__', ()))
+        return self.__names[cls]
+
+
+class GridIndex (Index):
+    """Index of stored keys by location, in the cells of a degree grid
+
+    Objects are indexed by the latitude and longitude attributes named in
+    their __geo__ tuple, so searching around a point only measures the
+    distance to objects in the cells that a circle around it overlaps.
+    Distances and radii are in kilometers.
+
+    """
+
+    def __init__(self, size=0.1):
+        """Create an empty index with cells of size degrees on each side
+
+        The size must divide 360 degrees into a whole number of cells, so
+        that the columns of cells wrap around at the antimeridian.
+
+        """
+
+        width = round(360 / size)
+        if width < 1 or not math.isclose(width * size, 360):
+            raise ValueError('cell size {!r} does not divide 360'.format(size))
+        self.size = size
+        self.__width = width
+        self.clear()
+
+    def add(self, key, obj):
+        """Index an object's location if it has one"""
+
+        point = location(obj)
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        grid = self.__grids.setdefault(key.partition('.')[0], {})
+        grid.setdefault(cell, {})[key] = point
+        self.__cells[key] = cell
+
+    def clear(self):
+        """Forget every indexed location"""
+
+        self.__cells = {}
+        self.__grids = {}
+
+    def near(self, cls, latitude, longitude, radius):
+        """Return (distance, key) tuples for keys within radius, nearest first
+
+        Only objects of the given class name are returned.
+
+        """
+
+        grid = self.__grids.get(cls, {})
+        found = []
+        for cell in self.__cover(grid, latitude, longitude, radius):
+            for key, (lat, lon) in grid[cell].items():
+                d = distance(latitude, longitude, lat, lon)
+                if d <= radius:
+                    found.append((d, key))
+        found.sort()
+        return found
+
+    def nearest(self, cls, latitude, longitude, count):
+        """Return (distance, key) tuples for the count nearest keys
+
+        The search starts with a radius that holds count objects from the
+        point's own cell, if it has that many, and doubles it until it holds
+        enough objects or covers the whole planet.
+
+        """
+
+        grid = self.__grids.get(cls, {})
+        if count <= 0 or len(grid) == 0:
+            return []
+        points = grid.get(self.__cell(latitude, longitude), {}).values()
+        if len(points) >= count:
+            radius = heapq.nsmallest(count, (
+                distance(latitude, longitude, lat, lon) for lat, lon in points
+            ))[-1]
+        else:
+            radius = self.size * math.pi / 180 * EARTH_RADIUS
+        while True:
+            found = self.near(cls, latitude, longitude, radius)
+            if len(found) >= count or radius >= math.pi * EARTH_RADIUS:
+                return found[:count]
+            radius *= 2
+
+    def remove(self, key, obj):
+        """Stop indexing the location of an object"""
+
+        cell = self.__cells.pop(key, None)
+        if cell is None:
+            return
+        grid = self.__grids[key.partition('.')[0]]
+        del grid[cell][key]
+        if len(grid[cell]) == 0:
+            del grid[cell]
+
+    def __cell(self, latitude, longitude):
+        """Return the (row, column) of the cell holding a location"""
+
+        return (
+            math.floor((latitude + 90) / self.size),
+            math.floor((longitude + 180) / self.size) % self.__width
+        )
+
+    def __cover(self, grid, latitude, longitude, radius):
+        """Return the cells of a grid that a circle around a point overlaps"""
+
+        angle = radius / EARTH_RADIUS
+        if angle >= math.pi:
+            return list(grid)
+        span = math.degrees(angle) + 1e-9
+        low = max(latitude - span, -90.0)
+        high = min(latitude + span, 90.0)
+        rows = range(
+            math.floor((low + 90) / self.size),
+            math.floor((high + 90) / self.size) + 1
+        )
+        columns = range(self.__width)
+        if -90 < latitude - span and latitude + span < 90:
+            spread = math.sin(angle) / math.cos(math.radians(latitude))
+            if spread < 1:
+                span = math.degrees(math.asin(spread)) + 1e-9
+                first = math.floor((longitude - span + 180) / self.size)
+                last = math.floor((longitude + span + 180) / self.size)
+                if last - first + 1 < self.__width:
+                    columns = [
+                        column % self.__width
+                        for column in range(first, last + 1)
+                    ]
+        if len(rows) * len(columns) > len(grid):
+            columns = set(columns)
+            return [
+                cell for cell in grid
+                if cell[0] in rows and cell[1] in columns
+            ]
+        return [
+            (row, column) for row in rows for column in columns
+            if (row, column) in grid
+        ]
+
+
+class IndexedDict (dict):
+    """Dictionary that keeps a list of indexes up to date with its contents
+
+    Every way of adding, replacing, or removing items goes through the
+    indexes, so code that changes the dictionary directly can't leave them
+    out of date.
+
+    """
+
+    def __init__(self, indexes=(), *args, **kwargs):
+        """Create the dictionary, indexing any initial contents"""
+
+        super().__init__()
+        self.indexes = list(indexes)
+        self.update(*args, **kwargs)
+
+    def __delitem__(self, key):
+        """Remove an item and unindex it"""
+
+        obj = self[key]
+        super().__delitem__(key)
+        for index in self.indexes:
+            index.remove(key, obj)
+
+    def __ior__(self, other):
+        """Add items from another mapping in place"""
+
+        self.update(other)
+        return self
+
+    def __setitem__(self, key, obj):
+        """Add or replace an item and index it"""
+
+        if key in self:
+            old = self[key]
+            super().__setitem__(key, obj)
+            for index in self.indexes:
+                index.replace(key, old, obj)
+            return
+        super().__setitem__(key, obj)
+        for index in self.indexes:
+            index.add(key, obj)
+
+    def clear(self):
+        """Remove every item and clear the indexes"""
+
+        super().clear()
+        for index in self.indexes:
+            index.clear()
+
+    def pop(self, key, *default):
+        """Remove an item and return it, or default if it doesn't exist"""
+
+        if key not in self:
+            return super().pop(key, *default)
+        obj = self[key]
+        del self[key]
+        return obj
+
+    def popitem(self):
+        """Remove the last item added and return it"""
+
+        key, obj = super().popitem()
+        for index in self.indexes:
+            index.remove(key, obj)
+        return key, obj
+
+    def setdefault(self, key, default=None):
+        """Return an item, adding it with a default value if it's missing"""
+
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        """Add or replace items from a mapping or iterable of pairs"""
+
+        for other in args + (kwargs,):
+            pairs = other
+            if hasattr(other, 'keys'):
+                pairs = ((key, other[key]) for key in other.keys())
+            for key, obj in pairs:
+                self[key] = obj
+
+
+class TextIndex (Index):
+    """Inverted index of the words in stored objects' text attributes
+
+    Only the string attributes named in the __text__ tuple of the first
+    object seen with a given class name are indexed. Searches rank the keys
+    whose objects contain any of the words searched for with Okapi BM25, so
+    keys with rarer words, more of them, and shorter text come first.
+
+    Each word's postings are a dictionary of keys and word counts, which is
+    packed into a pair of base64 strings of key numbers and counts when the
+    index is dumped, and unpacked again the first time the word is used
+    after that. Loading a dumped index only has to read these strings. The
+    changed attribute is set whenever words are indexed or forgotten, and
+    cleared by load, so owners can tell when to dump it again.
+
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        """Create an empty index"""
+
+        self.clear()
+
+    def add(self, key, obj):
+        """Index the words in an object's declared attributes"""
+
+        cls = key.partition('.')[0]
+        if cls not in self.__names:
+            self.__names[cls] = tuple(getattr(obj, '__text__', ()))
+        if len(self.__names[cls]) == 0:
+            return
+        self.changed = True
+        counts = {}
+        for name in self.__names[cls]:
+            value = getattr(obj, name, None)
+            if isinstance(value, str):
+                for word in words(value):
+                    counts[word] = counts.get(word, 0) + 1
+        table = self.__tables.get(cls)
+        if table is None:
+            table = self.__tables[cls] = self.__table({
+                'keys': [], 'documents': {}, 'lengths': {}, 'postings': {},
+                'total': 0
+            })
+        if key not in table['numbers']:
+            table['numbers'][key] = len(table['keys'])
+            table['keys'].append(key)
+        postings = table['postings']
+        for word, count in counts.items():
+            if word in postings:
+                self.__postings(table, word)[key] = count
+            else:
+                postings[word] = {key: count}
+        length = sum(counts.values())
+        table['documents'][key] = ' '.join(counts)
+        table['lengths'][key] = length
+        table['total'] += length
+
+    def clear(self):
+        """Forget every indexed word"""
+
+        self.__names = {}
+        self.__tables = {}
+        self.changed = True
+
+    def dump(self):
+        """Return the contents of the index as a JSON serializable dictionary
+
+        Postings are packed first. The dictionary refers to the structures
+        the index uses, so it must not be changed, and should be turned into
+        JSON before the index is changed again.
+
+        """
+
+        tables = {}
+        for cls, table in self.__tables.items():
+            if len(table['keys']) > 2 * len(table['documents']) + 1000:
+                for word in table['postings']:
+                    self.__postings(table, word)
+                table['keys'] = list(table['documents'])
+                self.__table(table)
+            numbers = table['numbers']
+            postings = table['postings']
+            for word, found in postings.items():
+                if type(found) is dict:
+                    postings[word] = [
+                        pack(numbers[key] for key in found),
+                        pack(found.values())
+                    ]
+            lengths = table['lengths']
+            tables[cls] = {
+                'keys': table['keys'],
+                'documents': table['documents'],
+                'lengths': pack(lengths[key] for key in table['documents']),
+                'postings': postings,
+                'total': table['total']
+            }
+        return {'fields': self.__names, 'tables': tables}
+
+    def load(self, contents):
+        """Replace the contents of the index with what dump returned"""
+
+        self.__names = {
+            cls: tuple(names) for cls, names in contents['fields'].items()
+        }
+        self.__tables = {}
+        for cls, table in contents['tables'].items():
+            table = dict(table)
+            table['lengths'] = dict(
+                zip(table['documents'], unpack(table['lengths']))
+            )
+            self.__tables[cls] = self.__table(table)
+        self.changed = False
+
+    def remove(self, key, obj):
+        """Stop indexing the words of an object"""
+
+        table = self.__tables.get(key.partition('.')[0])
+        if table is None or key not in table['documents']:
+            return
+        self.changed = True
+        postings = table['postings']
+        for word in table['documents'].pop(key).split():
+            found = self.__postings(table, word)
+            del found[key]
+            if len(found) == 0:
+                del postings[word]
+        table['total'] -= table['lengths'].pop(key)
+
+    def search(self, cls, text, limit=None):
+        """Return (score, key) tuples for keys matching any word, best first
+
+        Only keys with the given class name are returned, and at most limit
+        of them if it isn't None. Ties are broken by key.
+
+        """
+
+        table = self.__tables.get(cls)
+        if table is None or len(table['documents']) == 0:
+            return []
+        count = len(table['documents'])
+        average = table['total'] / count or 1.0
+        lengths = table['lengths']
+        scores = {}
+        for word in set(words(text)):
+            if word not in table['postings']:
+                continue
+            found = self.__postings(table, word)
+            idf = math.log(1 + (count - len(found) + 0.5) / (len(found) + 0.5))
+            for key, frequency in found.items():
+                norm = 1 - self.B + self.B * lengths[key] / average
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (
+                    self.K1 + 1
+                ) / (frequency + self.K1 * norm)
+        ranked = ((score, key) for key, score in scores.items())
+        if limit is None:
+            return sorted(ranked, key=lambda item: (-item[0], item[1]))
+        return heapq.nsmallest(
+            limit, ranked, key=lambda item: (-item[0], item[1])
+        )
+
+    @staticmethod
+    def __postings(table, word):
+        """Return the dictionary of keys and counts of a word, unpacking it"""
+
+        found = table['postings'][word]
+        if type(found) is not dict:
+            keys = table['keys']
+            found = table['postings'][word] = dict(zip(
+                map(keys.__getitem__, unpack(found[0])), unpack(found[1])
+            ))
+        return found
+
+    @staticmethod
+    def __table(table):
+        """Number the keys of a class' table and return the table"""
+
+        table['numbers'] = {key: n for n, key in enumerate(table['keys'])}
+        return table
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""Module for a lock shared by readers and held alone by writers"""
+
+
+import threading
+
+
+class ReadWriteLock:
+    """Lock held by any number of reading threads or by one writing thread
+
+    Use the reader or writer attribute in a with statement. Threads waiting
+    to write keep new readers out, so a steady stream of readers can't
+    starve them. A thread that holds the lock may take it again the same
+    way, and a writer may also read, but a reader can't become a writer.
+
+    """
+
+    def __init__(self):
+        """Create an unlocked lock"""
+
+        self.__condition = threading.Condition(threading.Lock())
+        self.__local = threading.local()
+        self.__readers = 0
+        self.__waiting = 0
+        self.__writing = False
+        self.reader = _Holder(self.__read, self.__releaseRead)
+        self.writer = _Holder(self.__write, self.__releaseWrite)
+
+    @property
+    def held(self):
+        """Return 'read' or 'write' if this thread holds the lock, or None"""
+
+        if getattr(self.__local, 'depth', 0) == 0:
+            return None
+        return 'write' if self.__local.writer else 'read'
+
+    def __read(self):
+        """Wait until no thread is writing or waiting to, then read"""
+
+        local = self.__local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            with self.__condition:
+                while self.__writing or self.__waiting:
+                    self.__condition.wait()
+                self.__readers += 1
+            local.writer = False
+        local.depth = depth + 1
+
+    def __releaseRead(self):
+        """Stop reading, letting writers in once no thread reads"""
+
+        local = self.__local
+        local.depth -= 1
+        if local.depth == 0:
+            with self.__condition:
+                self.__readers -= 1
+                if self.__readers == 0:
+                    self.__condition.notify_all()
+
+    def __releaseWrite(self):
+        """Stop writing, letting other threads in"""
+
+        local = self.__local
+        local.depth -= 1
+        if local.depth == 0:
+            with self.__condition:
+                self.__writing = False
+                self.__condition.notify_all()
+
+    def __write(self):
+        """Wait until no other thread reads or writes, then write"""
+
+        local = self.__local
+        depth = getattr(local, 'depth', 0)
+        if depth > 0 and not local.writer:
+            raise RuntimeError('cannot write while holding the lock to read')
+        if depth == 0:
+            with self.__condition:
+                self.__waiting += 1
+                try:
+                    while self.__writing or self.__readers:
+                        self.__condition.wait()
+                finally:
+                    self.__waiting -= 1
+                self.__writing = True
+            local.writer = True
+        local.depth = depth + 1
+
+
+class _Holder:
+    """Context manager taking a ReadWriteLock one way"""
+
+    __slots__ = ('__enter', '__exit')
+
+    def __init__(self, enter, exit):
+        """Keep the functions that take and release the lock"""
+
+        self.__enter = enter
+        self.__exit = exit
+
+    def __enter__(self):
+        """Take the lock"""
+
+        self.__enter()
+
+    def __exit__(self, *args):
+        """Release the lock"""
+
+        self.__exit()
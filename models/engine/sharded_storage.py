@@ -0,0 +1,292 @@
+#!/usr/bin/python3
+"""Module for ShardedStorage class"""
+
+
+from models.engine.codec import CODECS, forPath
+from models.engine.file_storage import key
+from models.engine.storage import Storage
+import models
+import json
+import os
+import os.path
+import zlib
+
+
+def load(path):
+    """Return a list of the keys and dictionaries of a shard file's objects"""
+
+    with open(path, 'rb') as file:
+        return list(forPath(path).read(file))
+
+
+def shard(id, shards):
+    """Return the number of the shard holding an ID, out of shards"""
+
+    return zlib.crc32(str(id).encode('utf-8')) % shards
+
+
+def write(path, records):
+    """Replace a shard file with a dict of object dictionaries by key
+
+    The file is written to a temporary file first and then moved over the
+    shard file, so it is never left half written.
+
+    """
+
+    with open(path + '.tmp', 'wb') as file:
+        forPath(path).dump(file, records)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+
+
+class ShardedStorage (Storage):
+    """class used to store data model instances in many small files
+
+    Each class' objects are split between a number of shard files by a hash
+    of their IDs. A shard is only read the first time one of its objects is
+    needed, and save only rewrites the shards that changed.
+
+    """
+
+    MANIFEST = 'shards.json'
+
+    def __init__(self, path='storage', shards=16, extension='.json',
+                 executor=None):
+        """Set up storage in a directory of shard files
+
+        Args:
+            path (str): path of the directory, which is created when
+                changes are first saved if it doesn't exist yet
+            shards (int): number of shards each class' objects are split
+                between, unless the directory already says otherwise
+            extension (str): extension of the shard files, naming their
+                format
+            executor (concurrent.futures.Executor): if given, reads and
+                writes several shard files at once
+
+        """
+
+        if extension not in CODECS:
+            raise ValueError('no codec for extension {!r}'.format(extension))
+        self.path = path
+        self.shards = shards
+        self.extension = extension
+        self.executor = executor
+        self.reload()
+
+    def __contains__(self, obj):
+        """Check if an object is in storage"""
+
+        if isinstance(obj, str):
+            cls, _, id = obj.partition('.')
+        else:
+            cls, id = type(obj).__name__, obj.id
+        return key(cls, id) in self.__shard(self.__locate(cls, id))
+
+    def all(self, cls=None):
+        """Return a new dict of every stored object, or one class' objects"""
+
+        if isinstance(cls, type):
+            cls = cls.__name__
+        objects = {}
+        for found in self.__shardsOf(cls):
+            objects.update(found)
+        return objects
+
+    def changed(self, obj):
+        """Mark the shard of a stored object as changed"""
+
+        id = getattr(obj, 'id', None)
+        where = self.__locate(type(obj), id)
+        found = self.__loaded.get(where)
+        if found is not None and found.get(key(type(obj), id)) is obj:
+            self.__dirty.add(where)
+
+    def count(self, cls=None):
+        """Return the number of stored objects, optionally of only one class"""
+
+        if isinstance(cls, type):
+            cls = cls.__name__
+        return sum(len(found) for found in self.__shardsOf(cls))
+
+    def delete(self, cls, id):
+        """Delete an object from storage"""
+
+        if isinstance(cls, type):
+            cls = cls.__name__
+        where = self.__locate(cls, id)
+        del self.__shard(where)[key(cls, id)]
+        self.__dirty.add(where)
+
+    def find(self, cls, **equals):
+        """Return a list of objects of a class with the given attribute values
+
+        Every object of the class is checked, so all of its shards are read.
+
+        """
+
+        missing = object()
+        return [
+            obj for obj in self.all(cls).values()
+            if all(
+                getattr(obj, name, missing) == value
+                for name, value in equals.items()
+            )
+        ]
+
+    def get(self, cls, id):
+        """Retrieve an object from storage"""
+
+        if isinstance(cls, type):
+            cls = cls.__name__
+        return self.__shard(self.__locate(cls, id))[key(cls, id)]
+
+    def new(self, obj):
+        """Add an object to storage, or mark it as updated if it's stored"""
+
+        where = self.__locate(type(obj), obj.id)
+        self.__shard(where)[key(type(obj), obj.id)] = obj
+        self.__dirty.add(where)
+
+    def reload(self):
+        """Discard unsaved changes and forget the shards read so far
+
+        Shards are read when their objects are retrieved, so there is
+        nothing to load ahead of time.
+
+        """
+
+        self.__loaded = {}
+        self.__dirty = set()
+        self.__files = None
+
+    def save(self):
+        """Rewrite the shard files of every shard changed since the last save
+
+        Shards left empty have their files removed. Nothing is done while a
+        batch is in progress.
+
+        """
+
+        if self.batching:
+            return
+        if len(self.__dirty) == 0:
+            return
+        for cls, n in self.__dirty:
+            if not cls.isidentifier():
+                raise ValueError('invalid class name: ' + repr(cls))
+        files = self.__stored()
+        manifest = os.path.join(self.path, self.MANIFEST)
+        if not os.path.exists(manifest):
+            os.makedirs(self.path, exist_ok=True)
+            with open(manifest, 'wt') as file:
+                json.dump({'shards': self.shards}, file)
+        dirty = sorted(self.__dirty)
+        for cls, n in dirty:
+            if len(self.__loaded[cls, n]) == 0:
+                path = self.__path(cls, n)
+                if os.path.exists(path):
+                    os.remove(path)
+                files.get(cls, set()).discard(n)
+                self.__dirty.discard((cls, n))
+        dirty = [where for where in dirty if where in self.__dirty]
+        paths = [self.__path(*where) for where in dirty]
+        records = [
+            {k: obj.to_dict() for k, obj in self.__loaded[where].items()}
+            for where in dirty
+        ]
+        mapper = map if self.executor is None else self.executor.map
+        # shards written before a failure stay clean
+        for where, _ in zip(dirty, mapper(write, paths, records)):
+            files.setdefault(where[0], set()).add(where[1])
+            self.__dirty.discard(where)
+
+    def tryGet(self, cls, id, default):
+        """Try to retrieve an object, instead returning default if not found"""
+
+        try:
+            return self.get(cls, id)
+        except KeyError:
+            return default
+
+    def __locate(self, cls, id):
+        """Return the (class name, shard number) of an object's shard"""
+
+        if isinstance(cls, type):
+            cls = cls.__name__
+        self.__stored()
+        return cls, shard(id, self.shards)
+
+    def __path(self, cls, n):
+        """Return the path of a shard file"""
+
+        return os.path.join(
+            self.path, '{}.{}{}'.format(cls, n, self.extension)
+        )
+
+    def __read(self, wanted):
+        """Read the shards in a list of (class name, number) not read yet"""
+
+        files = self.__stored()
+        wanted = [
+            where for where in wanted
+            if where not in self.__loaded and where[1] in files.get(
+                where[0], ()
+            )
+        ]
+        mapper = map if self.executor is None or len(wanted) < 2 else (
+            self.executor.map
+        )
+        paths = [self.__path(*where) for where in wanted]
+        for (cls, n), found in zip(wanted, mapper(load, paths)):
+            model = models.classes[cls]
+            self.__loaded[cls, n] = {k: model(**obj) for k, obj in found}
+
+    def __shard(self, where):
+        """Return the dict of objects in a shard, reading it if necessary"""
+
+        if where not in self.__loaded:
+            self.__read([where])
+            self.__loaded.setdefault(where, {})
+        return self.__loaded[where]
+
+    def __shardsOf(self, cls=None):
+        """Return the dicts of every shard of a class, or of every class"""
+
+        files = self.__stored()
+        if cls is None:
+            names = set(files)
+            names.update(name for name, n in self.__loaded)
+        else:
+            names = [cls]
+        wanted = [(name, n) for name in names for n in range(self.shards)]
+        self.__read(wanted)
+        return [self.__loaded[where] for where in wanted
+                if where in self.__loaded]
+
+    def __stored(self):
+        """Return the shard numbers with files by class, listing them once
+
+        The number of shards saved in the directory's manifest, if there is
+        one, replaces the number given when storage was set up.
+
+        """
+
+        if self.__files is None:
+            files = {}
+            try:
+                names = os.listdir(self.path)
+            except FileNotFoundError:
+                names = []
+            if self.MANIFEST in names:
+                manifest = os.path.join(self.path, self.MANIFEST)
+                with open(manifest, 'rt') as file:
+                    self.shards = json.load(file)['shards']
+            for name in names:
+                cls, _, rest = name.partition('.')
+                n, _, extension = rest.partition('.')
+                if '.' + extension == self.extension and n.isdigit():
+                    files.setdefault(cls, set()).add(int(n))
+            self.__files = files
+        return self.__files
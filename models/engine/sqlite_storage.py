@@ -0,0 +1,425 @@
+#!/usr/bin/python3
+"""Module for SQLiteStorage class"""
+
+
+from models.engine.cache import LRUCache
+from models.engine.file_storage import key
+from models.engine.storage import Storage
+import models
+import json
+import sqlite3
+import threading
+import weakref
+
+
+COLUMN_TYPES = (str, int, float)
+
+
+class SQLiteStorage (Storage):
+    """class used to store and retrieve data model instances using SQLite
+
+    Each data model class gets a table named after it, with the object's ID as
+    the primary key, its dictionary as JSON text, and one indexed column for
+    each attribute named in the class' __indexes__. Only the objects in use
+    are kept in memory, along with the most recently used ones if there is
+    a cache. Threads share one connection, taking turns with a lock.
+
+    """
+
+    def __init__(self, path='storage.db', cacheEntries=None,
+                 cacheMemory=None):
+        """Set up storage in an SQLite database file
+
+        Args:
+            path (str): path of the database file, which is created when
+                changes are first saved if it doesn't exist yet
+            cacheEntries (int): if given, keep up to this many recently used
+                objects in memory even when nothing else refers to them
+            cacheMemory (int): if given, keep recently used objects in
+                memory up to about this many bytes
+
+        """
+
+        self.path = path
+        self.cache = None
+        if cacheEntries is not None or cacheMemory is not None:
+            self.cache = LRUCache(cacheEntries, cacheMemory, self.__evict)
+        self.__lock = threading.RLock()
+        self.__connection = None
+        self.__tables = {}
+        self.__objects = weakref.WeakValueDictionary()
+        self.__changes = {}
+
+    def __contains__(self, obj):
+        """Check if an object is in storage"""
+
+        with self.__lock:
+            if isinstance(obj, str):
+                cls, _, id = obj.partition('.')
+            else:
+                cls, id = type(obj).__name__, obj.id
+            k = key(cls, id)
+            if k in self.__changes:
+                self.__hit(True)
+                return self.__changes[k][0] != 'delete'
+            if k in self.__objects:
+                self.__hit(True)
+                return True
+            self.__hit(False)
+            return self.__row(cls, id) is not None
+
+    def all(self, cls=None):
+        """Return a new dict of every stored object, or one class' objects"""
+
+        with self.__lock:
+            if isinstance(cls, type):
+                cls = cls.__name__
+            names = list(self.__connect()) if cls is None else [cls]
+            # building objects can evict changed ones, writing them as rows
+            changes = dict(self.__changes)
+            objects = {}
+            for name in names:
+                if name not in self.__tables:
+                    continue
+                rows = self.__connection.execute(
+                    'SELECT id, data FROM "{}"'.format(name)
+                ).fetchall()
+                for id, data in rows:
+                    k = key(name, id)
+                    if k not in changes:
+                        objects[k] = self.__build(name, id, data)
+            for k, (op, obj) in changes.items():
+                if op != 'delete' and (
+                    cls is None or type(obj).__name__ == cls
+                ):
+                    objects[k] = obj
+            return objects
+
+    def changed(self, obj):
+        """Mark a stored object as updated"""
+
+        with self.__lock:
+            k = key(type(obj), getattr(obj, 'id', None))
+            if self.__objects.get(k) is not obj:
+                return
+            if k not in self.__changes:
+                self.__changes[k] = ('update', obj)
+            if self.cache is not None:
+                self.cache.put(k, obj)
+
+    def close(self):
+        """Close the database connection, discarding any unsaved changes
+
+        The cache, if any, is emptied, but its counters are kept.
+
+        """
+
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+            self.__connection = None
+            self.__tables = {}
+            self.reload()
+
+    def count(self, cls=None):
+        """Return the number of stored objects, optionally of only one class"""
+
+        with self.__lock:
+            if isinstance(cls, type):
+                cls = cls.__name__
+            names = list(self.__connect()) if cls is None else [cls]
+            total = sum(
+                self.__connection.execute(
+                    'SELECT COUNT(*) FROM "{}"'.format(name)
+                ).fetchone()[0]
+                for name in names if name in self.__tables
+            )
+            for k, (op, obj) in self.__changes.items():
+                if cls is None or k.partition('.')[0] == cls:
+                    total += {'new': 1, 'delete': -1}.get(op, 0)
+            return total
+
+    def delete(self, cls, id):
+        """Delete an object from storage"""
+
+        with self.__lock:
+            if isinstance(cls, type):
+                cls = cls.__name__
+            k = key(cls, id)
+            op = self.__changes.get(k, ('',))[0]
+            if op == 'delete' or op == '' and self.__row(cls, id) is None:
+                raise KeyError(k)
+            self.__objects.pop(k, None)
+            if self.cache is not None:
+                self.cache.pop(k)
+            if op == 'new':
+                del self.__changes[k]
+            else:
+                self.__changes[k] = ('delete', None)
+
+    def find(self, cls, **equals):
+        """Return a list of objects of a class with the given attribute values
+
+        Attributes with an indexed column are looked up in the database, and
+        only the objects found that way are checked for the rest. Objects
+        changed since the last save are always checked.
+
+        """
+
+        with self.__lock:
+            if isinstance(cls, type):
+                cls = cls.__name__
+            changes = dict(self.__changes)
+            found = [
+                obj for k, (op, obj) in changes.items()
+                if op != 'delete' and k.partition('.')[0] == cls
+            ]
+            if cls in self.__connect():
+                where = [
+                    (name, value) for name, value in equals.items()
+                    if name in self.__tables[cls] and
+                    type(value) in COLUMN_TYPES
+                ]
+                sql = 'SELECT id, data FROM "{}"'.format(cls)
+                if len(where) > 0:
+                    sql += ' WHERE ' + ' AND '.join(
+                        '"{}" = ?'.format(name) for name, value in where
+                    )
+                rows = self.__connection.execute(
+                    sql, [value for name, value in where]
+                ).fetchall()
+                found.extend(
+                    self.__build(cls, id, data) for id, data in rows
+                    if key(cls, id) not in changes
+                )
+            missing = object()
+            return [
+                obj for obj in found
+                if all(
+                    getattr(obj, name, missing) == value
+                    for name, value in equals.items()
+                )
+            ]
+
+    def get(self, cls, id):
+        """Retrieve an object from storage"""
+
+        with self.__lock:
+            if isinstance(cls, type):
+                cls = cls.__name__
+            k = key(cls, id)
+            if k in self.__changes:
+                self.__hit(True)
+                obj = self.__changes[k][1]
+                if obj is None:
+                    raise KeyError(k)
+                if self.cache is not None:
+                    self.cache.get(k)
+                return obj
+            obj = self.__objects.get(k)
+            if obj is not None:
+                self.__hit(True)
+                if self.cache is not None:
+                    self.cache.put(k, obj)
+                return obj
+            self.__hit(False)
+            row = self.__row(cls, id)
+            if row is None:
+                raise KeyError(k)
+            return self.__build(cls, str(id), row[0])
+
+    def new(self, obj):
+        """Add an object to storage, or mark it as updated if it's stored"""
+
+        with self.__lock:
+            k = key(type(obj), obj.id)
+            op = self.__changes.get(k, ('',))[0]
+            if op == 'delete':
+                op = 'update'
+            elif op == '':
+                if self.__row(type(obj).__name__, obj.id) is None:
+                    op = 'new'
+                else:
+                    op = 'update'
+            self.__objects[k] = obj
+            self.__changes[k] = (op, obj)
+            if self.cache is not None:
+                self.cache.put(k, obj)
+
+    def reload(self):
+        """Discard unsaved changes and forget the objects kept in memory
+
+        Objects are read from the database when they're retrieved, so there is
+        nothing to load ahead of time. Changed objects written to the database
+        when they were evicted from the cache are rolled back.
+
+        """
+
+        with self.__lock:
+            self.__objects = weakref.WeakValueDictionary()
+            self.__changes = {}
+            if self.cache is not None:
+                self.cache.clear()
+            connection = self.__connection
+            if connection is not None and connection.in_transaction:
+                connection.rollback()
+                # tables created since the last save are gone too
+                self.__tables = {}
+                self.__readTables()
+
+    def save(self):
+        """Write every change since the last save in a single transaction
+
+        Nothing is done while a batch is in progress.
+
+        """
+
+        with self.__lock:
+            if self.batching:
+                return
+            changes = self.__changes
+            connection = self.__connection
+            if len(changes) == 0 and (
+                connection is None or not connection.in_transaction
+            ):
+                return
+            self.__connect()
+            connection = self.__connection
+            # tables are created first, since a failed save can't roll them
+            # back
+            for op, obj in changes.values():
+                if obj is not None:
+                    self.__table(type(obj))
+            # a failed save mustn't roll back objects evicted from the cache
+            connection.execute('SAVEPOINT save')
+            try:
+                for k, (op, obj) in changes.items():
+                    self.__write(k, obj)
+            except BaseException:
+                connection.execute('ROLLBACK TO save')
+                connection.execute('RELEASE save')
+                raise
+            connection.execute('RELEASE save')
+            connection.commit()
+            self.__changes = {}
+
+    def tryGet(self, cls, id, default):
+        """Try to retrieve an object, instead returning default if not found"""
+
+        try:
+            return self.get(cls, id)
+        except KeyError:
+            return default
+
+    def __build(self, cls, id, data):
+        """Return the instance of a row, creating it if it isn't in memory"""
+
+        k = key(cls, id)
+        obj = self.__objects.get(k)
+        if obj is None:
+            obj = models.classes[cls](**json.loads(data))
+            self.__objects[k] = obj
+        if self.cache is not None:
+            self.cache.put(k, obj)
+        return obj
+
+    def __connect(self):
+        """Return the tables and indexed columns, connecting the first time"""
+
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(
+                self.path, check_same_thread=False
+            )
+            self.__readTables()
+        return self.__tables
+
+    def __evict(self, k, obj):
+        """Write a changed object evicted from the cache to the database
+
+        The row is written in a transaction left open until the next save
+        commits it or reload rolls it back, so the object no longer needs to
+        be kept in memory. Other connections can't write to the database
+        meanwhile.
+
+        """
+
+        if self.__changes.get(k, ('',))[0] not in ('new', 'update'):
+            return
+        self.__connect()
+        self.__table(type(obj))
+        self.__write(k, obj)
+        del self.__changes[k]
+        self.cache.writes += 1
+
+    def __hit(self, hit):
+        """Count a lookup answered from memory or from the database"""
+
+        if self.cache is not None:
+            if hit:
+                self.cache.hits += 1
+            else:
+                self.cache.misses += 1
+
+    def __readTables(self):
+        """Read the names of the tables and their indexed columns"""
+
+        tables = self.__connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).fetchall()
+        for name, in tables:
+            columns = self.__connection.execute(
+                'PRAGMA table_info("{}")'.format(name)
+            ).fetchall()
+            self.__tables[name] = tuple(c[1] for c in columns[2:])
+
+    def __row(self, cls, id):
+        """Return a stored row's data column, or None if there isn't one"""
+
+        if cls not in self.__connect():
+            return None
+        return self.__connection.execute(
+            'SELECT data FROM "{}" WHERE id = ?'.format(cls), (str(id),)
+        ).fetchone()
+
+    def __table(self, cls):
+        """Return a class' indexed columns, creating its table if needed"""
+
+        name = cls.__name__
+        if name not in self.__connect():
+            if not name.isidentifier():
+                raise ValueError('invalid class name: ' + repr(name))
+            columns = tuple(getattr(cls, '__indexes__', ()))
+            self.__connection.execute(
+                'CREATE TABLE "{}" (id TEXT PRIMARY KEY, data TEXT NOT NULL{})'
+                .format(name, ''.join(', "{}"'.format(c) for c in columns))
+            )
+            for column in columns:
+                self.__connection.execute(
+                    'CREATE INDEX "{0}.{1}" ON "{0}" ("{1}")'.format(
+                        name, column
+                    )
+                )
+            self.__tables[name] = columns
+        return self.__tables[name]
+
+    def __write(self, k, obj):
+        """Write an object's row, or delete it if obj is None"""
+
+        cls, _, id = k.partition('.')
+        if obj is None:
+            self.__connection.execute(
+                'DELETE FROM "{}" WHERE id = ?'.format(cls), (id,)
+            )
+            return
+        values = [id, json.dumps(obj.to_dict())]
+        for name in self.__tables[cls]:
+            value = getattr(obj, name, None)
+            if type(value) not in COLUMN_TYPES:
+                value = None
+            values.append(value)
+        self.__connection.execute(
+            'INSERT OR REPLACE INTO "{}" VALUES ({})'.format(
+                cls, ', '.join('?' * len(values))
+            ),
+            values
+        )
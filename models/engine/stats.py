@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+"""Module for measuring where time goes in storage engines and data models
+
+Nothing is measured until enable is called. It replaces the public methods
+of every storage engine class, and BaseModel's __init__, save, and to_dict,
+with wrappers that time each call, and disable puts the original methods
+back, so measuring costs nothing while it's off. cProfile and pstats are
+only imported once profiling starts.
+
+"""
+
+
+import functools
+import io
+import random
+import threading
+import time
+
+
+MODEL_METHODS = ('__init__', 'save', 'to_dict')
+IO_METHODS = ('reload', 'save')
+
+enabled = False
+timings = {}
+profiler = None
+_originals = {}
+_lock = threading.Lock()
+_random = random.Random()
+
+
+class Timing:
+    """Number of calls to a method and how long they took
+
+    Percentiles are estimated from a random sample of at most SAMPLES call
+    times, so measuring a method that is called millions of times doesn't
+    take more memory than measuring one called a few times.
+
+    """
+
+    SAMPLES = 10000
+
+    def __init__(self):
+        """Start with no calls"""
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self.bytesRead = None
+        self.bytesWritten = None
+
+    def add(self, seconds, read=None, written=None):
+        """Note one call that took some seconds and read and wrote bytes"""
+
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < self.SAMPLES:
+            self.samples.append(seconds)
+        else:
+            n = _random.randrange(self.count)
+            if n < self.SAMPLES:
+                self.samples[n] = seconds
+        if read is not None:
+            self.bytesRead = (self.bytesRead or 0) + read
+            self.bytesWritten = (self.bytesWritten or 0) + written
+
+    def percentile(self, fraction):
+        """Return the call time a fraction of the way through the sample"""
+
+        if len(self.samples) == 0:
+            return 0.0
+        samples = sorted(self.samples)
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def counters():
+    """Return the bytes this process has read and written so far, or None
+
+    The counts come from /proc/self/io, which only exists on Linux, and
+    include all reads and writes, whether they reached the disk or not.
+
+    """
+
+    try:
+        with open('/proc/self/io', 'rb') as file:
+            lines = file.read().split(b'\n')
+    except OSError:
+        return None
+    values = dict(line.split(b': ') for line in lines if b': ' in line)
+    try:
+        return int(values[b'rchar']), int(values[b'wchar'])
+    except (KeyError, ValueError):
+        return None
+
+
+def disable():
+    """Put back the original methods and stop measuring"""
+
+    global enabled
+    with _lock:
+        for (cls, name), method in _originals.items():
+            setattr(cls, name, method)
+        _originals.clear()
+        enabled = False
+
+
+def enable():
+    """Replace the methods to measure with wrappers that time every call
+
+    Storage engine classes defined after this is called aren't measured
+    until it is called again.
+
+    """
+
+    global enabled
+    from models.base_model import BaseModel
+    from models.engine.storage import Storage
+
+    with _lock:
+        classes = [Storage]
+        for cls in classes:
+            classes.extend(cls.__subclasses__())
+            for name, method in list(vars(cls).items()):
+                if callable(method) and (cls, name) not in _originals and (
+                    not name.startswith('_') or name == '__contains__'
+                ):
+                    _originals[cls, name] = method
+                    setattr(cls, name, _wrap(cls, name, method))
+        for name in MODEL_METHODS:
+            if (BaseModel, name) not in _originals:
+                method = vars(BaseModel)[name]
+                _originals[BaseModel, name] = method
+                setattr(BaseModel, name, _wrap(BaseModel, name, method))
+        enabled = True
+
+
+def report():
+    """Return a table of the measured methods, slowest in total first"""
+
+    lines = ['{:<28}{:>10}{:>12}{:>10}{:>10}{:>10}{:>10}{:>12}{:>12}'.format(
+        'method', 'calls', 'total ms', 'p50 ms', 'p90 ms', 'p99 ms',
+        'max ms', 'read KiB', 'written KiB'
+    )]
+    with _lock:
+        found = sorted(timings.items(), key=lambda item: -item[1].total)
+        for name, timing in found:
+            lines.append(
+                '{:<28}{:>10}{:>12.3f}{:>10.4f}{:>10.4f}{:>10.4f}{:>10.4f}'
+                '{:>12}{:>12}'.format(
+                    name, timing.count, timing.total * 1000,
+                    timing.percentile(0.5) * 1000,
+                    timing.percentile(0.9) * 1000,
+                    timing.percentile(0.99) * 1000,
+                    timing.max * 1000,
+                    _kibibytes(timing.bytesRead),
+                    _kibibytes(timing.bytesWritten)
+                )
+            )
+    return '\n'.join(lines)
+
+
+def reset():
+    """Forget every call measured so far"""
+
+    with _lock:
+        timings.clear()
+
+
+def startProfile():
+    """Start profiling every function call with cProfile"""
+
+    global profiler
+    import cProfile
+
+    if profiler is None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+
+def stopProfile(path=None, limit=30):
+    """Stop profiling and return the results, or None if not profiling
+
+    If path is given, the raw results are written to that file for pstats
+    or another viewer, and the path is returned. Otherwise, the limit
+    functions that took the most time including their callees are returned
+    as a table.
+
+    """
+
+    global profiler
+    if profiler is None:
+        return None
+    profile, profiler = profiler, None
+    profile.disable()
+    if path is not None:
+        profile.dump_stats(path)
+        return path
+    import pstats
+
+    text = io.StringIO()
+    pstats.Stats(profile, stream=text).sort_stats('cumulative').print_stats(
+        limit
+    )
+    return text.getvalue()
+
+
+def _kibibytes(count):
+    """Format a number of bytes in KiB, or a blank if it's unknown"""
+
+    return '' if count is None else '{:.1f}'.format(count / 1024)
+
+
+def _wrap(cls, name, method):
+    """Return a wrapper timing calls to a method under "Class.name" """
+
+    key = cls.__name__ + '.' + name
+    counted = name in IO_METHODS
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        """Time a call to the wrapped method"""
+
+        before = counters() if counted else None
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            read = written = None
+            if before is not None:
+                after = counters()
+                if after is not None:
+                    read = after[0] - before[0]
+                    written = after[1] - before[1]
+            with _lock:
+                timing = timings.get(key)
+                if timing is None:
+                    timing = timings[key] = Timing()
+                timing.add(seconds, read, written)
+
+    return wrapper
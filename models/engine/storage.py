@@ -3,37 +3,184 @@
 
 
 from abc import ABC, abstractmethod
+from models.engine.index import TextIndex, bounds, distance, location
+from models.engine.index import number
+import contextlib
+import heapq
+import threading
 
 
 class Storage (ABC):
     """Storage base class enabling persistence of data models"""
 
+    __threads = threading.local()
+
     @abstractmethod
     def __contains__(self, obj):
         """Test if the obj exists in storage"""
         pass
 
+    @abstractmethod
+    def all(self, cls=None):
+        """Get a dict of all stored objects, or only those of a given class"""
+        pass
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Save once at the end of a block instead of on every save call
+
+        Subclasses must make save do nothing while batching is true. Batches
+        only put off the saves of the thread that started them. If the block
+        raises an exception, every unsaved change is discarded, including
+        those made by other threads.
+
+        """
+
+        self.__batches(1)
+        try:
+            yield self
+        except BaseException:
+            if self.__batches(-1) == 0:
+                self.reload()
+            raise
+        if self.__batches(-1) == 0:
+            self.save()
+
+    @property
+    def batching(self):
+        """Whether this thread is in a batch, so saving should be put off"""
+
+        return self.__batches(0) > 0
+
+    def changed(self, obj):
+        """Note that a stored object was modified so the next save writes it"""
+        pass
+
+    @abstractmethod
+    def count(self, cls=None):
+        """Count all stored objects, or only those of a given class"""
+        pass
+
     @abstractmethod
     def delete(self, cls, id):
         """Remove a stored data model object, but don't commit this yet"""
         pass
 
+    @abstractmethod
+    def find(self, cls, **equals):
+        """Get a list of objects of a class with some given attribute values"""
+        pass
+
+    def flush(self):
+        """Make sure everything passed to save has been written"""
+        pass
+
     @abstractmethod
     def get(self, cls, id):
         """Get a data model object given its class or class name and its ID"""
         pass
 
+    def near(self, cls, latitude, longitude, radius):
+        """Get a list of IDs of objects of a class within radius of a point
+
+        The point is in degrees and the radius in kilometers, and objects
+        are located by the attributes named in their __geo__ tuple. IDs are
+        listed nearest first. This implementation checks every object of the
+        class.
+
+        """
+
+        return [
+            id for d, id in sorted(self.__distances(cls, latitude, longitude))
+            if d <= radius
+        ]
+
+    def nearest(self, cls, latitude, longitude, count):
+        """Get a list of IDs of the count objects of a class nearest a point
+
+        IDs are listed nearest first, like near. This implementation checks
+        every object of the class.
+
+        """
+
+        return [id for d, id in heapq.nsmallest(
+            count, self.__distances(cls, latitude, longitude)
+        )]
+
     @abstractmethod
     def new(self, obj):
         """Add a new data model object to storage, but don't save it yet"""
         pass
 
+    def query(self, cls, **ranges):
+        """Get a list of IDs of objects of a class with values in ranges
+
+        Each keyword argument names a numeric attribute and gives a (low,
+        high) tuple of inclusive bounds, either of which can be None. This
+        implementation checks every object of the class.
+
+        """
+
+        limits = bounds(ranges)
+        return [
+            obj.id for obj in self.all(cls).values()
+            if all(
+                low <= number(getattr(obj, name, None)) <= high
+                for name, low, high in limits
+            )
+        ]
+
+    @abstractmethod
+    def reload(self):
+        """Reload stored objects, discarding all unsaved changes"""
+        pass
+
     @abstractmethod
     def save(self):
         """Save all stored instances, committing all unsaved changes"""
         pass
 
+    def search(self, cls, text, limit=None):
+        """Get a list of IDs of objects of a class ranked by the words in text
+
+        Objects are matched by the words in the string attributes named in
+        their __text__ tuple, best match first, and at most limit IDs are
+        returned if it isn't None. This implementation indexes every object
+        of the class each time.
+
+        """
+
+        if isinstance(cls, type):
+            cls = cls.__name__
+        index = TextIndex()
+        for obj in self.all(cls).values():
+            index.add(cls + '.' + obj.id, obj)
+        return [
+            k.partition('.')[2] for score, k in index.search(cls, text, limit)
+        ]
+
     @abstractmethod
     def tryGet(self, cls, id, default):
         """Try to get an object from storage, return default if not found"""
         pass
+
+    def __batches(self, change):
+        """Add to the number of batches this thread is in, returning it"""
+
+        depths = getattr(Storage.__threads, 'depths', None)
+        if depths is None:
+            depths = Storage.__threads.depths = {}
+        depth = depths.get(id(self), 0) + change
+        if depth > 0:
+            depths[id(self)] = depth
+        else:
+            depths.pop(id(self), None)
+        return depth
+
+    def __distances(self, cls, latitude, longitude):
+        """Yield (distance, ID) tuples for the objects of a class with one"""
+
+        for obj in self.all(cls).values():
+            point = location(obj)
+            if point is not None:
+                yield distance(latitude, longitude, *point), obj.id
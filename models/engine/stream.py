@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""Module for reading the records of a JSON object one at a time"""
+
+
+import codecs
+import json
+import os
+import re
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class RecordReader:
+    """Reader for the key and value pairs of a JSON object in a binary file
+
+    Only as much of the file is kept in memory as is needed to decode the
+    current pair, so reading a large file one pair at a time takes about as
+    much memory as its largest value.
+
+    """
+
+    def __init__(self, file, progress=None, chunkSize=1 << 20):
+        """Set up reading a file
+
+        Args:
+            file (BinaryIO): file to read, positioned at the start of the JSON
+            progress (Callable[[int, int], Any]): if given, called with the
+                number of bytes read so far and the size of the file in bytes
+                every time a chunk is read
+            chunkSize (int): number of bytes to read from the file at a time
+
+        """
+
+        self.file = file
+        self.progress = progress
+        self.chunkSize = chunkSize
+        self.done = 0
+        try:
+            self.size = os.fstat(file.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            self.size = None
+        self.__decoder = codecs.getincrementaldecoder('utf-8')()
+        self.__json = json.JSONDecoder()
+        self.__text = ''
+        self.__pos = 0
+        self.__eof = False
+
+    def __iter__(self):
+        """Yield each key and value of the object in the file as a tuple"""
+
+        if self.__peek() != '{':
+            raise ValueError('value in JSON file is not an object')
+        self.__pos += 1
+        if self.__peek() == '}':
+            self.__pos += 1
+        else:
+            scan = self.__json.scan_once
+            while True:
+                text, pos = self.__text, self.__pos
+                end = 0
+                if text.startswith('"', pos):
+                    try:
+                        key, end = scan(text, pos)
+                        if text.startswith(': ', end):
+                            value, end = scan(text, end + 2)
+                        else:
+                            end = 0
+                    except (StopIteration, ValueError):
+                        end = 0
+                if 0 < end < len(text):
+                    self.__pos = end
+                else:
+                    key = self.__key()
+                    value = self.__value()
+                    text, end = self.__text, self.__pos
+                if text.startswith(', ', end):
+                    self.__pos = end + 2
+                    char = ','
+                else:
+                    char = self.__peek()
+                    self.__pos += 1
+                yield key, value
+                if char == '}':
+                    break
+                if char != ',':
+                    raise ValueError('expected "," or "}" in JSON object')
+        if self.__peek() != '':
+            raise ValueError('extra data after JSON object')
+
+    def __key(self):
+        """Decode the key and colon at the current position"""
+
+        if self.__peek() != '"':
+            raise ValueError('expected a key in JSON object')
+        key = self.__value()
+        if self.__peek() != ':':
+            raise ValueError('expected ":" after key in JSON object')
+        self.__pos += 1
+        self.__peek()
+        return key
+
+    def __more(self):
+        """Read another chunk of the file into the buffer"""
+
+        chunk = self.file.read(self.chunkSize)
+        self.done += len(chunk)
+        self.__eof = len(chunk) == 0
+        text = self.__decoder.decode(chunk, final=self.__eof)
+        self.__text = self.__text[self.__pos:] + text
+        self.__pos = 0
+        if self.progress is not None:
+            self.progress(self.done, self.size)
+
+    def __peek(self):
+        """Skip whitespace and return the next character, or '' at the end"""
+
+        while True:
+            self.__pos = WHITESPACE.match(self.__text, self.__pos).end()
+            if self.__pos < len(self.__text) or self.__eof:
+                break
+            self.__more()
+        return self.__text[self.__pos:self.__pos + 1]
+
+    def __value(self):
+        """Decode the JSON value at the current position"""
+
+        while True:
+            try:
+                value, end = self.__json.raw_decode(self.__text, self.__pos)
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+                self.__more()
+                continue
+            if end < len(self.__text) or self.__eof:
+                self.__pos = end
+                return value
+            self.__more()
+
+
+def records(file, progress=None, chunkSize=1 << 20):
+    """Return an iterator over the keys and values of a JSON object in a file
+
+    See RecordReader for a description of the arguments.
+
+    """
+
+    return iter(RecordReader(file, progress, chunkSize))
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""Module for converting time stamps to and from their stored form"""
+
+
+import datetime
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+epoch = False
+
+
+def decode(value):
+    """Return the datetime for a stored time stamp in either format
+
+    Strings are ISO 8601 time stamps, with or without microseconds, and
+    integers are microseconds since EPOCH.
+
+    """
+
+    if type(value) is int:
+        return EPOCH + value * MICROSECOND
+    return datetime.datetime.fromisoformat(value)
+
+
+def encode(value):
+    """Return the stored form of a datetime in the current format
+
+    The format is an ISO 8601 string that always includes microseconds, or
+    an integer number of microseconds since EPOCH if epoch is true.
+
+    """
+
+    if epoch:
+        return (value - EPOCH) // MICROSECOND
+    return value.isoformat(timespec='microseconds')
@@ -8,6 +8,14 @@ from models.base_model import BaseModel
 class Place (BaseModel):
     """class for stoing information on the residences"""
 
+    __indexes__ = ('city_id', 'user_id')
+    __columns__ = (
+        'number_rooms', 'number_bathrooms', 'max_guest', 'price_by_night',
+        'latitude', 'longitude'
+    )
+    __geo__ = ('latitude', 'longitude')
+    __text__ = ('name', 'description')
+
     city_id = ''
     user_id = ''
     name = ''
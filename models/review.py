@@ -8,6 +8,9 @@ from models.base_model import BaseModel
 class Review (BaseModel):
     """class for stoing review information"""
 
+    __indexes__ = ('place_id', 'user_id')
+    __text__ = ('text',)
+
     place_id = ''
     user_id = ''
     text = ''
@@ -8,4 +8,6 @@ from models.base_model import BaseModel
 class State (BaseModel):
     """class for stoing US state information"""
 
+    __text__ = ('name',)
+
     name = ''
@@ -7,6 +7,9 @@ from models.base_model import BaseModel
 
 class User (BaseModel):
     """class for storing user data"""
+
+    __text__ = ('first_name', 'last_name')
+
     email = ''
     password = ''
     first_name = ''
@@ -8,6 +8,7 @@ import importlib
 import io
 import models
 import models.engine.file_storage
+from models.engine import stats
 import os
 import os.path
 import unittest
@@ -124,12 +125,128 @@ class TestConsole (unittest.TestCase):
 
         self.assertWrites("** class doesn't exist **\n", 'all NotAClass')
         self.assertWrites("** class doesn't exist **\n", 'NotAClass.all()')
+        for line in ('all limit=-1', 'all State offset=x', 'State.all(1.5)'):
+            self.assertWrites('** invalid limit or offset **\n', line)
+
+    def test_allPaging(self):
+        """all command with a limit and offset"""
+
+        for _ in range(5):
+            self.cmd.onecmd('create State')
+        objs = [str(o) for o in models.storage.all().values()]
+        with self.subTest(msg='limit'):
+            self.assertWrites(str(objs[:2]) + '\n', 'all limit=2')
+            self.assertWrites(str(objs[:2]) + '\n', 'all State limit=2')
+        with self.subTest(msg='offset'):
+            self.assertWrites(str(objs[3:]) + '\n', 'all offset=3')
+            self.assertWrites('[]\n', 'all State offset=5')
+        with self.subTest(msg='limit and offset'):
+            expected = str(objs[1:3]) + '\n'
+            self.assertWrites(expected, 'all State offset=1 limit=2')
+            expected = '[' + ', '.join(objs[1:3]) + ']\n'
+            self.assertWrites(expected, 'State.all(2, 1)')
+            expected = '[' + ', '.join(objs[:4]) + ']\n'
+            self.assertWrites(expected, 'State.all(4)')
+        with self.subTest(msg='storage changed while printing'):
+            class Changing:
+                """Object that adds another one when printed"""
+
+                id = 'changing'
+
+                def __str__(self):
+                    """Add a State to storage"""
+
+                    models.storage.new(models.classes['State']())
+                    return 'changing'
+
+            models.storage.new(Changing())
+            self.assertIn("'changing'", self.capture('all offset=4'))
+
+    def test_near(self):
+        """near and nearest commands"""
+
+        objs = []
+        for latitude in (40.0, 40.02, 40.01):
+            self.cmd.onecmd('create Place')
+            obj = list(models.storage.all().values())[-1]
+            obj.latitude = latitude
+            obj.longitude = -74.0
+            obj.save()
+            objs.append(str(obj))
+        with self.subTest(msg='near'):
+            expected = str([objs[0], objs[2]]) + '\n'
+            self.assertWrites(expected, 'near Place 40 -74 1.5')
+            expected = '[' + ', '.join(objs[2:]) + ']\n'
+            self.assertWrites(expected, 'Place.near(40.01, -74, 0.5)')
+            self.assertWrites('[]\n', 'near User 40 -74 1.5')
+        with self.subTest(msg='nearest'):
+            expected = str([objs[1], objs[2]]) + '\n'
+            self.assertWrites(expected, 'nearest Place 40.02 -74 2')
+            expected = '[' + objs[0] + ']\n'
+            self.assertWrites(expected, 'Place.nearest(39, -74, 1)')
+        with self.subTest(msg='errors'):
+            self.assertWrites('** class name missing **\n', 'near')
+            self.assertWrites("** class doesn't exist **\n", 'near X 0 0 1')
+            self.assertWrites('** location missing **\n', 'near Place 0')
+            self.assertWrites('** radius missing **\n', 'near Place 0 0')
+            self.assertWrites('** count missing **\n', 'nearest Place 0 0')
+            self.assertWrites('** invalid location **\n',
+                              'near Place 91 0 1')
+            self.assertWrites('** invalid location **\n',
+                              'near Place 0 x 1')
+            self.assertWrites('** invalid radius **\n', 'near Place 0 0 -1')
+            self.assertWrites('** invalid count **\n',
+                              'nearest Place 0 0 1.5')
+
+    def test_search(self):
+        """search command"""
+
+        objs = []
+        for name in ('Beach house', 'Quiet cabin', 'Quiet beach house'):
+            self.cmd.onecmd('create Place')
+            obj = list(models.storage.all().values())[-1]
+            obj.name = name
+            obj.save()
+            objs.append(str(obj))
+        with self.subTest(msg='search'):
+            expected = str([objs[0], objs[2]]) + '\n'
+            self.assertWrites(expected, 'search Place beach')
+            expected = '[' + ', '.join([objs[1], objs[2]]) + ']\n'
+            self.assertWrites(expected, 'Place.search("quiet")')
+            self.assertWrites('[]\n', 'search Place castle')
+        with self.subTest(msg='errors'):
+            self.assertWrites('** class name missing **\n', 'search')
+            self.assertWrites("** class doesn't exist **\n", 'search X a')
+            self.assertWrites('** words missing **\n', 'search Place')
 
     def test_notACommand(self):
         """Try running a command that doesn't exist"""
 
         self.assertWrites('*** Unknown syntax: notacommand\n', 'notacommand')
 
+    def test_batch(self):
+        """batch command"""
+
+        with open('commands.txt', 'wt') as file:
+            file.write('create State\ncreate State\nState.count()\n')
+        try:
+            with self.subTest(msg='commands run and saved once'):
+                output = self.capture('batch commands.txt').split('\n')
+                self.assertEqual(len(output), 4)
+                self.assertEqual(output[2:], ['2', ''])
+                with open('storage.json', 'rt') as file:
+                    saved = file.read()
+                for id in output[:2]:
+                    self.assertIn('"State.' + id + '"', saved)
+        finally:
+            os.remove('commands.txt')
+        with self.subTest(msg='errors'):
+            self.assertWrites('** file name missing **\n', 'batch')
+            self.assertWrites(
+                "** file can't be read **\n",
+                'batch commands.txt'
+            )
+
     def test_count(self):
         """count command"""
 
@@ -212,6 +329,37 @@ class TestConsole (unittest.TestCase):
             self.assertWrites("** class doesn't exist **\n", 'show None hi')
             self.assertWrites("** class doesn't exist **\n", 'None.show("hi")')
 
+    def test_stats(self):
+        """stats command"""
+
+        stats.disable()
+        stats.reset()
+        self.addCleanup(stats.reset)
+        self.addCleanup(stats.disable)
+        with self.subTest(msg='off'):
+            self.assertWrites('** stats are off **\n', 'stats')
+            self.assertWrites('** not profiling **\n', 'stats stop')
+        with self.subTest(msg='on'):
+            self.assertWrites('', 'stats on')
+            self.capture('create State')
+            output = self.capture('stats').split('\n')
+            self.assertTrue(output[0].startswith('method'))
+            calls = {line.split()[0]: line.split()[1] for line in output[1:-1]}
+            self.assertEqual(calls['BaseModel.__init__'], '1')
+            save = type(models.storage).__name__ + '.save'
+            self.assertEqual(calls[save], '1')
+        with self.subTest(msg='reset and off'):
+            self.assertWrites('', 'stats reset')
+            self.assertWrites('', 'stats off')
+            self.capture('create State')
+            self.assertWrites('** stats are off **\n', 'stats')
+        with self.subTest(msg='profile'):
+            self.assertWrites('', 'stats profile')
+            self.capture('State.count()')
+            self.assertIn('function calls', self.capture('stats stop'))
+        with self.subTest(msg='errors'):
+            self.assertWrites('** unknown option **\n', 'stats sometimes')
+
     def test_update(self):
         """update command"""
 
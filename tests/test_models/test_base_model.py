@@ -4,7 +4,10 @@
 
 import datetime
 from itertools import chain
+import json
+import models
 from models.base_model import BaseModel
+from models.engine import timestamps
 from models.engine.file_storage import FileStorage
 import os
 import os.path
@@ -27,8 +30,12 @@ class TestBase (unittest.TestCase):
     def tearDownClass(self):
         """Remove the JSON file after each test case"""
 
-        if os.path.exists('storage.json'):
-            os.remove('storage.json')
+        for path in (
+            'storage.json', 'storage.json.log', 'storage.json.text',
+            'storage.json.text.sig', 'storage.json.lock'
+        ):
+            if os.path.exists(path):
+                os.remove(path)
 
     def test_creationTime(self):
         """Test that the creation time stamp is set properly"""
@@ -38,6 +45,28 @@ class TestBase (unittest.TestCase):
         self.assertIsInstance(b.created_at, datetime.datetime)
         self.assertTrue(0 <= (now - b.created_at).total_seconds() < 1)
 
+    def test_dirtyTracking(self):
+        """Test that modified instances are the only ones saved again"""
+
+        models.storage.journal = True
+        try:
+            b = self._cls()
+            other = self._cls()
+            models.storage.save()
+            with open('storage.json.log', 'rt') as file:
+                start = len(file.readlines())
+            b.name = 'changed'
+            models.storage.save()
+            with open('storage.json.log', 'rt') as file:
+                entries = [json.loads(line) for line in file][start:]
+        finally:
+            models.storage.journal = False
+            os.remove('storage.json.log')
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['op'], 'update')
+        self.assertEqual(entries[0]['key'], self._name + '.' + b.id)
+        self.assertEqual(entries[0]['obj']['name'], 'changed')
+
     def test_id(self):
         """Test that the base model UUID is created properly"""
 
@@ -66,6 +95,22 @@ class TestBase (unittest.TestCase):
             storage.reload()
             self.assertEqual(storage.get(self._cls, old['id']).to_dict(), old)
 
+    def test_timeStampRoundTrip(self):
+        """Test that time stamps survive conversion to and from a dict"""
+
+        b = self._cls()
+        b.created_at = b.created_at.replace(microsecond=0)
+        for epoch in (False, True):
+            with self.subTest(epoch=epoch):
+                timestamps.epoch = epoch
+                try:
+                    d = b.to_dict()
+                finally:
+                    timestamps.epoch = False
+                c = self._cls(**d)
+                self.assertEqual(c.created_at, b.created_at)
+                self.assertEqual(c.updated_at, b.updated_at)
+
     def test_toDictionary(self):
         """Test converting to a dictionary using to_dict"""
 
@@ -81,8 +126,14 @@ class TestBase (unittest.TestCase):
         with self.subTest(msg='datetimes converted to str'):
             self.assertIsInstance(d['created_at'], str)
             self.assertIsInstance(d['updated_at'], str)
-            self.assertEqual(d['created_at'], b.created_at.isoformat())
-            self.assertEqual(d['updated_at'], b.updated_at.isoformat())
+            self.assertEqual(
+                d['created_at'],
+                b.created_at.isoformat(timespec='microseconds')
+            )
+            self.assertEqual(
+                d['updated_at'],
+                b.updated_at.isoformat(timespec='microseconds')
+            )
 
     def test_toString(self):
         """Test converting to a string with __str__"""
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+"""Tests for the async_storage module"""
+
+
+import asyncio
+import json
+import models
+from models.engine import async_storage
+from models.engine.async_storage import AsyncStorage, wrap
+from models.engine.sqlite_storage import SQLiteStorage
+import os
+import threading
+import time
+import unittest
+
+
+PATH = 'test_async_storage.db'
+FILES = (
+    'storage.json', 'storage.json.log', 'storage.json.text',
+    'storage.json.text.sig', 'storage.json.lock', PATH
+)
+
+
+class AsyncModel:
+    """Dummy data model with an indexed attribute"""
+
+    __indexes__ = ('group',)
+
+    def __init__(self, **kwargs):
+        """Set the given attributes, except for __class__"""
+
+        kwargs.pop('__class__', None)
+        self.__dict__.update(kwargs)
+
+    def to_dict(self):
+        """Return this instance dictionary with its class name"""
+
+        return dict(self.__dict__, __class__='AsyncModel')
+
+
+class TestAsyncStorage (unittest.IsolatedAsyncioTestCase):
+    """Tests for the asyncio interfaces to storage engines"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Allow loading AsyncModels"""
+
+        models.classes['AsyncModel'] = AsyncModel
+
+    @classmethod
+    def tearDownClass(cls):
+        """Forget about AsyncModels"""
+
+        del models.classes['AsyncModel']
+
+    def tearDown(self):
+        """Remove the storage files"""
+
+        for path in FILES:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def check(self, storage):
+        """Use a wrapped storage engine in every way"""
+
+        await storage.anew(AsyncModel(id='1', group='a'))
+        await storage.anew(AsyncModel(id='2', group='b'))
+        await storage.asave()
+        self.assertEqual(await storage.acount('AsyncModel'), 2)
+        self.assertTrue(await storage.acontains('AsyncModel.1'))
+        obj = await storage.aget('AsyncModel', '2')
+        self.assertEqual(obj.group, 'b')
+        self.assertEqual(
+            [obj.id for obj in await storage.afind('AsyncModel', group='a')],
+            ['1']
+        )
+        self.assertIsNone(await storage.atryGet('AsyncModel', '3', None))
+        self.assertEqual(
+            sorted(await storage.aall('AsyncModel')),
+            ['AsyncModel.1', 'AsyncModel.2']
+        )
+        ids = [obj.id async for obj in storage.objects('AsyncModel')]
+        self.assertEqual(sorted(ids), ['1', '2'])
+        await storage.adelete('AsyncModel', '1')
+        await storage.anew(AsyncModel(id='3'))
+        await storage.areload()
+        self.assertEqual(
+            sorted(await storage.aall('AsyncModel')),
+            ['AsyncModel.1', 'AsyncModel.2']
+        )
+        await storage.adelete('AsyncModel', '1')
+        await storage.adelete('AsyncModel', '2')
+        await storage.asave()
+
+    async def test_fileStorage(self):
+        """Test using FileStorage from asyncio"""
+
+        with open('storage.json', 'wt') as file:
+            file.write('{}')
+        storage = async_storage.FileStorage()
+        storage.reload()
+        async with wrap(storage) as wrapped:
+            self.assertIsInstance(wrapped, async_storage.AsyncFileStorage)
+            await self.check(wrapped)
+            with open('storage.json', 'rt') as file:
+                self.assertNotIn('AsyncModel.2', json.load(file))
+            count = await wrapped.acount()
+            self.assertEqual(
+                len([obj async for obj in wrapped]), count
+            )
+
+    async def test_loop(self):
+        """Test that the event loop keeps running during blocking calls"""
+
+        class SlowStorage:
+            """Dummy storage engine that blocks while saving"""
+
+            def save(self):
+                """Block for a while, returning the thread it ran in"""
+
+                time.sleep(0.3)
+                return threading.current_thread()
+
+        ticks = []
+
+        async def tick():
+            """Note the time every few milliseconds"""
+
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        storage = AsyncStorage(SlowStorage())
+        task = asyncio.ensure_future(tick())
+        try:
+            thread = await storage.run(storage.storage.save)
+        finally:
+            task.cancel()
+            storage.executor.shutdown()
+        self.assertIsNot(thread, threading.current_thread())
+        self.assertGreater(len(ticks), 10)
+
+    async def test_sqliteStorage(self):
+        """Test using SQLiteStorage from asyncio"""
+
+        storage = SQLiteStorage(PATH)
+        self.assertEqual(storage.count(), 0)
+        async with wrap(storage) as wrapped:
+            self.assertIsInstance(wrapped, async_storage.AsyncSQLiteStorage)
+            await self.check(wrapped)
+        self.assertEqual(storage.count(), 0)
+        storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
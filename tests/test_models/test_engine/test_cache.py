@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Tests for the cache module"""
+
+
+from models.engine.cache import LRUCache, sizeof
+import unittest
+
+
+class Model:
+    """Dummy data model with some attributes"""
+
+    def __init__(self, **kwargs):
+        """Set the given attributes"""
+
+        self.__dict__.update(kwargs)
+
+
+class TestLRUCache (unittest.TestCase):
+    """Tests for the LRUCache class"""
+
+    def test_entries(self):
+        """Test evicting the least recently used objects past a count"""
+
+        evicted = []
+        cache = LRUCache(2, evict=lambda k, obj: evicted.append(k))
+        for k in 'abc':
+            cache.put(k, Model(id=k))
+        self.assertEqual(evicted, ['a'])
+        self.assertNotIn('a', cache)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b').id, 'b')
+        cache.put('d', Model(id='d'))
+        self.assertEqual(evicted, ['a', 'c'])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 2)
+        with self.subTest(msg='forgotten objects not evicted'):
+            self.assertEqual(cache.pop('b').id, 'b')
+            self.assertIsNone(cache.pop('b'))
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(evicted, ['a', 'c'])
+
+    def test_memory(self):
+        """Test evicting objects past a number of bytes"""
+
+        objs = [Model(id=str(n), name='x' * 100) for n in range(3)]
+        size = sizeof(objs[0])
+        self.assertGreater(size, 100)
+        cache = LRUCache(memory=2 * size)
+        for n, obj in enumerate(objs):
+            cache.put(n, obj)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.size, 2 * size)
+        with self.subTest(msg='object bigger than the budget kept'):
+            cache.put('big', Model(name='x' * 10 * size))
+            self.assertEqual(len(cache), 1)
+            self.assertIn('big', cache)
+        with self.subTest(msg='hit rate'):
+            self.assertIsNone(cache.hitRate)
+            cache.hits, cache.misses = 3, 1
+            self.assertEqual(cache.hitRate, 0.75)
+            self.assertIn('3 hits, 1 misses', repr(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
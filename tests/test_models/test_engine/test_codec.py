@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""Tests for the codec module"""
+
+
+import io
+import json
+from models.engine.codec import CODECS, JSONCodec, MarshalCodec
+from models.engine.codec import PickleCodec, forPath
+import unittest
+
+
+OBJECTS = {
+    'BaseModel.1': {'id': '1', 'name': 'café "quoted" {}'},
+    'Place.2': {'id': '2', 'price': 12, 'ids': [1, 2.5, None, True]},
+    'User.3': {'id': '3', 'nested': {'a': [], 'b': {}}}
+}
+
+
+class TestCodecs (unittest.TestCase):
+    """Tests for the storage file formats"""
+
+    def dumped(self, codec, objects):
+        """Return the bytes a codec writes for a dict of objects"""
+
+        file = io.BytesIO()
+        codec.dump(file, objects)
+        return file.getvalue()
+
+    def test_forPath(self):
+        """Test choosing a codec by file extension"""
+
+        self.assertIsInstance(forPath('storage.json'), JSONCodec)
+        self.assertIsInstance(forPath('dir/storage.MARSHAL'), MarshalCodec)
+        self.assertIsInstance(forPath('storage.pickle'), PickleCodec)
+        for path in ('storage', 'storage.txt', 'json'):
+            with self.subTest(path=path):
+                with self.assertRaises(ValueError):
+                    forPath(path)
+
+    def test_json(self):
+        """Test that the JSON codec writes a plain JSON object"""
+
+        data = self.dumped(JSONCodec(), OBJECTS)
+        self.assertEqual(json.loads(data.decode('utf-8')), OBJECTS)
+        self.assertEqual(self.dumped(JSONCodec(), {}), b'{}')
+
+    def test_roundTrip(self):
+        """Test reading back what each codec wrote"""
+
+        for extension, codec in CODECS.items():
+            data = self.dumped(codec, OBJECTS)
+            with self.subTest(extension=extension):
+                self.assertEqual(
+                    list(codec.read(io.BytesIO(data))), list(OBJECTS.items())
+                )
+            with self.subTest(extension=extension, msg='small chunks'):
+                for size in (1, 2, 7, 64):
+                    found = codec.read(io.BytesIO(data), chunkSize=size)
+                    self.assertEqual(list(found), list(OBJECTS.items()))
+            with self.subTest(extension=extension, msg='encoded one by one'):
+                file = io.BytesIO()
+                codec.write(file, (
+                    codec.encode(k, obj) for k, obj in OBJECTS.items()
+                ))
+                self.assertEqual(file.getvalue(), data)
+            with self.subTest(extension=extension, msg='no objects'):
+                data = self.dumped(codec, {})
+                self.assertEqual(list(codec.read(io.BytesIO(data))), [])
+
+    def test_progress(self):
+        """Test reporting progress while reading binary records"""
+
+        objects = {str(n): {'n': n} for n in range(100)}
+        for codec in (MarshalCodec(), PickleCodec()):
+            with self.subTest(codec=type(codec).__name__):
+                calls = []
+                data = self.dumped(codec, objects)
+                list(codec.read(
+                    io.BytesIO(data), lambda *a: calls.append(a), 100
+                ))
+                self.assertEqual(calls[-1][0], len(data))
+                self.assertEqual(
+                    [c[0] for c in calls], sorted(c[0] for c in calls)
+                )
+
+    def test_invalid(self):
+        """Test failures when a binary file isn't in the codec's format"""
+
+        for codec in (MarshalCodec(), PickleCodec()):
+            data = self.dumped(codec, OBJECTS)
+            bad = (
+                b'', b'{}', data[1:], data[:-1],
+                data[:len(codec.header) + 2],
+                data[:len(codec.header) + 4] + b'?' * (len(data) - 4)
+            )
+            for contents in bad:
+                with self.subTest(codec=type(codec).__name__, data=contents):
+                    with self.assertRaises(ValueError):
+                        list(codec.read(io.BytesIO(contents)))
+        with self.subTest(msg='other codec'):
+            data = self.dumped(PickleCodec(), OBJECTS)
+            with self.assertRaises(ValueError):
+                list(MarshalCodec().read(io.BytesIO(data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
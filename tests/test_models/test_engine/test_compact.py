@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""Tests for the compact module"""
+
+
+from models.engine import compact
+from models.engine.compact import Compact, ModelType
+import unittest
+import weakref
+
+
+class TestCompact (unittest.TestCase):
+    """Tests for compact data model classes"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create compact dummy data model classes"""
+
+        compact.enabled = True
+        try:
+            class Model (metaclass=ModelType):
+                """Dummy data model with fields that have no default"""
+
+                __fields__ = ('id',)
+
+                def describe(self):
+                    """Return the instance's attributes as a string"""
+
+                    return str(self.__dict__)
+
+            class Room (Model):
+                """Dummy data model with defaults"""
+
+                __indexes__ = ('beds',)
+
+                name = ''
+                beds = 1
+        finally:
+            compact.enabled = False
+        cls.Model = Model
+        cls.Room = Room
+
+    def test_classes(self):
+        """Test which class attributes become slots"""
+
+        with self.subTest(msg='compact classes'):
+            self.assertTrue(issubclass(self.Model, Compact))
+            self.assertEqual(self.Model.__slots__, ('id',))
+            self.assertEqual(self.Room.__slots__, ('name', 'beds'))
+            self.assertEqual(self.Room.__fields__, ('id', 'name', 'beds'))
+            self.assertEqual(self.Room.__defaults__, {'name': '', 'beds': 1})
+            self.assertEqual(self.Room.__indexes__, ('beds',))
+        with self.subTest(msg='classes left alone when disabled'):
+            class Plain (metaclass=ModelType):
+                """Dummy data model created while disabled"""
+
+                name = ''
+
+            self.assertFalse(issubclass(Plain, Compact))
+            self.assertEqual(Plain.name, '')
+            self.assertEqual(Plain().__dict__, {})
+
+    def test_attributes(self):
+        """Test setting, getting, and deleting attributes"""
+
+        room = self.Room()
+        with self.subTest(msg='defaults'):
+            self.assertEqual(room.name, '')
+            self.assertEqual(room.beds, 1)
+            self.assertRaises(AttributeError, getattr, room, 'id')
+            self.assertRaises(AttributeError, getattr, room, 'color')
+        with self.subTest(msg='slots and extra attributes'):
+            room.beds = 2
+            room.color = 'red'
+            room.id = '1'
+            self.assertEqual((room.beds, room.color, room.id), (2, 'red', '1'))
+            self.assertEqual(
+                room.describe(),
+                "{'id': '1', 'beds': 2, 'color': 'red'}"
+            )
+            self.assertEqual(self.Room().beds, 1)
+        with self.subTest(msg='deleting'):
+            del room.beds
+            del room.color
+            self.assertEqual(room.beds, 1)
+            self.assertRaises(AttributeError, getattr, room, 'color')
+            self.assertRaises(AttributeError, delattr, room, 'color')
+            self.assertRaises(AttributeError, delattr, room, 'name')
+        with self.subTest(msg='weak references'):
+            self.assertIs(weakref.ref(room)(), room)
+
+    def test_dict(self):
+        """Test changing attributes through __dict__"""
+
+        room = self.Room()
+        room.__dict__.update({'id': '1', 'name': 'den'}, color='red')
+        self.assertEqual(
+            dict(room.__dict__),
+            {'id': '1', 'name': 'den', 'color': 'red'}
+        )
+        self.assertEqual(len(room.__dict__), 3)
+        self.assertIn('color', room.__dict__)
+        self.assertNotIn('beds', room.__dict__)
+        room.__dict__['beds'] = 3
+        del room.__dict__['name']
+        del room.__dict__['color']
+        self.assertEqual(dict(room.__dict__), {'id': '1', 'beds': 3})
+        with self.assertRaises(KeyError):
+            del room.__dict__['color']
+        with self.assertRaises(KeyError):
+            room.__dict__['name']
+
+
+if __name__ == '__main__':
+    unittest.main()
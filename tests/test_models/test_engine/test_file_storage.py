@@ -4,13 +4,27 @@
 
 import importlib
 import json
+import models
 import models.engine.file_storage
+from models.base_model import BaseModel
+from models.engine import compact
+from models.engine.compact import ModelType
+from models.engine.storage import Storage
 import os
 import os.path
+import subprocess
+import sys
+import threading
+import time
 import unittest
 
 
 FileStorage = models.engine.file_storage.FileStorage
+FILES = (
+    'storage.json', 'storage.json.log', 'storage.json.log.1',
+    'storage.json.text', 'storage.json.text.sig', 'storage.json.lock',
+    'storage.json.tmp'
+)
 
 
 class TestStorage (unittest.TestCase):
@@ -36,11 +50,21 @@ class TestStorage (unittest.TestCase):
             del ret['_TestModel__includeClass']
             return ret
 
+    def removeFiles(self, path):
+        """Remove a storage file and the files kept next to it"""
+
+        for suffix in (
+            '', '.log', '.log.1', '.text', '.text.sig', '.lock', '.tmp'
+        ):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
     def setUp(self):
         """Remove the JSON file before each test"""
 
-        if os.path.exists('storage.json'):
-            os.remove('storage.json')
+        for path in FILES:
+            if os.path.exists(path):
+                os.remove(path)
         importlib.reload(models.engine.file_storage)
 
     @classmethod
@@ -52,8 +76,131 @@ class TestStorage (unittest.TestCase):
     def tearDown(self):
         """Remove the JSON file after each test"""
 
-        if os.path.exists('storage.json'):
-            os.remove('storage.json')
+        for path in FILES:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_batch(self):
+        """Test saving once at the end of a batch"""
+
+        storage = FileStorage()
+        storage.reload()
+        obj = TestStorage.TestModel(id='1')
+        with self.subTest(msg='saved at the end'):
+            with storage.batch():
+                with storage.batch():
+                    storage.new(obj)
+                    storage.save()
+                self.assertTrue(storage.batching)
+                storage.save()
+                self.assertFalse(os.path.exists('storage.json'))
+            self.assertFalse(storage.batching)
+            with open('storage.json', 'rt') as file:
+                self.assertEqual(json.load(file), {
+                    'TestModel.1': obj.to_dict()
+                })
+        with self.subTest(msg='discarded on error'):
+            with self.assertRaises(ValueError):
+                with storage.batch():
+                    storage.delete('TestModel', '1')
+                    raise ValueError('failed')
+            self.assertFalse(storage.batching)
+            self.assertIn('TestModel.1', storage)
+        with self.subTest(msg='only this thread batching'):
+            started, saved = threading.Event(), threading.Event()
+            batching = []
+
+            def other():
+                """Save from another thread during the batch"""
+
+                started.wait()
+                batching.append(storage.batching)
+                storage.new(TestStorage.TestModel(id='2'))
+                storage.save()
+                saved.set()
+
+            thread = threading.Thread(target=other)
+            thread.start()
+            with storage.batch():
+                started.set()
+                self.assertTrue(saved.wait(10))
+                self.assertEqual(batching, [False])
+                with open('storage.json', 'rt') as file:
+                    self.assertIn('TestModel.2', json.load(file))
+            thread.join()
+            storage.delete('TestModel', '2')
+        storage.delete('TestModel', '1')
+
+    def test_classes(self):
+        """Test finding and counting the objects of a class"""
+
+        storage = FileStorage()
+        storage.reload()
+        storage.all().clear()
+        objs = [TestStorage.TestModel(id=str(id)) for id in range(3)]
+        for obj in objs:
+            storage.new(obj)
+        with self.subTest(msg='all objects of a class'):
+            self.assertEqual(
+                storage.all('TestModel'),
+                {'TestModel.' + obj.id: obj for obj in objs}
+            )
+            self.assertEqual(
+                storage.all(TestStorage.TestModel),
+                storage.all('TestModel')
+            )
+            self.assertEqual(storage.all('BaseModel'), {})
+        with self.subTest(msg='count objects of a class'):
+            self.assertEqual(storage.count(), 3)
+            self.assertEqual(storage.count('TestModel'), 3)
+            self.assertEqual(storage.count('BaseModel'), 0)
+        with self.subTest(msg='index follows deletions and reloads'):
+            storage.delete('TestModel', '0')
+            self.assertEqual(storage.count('TestModel'), 2)
+            storage.save()
+            storage.all().clear()
+            self.assertEqual(storage.count('TestModel'), 0)
+            storage.reload()
+            self.assertEqual(
+                sorted(storage.all('TestModel')),
+                ['TestModel.1', 'TestModel.2']
+            )
+        storage.all().clear()
+
+    def test_concurrentSaves(self):
+        """Test that processes saving at the same time don't lose objects"""
+
+        code = (
+            'from models.base_model import BaseModel\n'
+            'for n in range(20):\n'
+            '    obj = BaseModel()\n'
+            '    obj.save()\n'
+            '    print(obj.id)\n'
+        )
+        for journal in ('0', '1'):
+            with self.subTest(journal=journal):
+                env = dict(os.environ, HBNB_JOURNAL=journal)
+                workers = [
+                    subprocess.Popen(
+                        [sys.executable, '-c', code], env=env,
+                        stdout=subprocess.PIPE, universal_newlines=True
+                    )
+                    for _ in range(4)
+                ]
+                ids = []
+                for worker in workers:
+                    ids.extend(worker.communicate()[0].split())
+                    self.assertEqual(worker.returncode, 0)
+                storage = FileStorage()
+                storage.reload()
+                self.assertEqual(len(ids), 80)
+                self.assertEqual(
+                    sorted(ids),
+                    sorted(obj.id for obj in storage.all().values())
+                )
+                for path in FILES:
+                    if os.path.exists(path):
+                        os.remove(path)
 
     def test_corruptFile(self):
         """Test failures when JSON file is incorrect"""
@@ -81,6 +228,233 @@ class TestStorage (unittest.TestCase):
                 pass
             self.assertRaises(ValueError, storage.reload)
 
+    def test_find(self):
+        """Test finding objects by their attribute values"""
+
+        class IndexedModel (TestStorage.TestModel):
+            """Dummy data model with an indexed attribute"""
+
+            __indexes__ = ('owner',)
+
+        storage = FileStorage()
+        storage.reload()
+        storage.all().clear()
+        objs = [
+            IndexedModel(id=str(id), owner=str(id % 2), size=id)
+            for id in range(6)
+        ]
+        for obj in objs:
+            storage.new(obj)
+        with self.subTest(msg='indexed attribute'):
+            self.assertEqual(storage.find('IndexedModel', owner='0'),
+                             objs[0::2])
+            self.assertEqual(storage.find(IndexedModel, owner='2'), [])
+        with self.subTest(msg='indexed and unindexed attributes'):
+            self.assertEqual(
+                storage.find('IndexedModel', owner='1', size=3),
+                [objs[3]]
+            )
+        with self.subTest(msg='unindexed attributes only'):
+            self.assertEqual(storage.find('IndexedModel', size=4), [objs[4]])
+            self.assertEqual(storage.find('IndexedModel', color='red'), [])
+            self.assertEqual(storage.find('IndexedModel'), objs)
+        with self.subTest(msg='index follows changes'):
+            objs[0].owner = '1'
+            storage.changed(objs[0])
+            storage.delete('IndexedModel', '1')
+            self.assertEqual(storage.find('IndexedModel', owner='0'),
+                             objs[2::2])
+            found = storage.find('IndexedModel', owner='1')
+            self.assertEqual(sorted(obj.id for obj in found), ['0', '3', '5'])
+        storage.all().clear()
+
+    def test_journal(self):
+        """Test appending changes to a journal instead of rewriting the file"""
+
+        storage = FileStorage(journal=True)
+        storage.reload()
+        first = TestStorage.TestModel(id='1', name='first')
+        second = TestStorage.TestModel(id='2', name='second')
+        with self.subTest(msg='new objects appended'):
+            storage.new(first)
+            storage.new(second)
+            storage.save()
+            self.assertFalse(os.path.exists('storage.json'))
+            with open('storage.json.log', 'rt') as file:
+                entries = [json.loads(line) for line in file]
+            self.assertEqual([e['op'] for e in entries], ['new', 'new'])
+            self.assertEqual(entries[0]['obj'], first.to_dict())
+        with self.subTest(msg='only changes appended'):
+            second.name = 'changed'
+            storage.new(second)
+            storage.delete('TestModel', '1')
+            storage.save()
+            with open('storage.json.log', 'rt') as file:
+                entries = [json.loads(line) for line in file][2:]
+            self.assertEqual(
+                [(e['op'], e['key']) for e in entries],
+                [('update', 'TestModel.2'), ('delete', 'TestModel.1')]
+            )
+        with self.subTest(msg='journal replayed on reload'):
+            storage.reload()
+            self.assertEqual(list(storage.all()), ['TestModel.2'])
+            self.assertEqual(storage.get('TestModel', '2').name, 'changed')
+        with self.subTest(msg='interrupted entry ignored'):
+            with open('storage.json.log', 'at') as file:
+                file.write('{"op": "delete", "key": "Test')
+            storage.reload()
+            self.assertIn('TestModel.2', storage)
+        with self.subTest(msg='unsaved objects never journaled'):
+            storage.new(TestStorage.TestModel(id='3'))
+            storage.delete('TestModel', '3')
+            size = os.path.getsize('storage.json.log')
+            storage.save()
+            self.assertEqual(os.path.getsize('storage.json.log'), size)
+
+    def test_journalCompaction(self):
+        """Test merging the journal into the storage file"""
+
+        storage = FileStorage(journal=True, compactSize=1)
+        storage.reload()
+        for id in range(3):
+            storage.new(TestStorage.TestModel(id=str(id)))
+        storage.save()
+        storage.compact(wait=True)
+        self.assertFalse(os.path.exists('storage.json.log'))
+        self.assertFalse(os.path.exists('storage.json.log.1'))
+        with open('storage.json', 'rt') as file:
+            self.assertEqual(len(json.load(file)), 3)
+        storage.delete('TestModel', '0')
+        storage.save()
+        storage.reload()
+        self.assertEqual(
+            sorted(storage.all()),
+            ['TestModel.1', 'TestModel.2']
+        )
+        with self.subTest(msg='full save replaces the journal'):
+            storage.journal = False
+            storage.delete('TestModel', '1')
+            storage.save()
+            self.assertFalse(os.path.exists('storage.json.log'))
+            storage.reload()
+            self.assertEqual(list(storage.all()), ['TestModel.2'])
+
+    def test_lazy(self):
+        """Test creating instances only once they're retrieved"""
+
+        built = []
+
+        class LazyModel (TestStorage.TestModel):
+            """Dummy data model that records when it's created"""
+
+            __indexes__ = ('owner',)
+
+            def __init__(self, *args, **kwargs):
+                """Initialize dummy instance and record its ID"""
+
+                super().__init__(*args, **kwargs)
+                built.append(self.id)
+
+        contents = {
+            'LazyModel.' + str(id): {'id': str(id), 'owner': str(id % 2)}
+            for id in range(4)
+        }
+        with open('storage.json', 'wt') as file:
+            json.dump(contents, file)
+        models.classes['LazyModel'] = LazyModel
+        Record = models.engine.file_storage.Record
+        lookUp = Record.__getattr__
+        looked = []
+
+        def lookUpAndNote(record, name):
+            """Note the name of an attribute looked up in a record"""
+
+            looked.append(name)
+            return lookUp(record, name)
+
+        Record.__getattr__ = lookUpAndNote
+        self.addCleanup(setattr, Record, '__getattr__', lookUp)
+        storage = models.engine.file_storage.FileStorage(lazy=True)
+        try:
+            storage.reload()
+            with self.subTest(msg='nothing created on reload'):
+                self.assertEqual(built, [])
+                self.assertEqual(looked, [])
+                self.assertEqual(storage.count('LazyModel'), 4)
+                self.assertIn('LazyModel.3', storage)
+            with self.subTest(msg='created when retrieved'):
+                obj = storage.get('LazyModel', '1')
+                self.assertIsInstance(obj, LazyModel)
+                self.assertEqual(obj.to_dict(), dict(contents['LazyModel.1'],
+                                                     __class__='TestModel'))
+                self.assertIs(storage.tryGet('LazyModel', '1', None), obj)
+                self.assertIsNone(storage.tryGet('LazyModel', '9', None))
+                self.assertEqual(built, ['1'])
+            with self.subTest(msg='indexes built from records'):
+                found = storage.find('LazyModel', owner='0')
+                self.assertEqual([obj.id for obj in found], ['0', '2'])
+                self.assertEqual(built, ['1', '0', '2'])
+            with self.subTest(msg='records saved without being created'):
+                storage.save()
+                with open('storage.json', 'rt') as file:
+                    saved = json.load(file)
+                self.assertEqual(saved['LazyModel.3'], contents['LazyModel.3'])
+                self.assertEqual(built, ['1', '0', '2'])
+            with self.subTest(msg='all creates every instance'):
+                objs = storage.all().values()
+                self.assertTrue(all(type(o) is LazyModel for o in objs))
+                self.assertEqual(sorted(built), ['0', '1', '2', '3'])
+        finally:
+            del models.classes['LazyModel']
+            storage.all().clear()
+
+    def test_lazyCompact(self):
+        """Test indexing records of compact classes by their defaults"""
+
+        compact.enabled = True
+        try:
+            class CompactModel (metaclass=ModelType):
+                """Dummy compact data model with an indexed default"""
+
+                __fields__ = ('id',)
+                __indexes__ = ('owner',)
+
+                owner = ''
+
+                def __init__(self, **kwargs):
+                    """Set the given attributes, except for __class__"""
+
+                    for name, value in kwargs.items():
+                        if name != '__class__':
+                            setattr(self, name, value)
+
+                def to_dict(self):
+                    """Return this instance's attributes"""
+
+                    return dict(self.__dict__, __class__='CompactModel')
+        finally:
+            compact.enabled = False
+        contents = {
+            'CompactModel.1': {'id': '1'},
+            'CompactModel.2': {'id': '2', 'owner': 'me'}
+        }
+        with open('storage.json', 'wt') as file:
+            json.dump(contents, file)
+        models.classes['CompactModel'] = CompactModel
+        storage = FileStorage(lazy=True)
+        try:
+            storage.reload()
+            Record = models.engine.file_storage.Record
+            record = Record(CompactModel, {'id': '1'})
+            self.assertEqual(record.owner, '')
+            self.assertRaises(AttributeError, getattr, record, 'color')
+            found = storage.find('CompactModel', owner='')
+            self.assertEqual([obj.id for obj in found], ['1'])
+            self.assertEqual(storage.get('CompactModel', '1').owner, '')
+        finally:
+            del models.classes['CompactModel']
+            storage.all().clear()
+
     def test_load(self):
         """Test loading the objects from the file"""
 
@@ -125,6 +499,351 @@ class TestStorage (unittest.TestCase):
                 contents[name]
             )
 
+    def test_loadOnFirstUse(self):
+        """Test that importing models neither loads nor imports data models"""
+
+        with open('storage.json', 'wt') as file:
+            json.dump({'BaseModel.123': {
+                '__class__': 'BaseModel',
+                'created_at': '2019-06-27T15:55:30.100000',
+                'id': '123',
+                'updated_at': '2019-07-27T15:56:30.100000'
+            }}, file)
+        code = (
+            'import models, sys\n'
+            'print("models.base_model" in sys.modules)\n'
+            'print("BaseModel" in models.classes)\n'
+            'print("models.base_model" in sys.modules)\n'
+            'print(models.storage.count())\n'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True
+        ).stdout
+        self.assertEqual(output.split(), ['False', 'True', 'False', '1'])
+
+    def test_near(self):
+        """Test finding IDs by distance from a location"""
+
+        class GeoModel (TestStorage.TestModel):
+            """Dummy data model with a location"""
+
+            __geo__ = ('lat', 'lon')
+
+        storage = FileStorage()
+        storage.reload()
+        objs = [
+            GeoModel(id=str(n), lat=40 + n * 0.01, lon=-74.0)
+            for n in range(5)
+        ]
+        for obj in objs:
+            storage.new(obj)
+        try:
+            with self.subTest(msg='near'):
+                self.assertEqual(storage.near(GeoModel, 40.0, -74.0, 2.5),
+                                 ['0', '1', '2'])
+                self.assertEqual(storage.near('GeoModel', 0, 0, 100), [])
+            with self.subTest(msg='nearest'):
+                self.assertEqual(storage.nearest('GeoModel', 40.03, -74, 3),
+                                 ['3', '2', '4'])
+            with self.subTest(msg='changed objects'):
+                objs[4].lat = 39.995
+                storage.changed(objs[4])
+                self.assertEqual(storage.nearest(GeoModel, 40.0, -74.0, 2),
+                                 ['0', '4'])
+            with self.subTest(msg='same as scanning every object'):
+                for args in ((40.02, -74.01, 2), (41, -74, 150)):
+                    self.assertEqual(
+                        storage.near(GeoModel, *args),
+                        Storage.near(storage, GeoModel, *args)
+                    )
+                    self.assertEqual(
+                        storage.nearest(GeoModel, *args),
+                        Storage.nearest(storage, GeoModel, *args)
+                    )
+        finally:
+            for obj in objs:
+                storage.delete('GeoModel', obj.id)
+        with self.subTest(msg='default locations skipped'):
+            Place = models.classes['Place']
+            stamps = {
+                'created_at': '2019-06-27T15:55:30.100000',
+                'updated_at': '2019-06-27T15:55:30.100000',
+                '__class__': 'Place'
+            }
+            storage.new(Place(id='nowhere', **stamps))
+            storage.new(Place(
+                id='somewhere', latitude=0.5, longitude=0.5, **stamps
+            ))
+            storage.save()
+            for lazy in (False, True):
+                importlib.reload(models.engine.file_storage)
+                storage = models.engine.file_storage.FileStorage(lazy=lazy)
+                self.assertEqual(storage.near(Place, 0, 0, 1000),
+                                 ['somewhere'])
+                self.assertEqual(storage.nearest(Place, 0, 0, 2),
+                                 ['somewhere'])
+
+    def test_path(self):
+        """Test storing objects in files of each format"""
+
+        paths = ('test.marshal', 'test.pickle', 'test.json')
+        for path in paths:
+            self.addCleanup(self.removeFiles, path)
+        for path in paths:
+            with self.subTest(path=path):
+                importlib.reload(models.engine.file_storage)
+                storage = models.engine.file_storage.FileStorage(
+                    path=path, journal=True, compactSize=1
+                )
+                storage.new(TestStorage.TestModel(id='1', name='one'))
+                storage.new(TestStorage.TestModel(id='2', name='two'))
+                storage.save()
+                storage.compact(wait=True)
+                storage.delete('TestModel', '2')
+                storage.journal = False
+                storage.save()
+                self.assertFalse(os.path.exists(path + '.log'))
+                importlib.reload(models.engine.file_storage)
+                storage = models.engine.file_storage.FileStorage(path=path)
+                self.assertEqual(storage.get('TestModel', '1').name, 'one')
+                self.assertEqual(list(storage.all()), ['TestModel.1'])
+                self.assertFalse(os.path.exists('storage.json'))
+        with self.subTest(msg='format chosen by extension'):
+            with open('test.json', 'rt') as file:
+                self.assertEqual(list(json.load(file)), ['TestModel.1'])
+            with open('test.pickle', 'rb') as file:
+                self.assertEqual(file.readline(), b'HBNB pickle\n')
+        with self.subTest(msg='unknown extension'):
+            with self.assertRaises(ValueError):
+                FileStorage(path='test.txt')
+        with self.subTest(msg='unsaved changes kept'):
+            storage = models.engine.file_storage.FileStorage(
+                path='test.json'
+            )
+            storage.new(TestStorage.TestModel(id='3'))
+            with self.assertRaises(RuntimeError):
+                models.engine.file_storage.FileStorage(path='test.pickle')
+            self.assertIn('TestModel.3', storage)
+            storage.save()
+            with open('test.json', 'rt') as file:
+                self.assertIn('TestModel.3', json.load(file))
+
+    def test_search(self):
+        """Test ranking IDs by the words in objects' text"""
+
+        class TextModel (TestStorage.TestModel):
+            """Dummy data model with indexed text"""
+
+            __text__ = ('title',)
+
+        models.classes['TextModel'] = TextModel
+        storage = FileStorage()
+        storage.reload()
+        for n, title in enumerate(('Beach house', 'House', 'Cabin')):
+            storage.new(TextModel(id=str(n), title=title))
+        try:
+            with self.subTest(msg='search'):
+                self.assertEqual(storage.search(TextModel, 'beach house'),
+                                 ['0', '1'])
+                self.assertEqual(storage.search('TextModel', 'house', 1),
+                                 ['1'])
+                self.assertEqual(
+                    storage.search(TextModel, 'beach cabin'),
+                    Storage.search(storage, TextModel, 'beach cabin')
+                )
+            with self.subTest(msg='saved with the storage file'):
+                storage.save()
+                with open('storage.json.text', 'rt') as file:
+                    saved = json.load(file)
+                table = saved['tables']['TextModel']
+                table['postings']['castle'] = table['postings'].pop('cabin')
+                table['documents']['TextModel.2'] = 'castle'
+                with open('storage.json.text', 'wt') as file:
+                    json.dump(saved, file)
+                storage.reload()
+                self.assertEqual(storage.search(TextModel, 'castle'), ['2'])
+            with self.subTest(msg='only written again once changed'):
+                storage.new(TestStorage.TestModel(id='9'))
+                storage.save()
+                with open('storage.json.text', 'rt') as file:
+                    self.assertEqual(json.load(file), saved)
+                storage.reload()
+                self.assertEqual(storage.search(TextModel, 'castle'), ['2'])
+                storage.delete('TestModel', '9')
+            with self.subTest(msg='rebuilt if out of date'):
+                obj = storage.get(TextModel, '2')
+                obj.title = 'Beach cabin'
+                storage.changed(obj)
+                storage.journal = True
+                storage.save()
+                storage.reload()
+                self.assertEqual(storage.search(TextModel, 'castle'), [])
+                self.assertEqual(storage.search(TextModel, 'beach'),
+                                 ['0', '2'])
+                with open('storage.json', 'at') as file:
+                    file.write(' ')
+                storage.reload()
+                self.assertEqual(storage.search(TextModel, 'cabin'), ['2'])
+            with self.subTest(msg='read when first searched'):
+                storage.journal = False
+                storage.save()
+                with open('storage.json.text', 'rt') as file:
+                    saved = json.load(file)
+                table = saved['tables']['TextModel']
+                table['postings']['castle'] = table['postings'].pop('cabin')
+                with open('storage.json.text', 'wt') as file:
+                    json.dump(saved, file)
+                storage.reload()
+                storage.new(TextModel(id='3', title='Castle'))
+                self.assertEqual(
+                    sorted(storage.search(TextModel, 'castle')), ['2', '3']
+                )
+                storage.delete('TextModel', '3')
+            with self.subTest(msg='out of date once saved unsearched'):
+                storage.reload()
+                storage.changed(storage.get(TextModel, '1'))
+                storage.save()
+                storage.reload()
+                self.assertEqual(storage.search(TextModel, 'castle'), [])
+        finally:
+            for n in range(3):
+                storage.delete('TextModel', str(n))
+            del models.classes['TextModel']
+
+    def test_query(self):
+        """Test finding IDs by ranges of numeric attribute values"""
+
+        class ColumnModel (TestStorage.TestModel):
+            """Dummy data model with numeric columns"""
+
+            __columns__ = ('price', 'rooms')
+
+        storage = FileStorage(columns=True)
+        storage.reload()
+        objs = [
+            ColumnModel(id=str(n), price=n * 10, rooms=n % 3, guests=n)
+            for n in range(6)
+        ]
+        for obj in objs:
+            storage.new(obj)
+        try:
+            with self.subTest(msg='columns'):
+                self.assertEqual(
+                    sorted(storage.query(ColumnModel, price=(None, 30),
+                                         rooms=(1, None))),
+                    ['1', '2']
+                )
+            with self.subTest(msg='other attributes'):
+                self.assertEqual(
+                    sorted(storage.query('ColumnModel', price=(20, None),
+                                         guests=(None, 4))),
+                    ['2', '3', '4']
+                )
+                self.assertEqual(storage.query('ColumnModel', x=(0, 1)), [])
+            with self.subTest(msg='changed objects'):
+                objs[5].price = 0
+                storage.changed(objs[5])
+                self.assertEqual(
+                    sorted(storage.query(ColumnModel, price=(None, 0))),
+                    ['0', '5']
+                )
+            with self.subTest(msg='same as scanning every object'):
+                ranges = {'price': (10, 40), 'guests': (2, None)}
+                self.assertEqual(
+                    sorted(storage.query(ColumnModel, **ranges)),
+                    sorted(Storage.query(storage, ColumnModel, **ranges))
+                )
+            with self.subTest(msg='without columns'):
+                storage.columns = False
+                self.assertEqual(
+                    sorted(storage.query(ColumnModel, price=(None, 30),
+                                         rooms=(1, None))),
+                    ['1', '2', '5']
+                )
+        finally:
+            for obj in objs:
+                storage.delete('ColumnModel', obj.id)
+
+    def test_refresh(self):
+        """Test loading changes saved by another process"""
+
+        code = (
+            'import sys\n'
+            'from models.base_model import BaseModel\n'
+            'import models\n'
+            'for id in sys.argv[1:]:\n'
+            '    if id.startswith("-"):\n'
+            '        models.storage.delete("BaseModel", id[1:])\n'
+            '    else:\n'
+            '        models.storage.new(BaseModel(\n'
+            '            id=id, __class__="BaseModel",\n'
+            '            created_at="2019-06-27T15:55:30.100000",\n'
+            '            updated_at="2019-06-27T15:55:30.100000"\n'
+            '        ))\n'
+            'models.storage.save()\n'
+        )
+
+        def other(journal, *ids):
+            """Save changes to storage from another process"""
+
+            subprocess.run(
+                [sys.executable, '-c', code] + list(ids), check=True,
+                env=dict(os.environ, HBNB_JOURNAL=journal)
+            )
+
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                importlib.reload(models.engine.file_storage)
+                storage = models.engine.file_storage.FileStorage(
+                    journal=journal, refreshInterval=None
+                )
+                storage.reload()
+                other(str(int(journal)), 'a', 'b')
+                self.assertEqual(storage.count(), 0)
+                storage.refresh()
+                a = storage.get('BaseModel', 'a')
+                self.assertEqual(sorted(storage.all()), [
+                    'BaseModel.a', 'BaseModel.b'
+                ])
+                storage.new(BaseModel(
+                    id='local', __class__='BaseModel',
+                    created_at='2019-06-27T15:55:30.100000',
+                    updated_at='2019-06-27T15:55:30.100000'
+                ))
+                other(str(int(journal)), 'c', '-b')
+                storage.refresh()
+                self.assertEqual(sorted(storage.all()), [
+                    'BaseModel.a', 'BaseModel.c', 'BaseModel.local'
+                ])
+                self.assertIs(storage.get('BaseModel', 'a'), a)
+                storage.save()
+                storage.delete('BaseModel', 'local')
+                storage.save()
+                if not journal:
+                    with self.subTest(msg='unchanged objects not converted'):
+                        calls = []
+                        to_dict = BaseModel.to_dict
+                        BaseModel.to_dict = (
+                            lambda obj: calls.append(obj) or to_dict(obj)
+                        )
+                        try:
+                            other('0', 'e')
+                            storage.refresh()
+                        finally:
+                            BaseModel.to_dict = to_dict
+                        self.assertEqual(calls, [])
+                        self.assertIs(storage.get('BaseModel', 'a'), a)
+                        storage.delete('BaseModel', 'e')
+                        storage.save()
+                with self.subTest(msg='refreshed every refreshInterval'):
+                    storage.refreshInterval = 0
+                    other(str(int(journal)), 'd')
+                    self.assertEqual(storage.count('BaseModel'), 3)
+                for path in FILES:
+                    if os.path.exists(path):
+                        os.remove(path)
+
     def test_save(self):
         """Test saving objects to the file"""
 
@@ -155,6 +874,173 @@ class TestStorage (unittest.TestCase):
             with open('storage.json', 'rt') as file:
                 self.assertEqual(json.load(file), contents)
 
+    def test_saveChanges(self):
+        """Test that only changed objects are encoded again when saving"""
+
+        encoded = []
+
+        class CountingModel (TestStorage.TestModel):
+            """Dummy data model that counts calls to to_dict"""
+
+            def to_dict(self):
+                """Return this instance dictionary and count the call"""
+
+                encoded.append(self.id)
+                return super().to_dict()
+
+        storage = FileStorage()
+        storage.reload()
+        objs = [CountingModel(id=str(id), n=id) for id in range(3)]
+        for obj in objs:
+            storage.new(obj)
+        storage.save()
+        self.assertEqual(sorted(encoded), ['0', '1', '2'])
+        with self.subTest(msg='unchanged objects not encoded'):
+            encoded.clear()
+            storage.save()
+            self.assertEqual(encoded, [])
+        with self.subTest(msg='changed objects encoded'):
+            objs[1].n = 10
+            storage.changed(objs[1])
+            storage.delete('CountingModel', '2')
+            storage.save()
+            self.assertEqual(encoded, ['1'])
+            with open('storage.json', 'rt') as file:
+                contents = json.load(file)
+            self.assertEqual(
+                contents,
+                {
+                    'CountingModel.0': objs[0].to_dict(),
+                    'CountingModel.1': objs[1].to_dict()
+                }
+            )
+        with self.subTest(msg='changes noted only for stored objects'):
+            encoded.clear()
+            storage.changed(CountingModel(id='0'))
+            storage.save()
+            self.assertEqual(encoded, [])
+        with self.subTest(msg='changes racing a delete'):
+
+            class IndexedModel (CountingModel):
+                """Dummy data model with an indexed attribute"""
+
+                __indexes__ = ('n',)
+
+            obj = IndexedModel(id='4', n=4)
+            storage.new(obj)
+            storage.save()
+            self.assertEqual(storage.find('IndexedModel', n=4), [obj])
+            obj.n = 5
+            changing = threading.Thread(target=storage.changed, args=(obj,))
+
+            class BlockingModel (TestStorage.TestModel):
+                """Dummy data model that deletes obj while being indexed"""
+
+                __indexes__ = ('slow',)
+
+                @property
+                def slow(self):
+                    """Let changed wait for the lock, then delete obj"""
+
+                    if changing.ident is None:
+                        changing.start()
+                        changing.join(0.2)
+                        storage.delete('IndexedModel', '4')
+
+            storage.new(BlockingModel(id='0'))
+            changing.join()
+            storage.delete('BlockingModel', '0')
+            self.assertEqual(storage.find('IndexedModel', n=5), [])
+            self.assertEqual(storage.count('IndexedModel'), 0)
+            storage.save()
+            with open('storage.json', 'rt') as file:
+                self.assertNotIn('IndexedModel.4', json.load(file))
+        with self.subTest(msg='lists changed in place'):
+            obj = CountingModel(id='3', ids=[])
+            storage.new(obj)
+            storage.save()
+            storage.get('CountingModel', '3').ids.append('x')
+            storage.save()
+            with open('storage.json', 'rt') as file:
+                contents = json.load(file)
+            self.assertEqual(contents['CountingModel.3']['ids'], ['x'])
+            storage.delete('CountingModel', '3')
+        storage.delete('CountingModel', '0')
+        storage.delete('CountingModel', '1')
+
+    def test_saveDelay(self):
+        """Test saving in the background after a delay"""
+
+        encoded = []
+        fail = []
+
+        class CountingModel (TestStorage.TestModel):
+            """Dummy data model that counts calls to to_dict"""
+
+            def to_dict(self):
+                """Return this instance dictionary and count the call"""
+
+                if fail:
+                    raise TypeError('cannot encode')
+                encoded.append(self.id)
+                return super().to_dict()
+
+        def stored():
+            """Return the keys in the storage file"""
+
+            if not os.path.exists('storage.json'):
+                return []
+            with open('storage.json', 'rt') as file:
+                return sorted(json.load(file))
+
+        models.classes['CountingModel'] = CountingModel
+        storage = FileStorage(saveDelay=0.5)
+        storage.reload()
+        obj = CountingModel(id='1')
+        with self.subTest(msg='saves put off and combined'):
+            storage.new(obj)
+            for n in range(5):
+                obj.n = n
+                storage.changed(obj)
+                storage.save()
+            self.assertEqual(stored(), [])
+            for _ in range(50):
+                if stored():
+                    break
+                time.sleep(0.1)
+            self.assertEqual(stored(), ['CountingModel.1'])
+            self.assertEqual(encoded, ['1'])
+        with self.subTest(msg='flush writes right away'):
+            storage.new(CountingModel(id='2'))
+            storage.save()
+            storage.flush()
+            self.assertEqual(stored(), ['CountingModel.1', 'CountingModel.2'])
+        with self.subTest(msg='reload and batch flush first'):
+            storage.new(CountingModel(id='3'))
+            storage.save()
+            storage.reload()
+            self.assertIn('CountingModel.3', stored())
+            storage.new(CountingModel(id='4'))
+            storage.save()
+            with self.assertRaises(ValueError):
+                with storage.batch():
+                    storage.new(CountingModel(id='5'))
+                    raise ValueError
+            self.assertIn('CountingModel.4', stored())
+            self.assertNotIn('CountingModel.5', stored())
+        with self.subTest(msg='failed saves tried again by flush'):
+            fail.append(True)
+            storage.new(CountingModel(id='6'))
+            storage.save()
+            time.sleep(1)
+            self.assertRaises(TypeError, storage.flush)
+            fail.clear()
+            storage.flush()
+            self.assertIn('CountingModel.6', stored())
+        for k in list(storage.all('CountingModel')):
+            storage.delete('CountingModel', k.partition('.')[2])
+        del models.classes['CountingModel']
+
     def test_saveBadObject(self):
         """Trying to save objects that aren't valid data models"""
 
@@ -168,3 +1054,88 @@ class TestStorage (unittest.TestCase):
             self.assertRaises(AttributeError, storage.new, obj)
             obj.id = '123'
             obj = TestStorage.TestModel(True)
+
+    def test_threads(self):
+        """Test reading, changing, and saving storage from many threads"""
+
+        class ThreadModel (TestStorage.TestModel):
+            """Dummy data model with indexed attributes"""
+
+            __indexes__ = ('group',)
+            __columns__ = ('n',)
+
+        models.classes['ThreadModel'] = ThreadModel
+        storage = FileStorage(refreshInterval=0, columns=True)
+        storage.reload()
+        errors = []
+        done = threading.Event()
+
+        def run(work):
+            """Call work until done is set, noting any exception"""
+
+            try:
+                while not done.is_set():
+                    work()
+            except Exception as error:
+                errors.append(error)
+
+        def write(offset):
+            """Add, change, and delete objects, noting any exception"""
+
+            try:
+                for n in range(offset, offset + 1000):
+                    obj = ThreadModel(id=str(n), group=n % 5, n=n)
+                    storage.new(obj)
+                    obj.n = -n
+                    storage.changed(obj)
+                    if n % 3 == 0:
+                        storage.delete('ThreadModel', str(n))
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            """Look objects up in every way"""
+
+            storage.find('ThreadModel', group=1)
+            storage.query('ThreadModel', n=(None, 0))
+            storage.all('ThreadModel')
+            storage.count('ThreadModel')
+            storage.tryGet('ThreadModel', '1', None)
+
+        threads = [
+            threading.Thread(target=run, args=(read,)) for _ in range(4)
+        ]
+        threads.append(threading.Thread(target=run, args=(storage.save,)))
+        writers = [
+            threading.Thread(target=write, args=(n * 1000,)) for n in range(4)
+        ]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads + writers:
+                thread.start()
+            for thread in writers:
+                thread.join()
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        storage.save()
+        expected = {
+            k: obj.to_dict() for k, obj in storage.all('ThreadModel').items()
+        }
+        kept = [
+            n for offset in range(0, 4000, 1000)
+            for n in range(offset, offset + 1000) if n % 3 != 0
+        ]
+        self.assertEqual(
+            sorted(expected), sorted('ThreadModel.' + str(n) for n in kept)
+        )
+        self.assertTrue(all(obj['n'] <= 0 for obj in expected.values()))
+        with open('storage.json', 'rt') as file:
+            self.assertEqual(json.load(file), expected)
+        for k in list(expected):
+            storage.delete('ThreadModel', k.partition('.')[2])
+        del models.classes['ThreadModel']
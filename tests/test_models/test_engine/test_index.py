@@ -0,0 +1,411 @@
+#!/usr/bin/python3
+"""Tests for the index module"""
+
+
+from models.engine import index
+from models.engine.index import AttributeIndex, ClassIndex, ColumnIndex
+from models.engine.index import GridIndex, IndexedDict, TextIndex, distance
+from models.engine.index import words
+import json
+import unittest
+
+
+class Model:
+    """Dummy data model with indexed attributes"""
+
+    __indexes__ = ('group', 'tag')
+    tag = 'none'
+
+    def __init__(self, **kwargs):
+        """Set the given attributes"""
+
+        self.__dict__.update(kwargs)
+
+
+class Spot:
+    """Dummy data model with numeric columns"""
+
+    __columns__ = ('x', 'y')
+
+    def __init__(self, **kwargs):
+        """Set the given attributes"""
+
+        self.__dict__.update(kwargs)
+
+
+class Pin:
+    """Dummy data model with a location"""
+
+    __geo__ = ('lat', 'lon')
+
+    def __init__(self, **kwargs):
+        """Set the given attributes"""
+
+        self.__dict__.update(kwargs)
+
+
+class Note:
+    """Dummy data model with indexed text"""
+
+    __text__ = ('title', 'body')
+
+    def __init__(self, **kwargs):
+        """Set the given attributes"""
+
+        self.__dict__.update(kwargs)
+
+
+class TestAttributeIndex (unittest.TestCase):
+    """Tests for the AttributeIndex class"""
+
+    def setUp(self):
+        """Create a dictionary with an attribute index"""
+
+        self.index = AttributeIndex()
+        self.objects = IndexedDict([self.index])
+
+    def test_find(self):
+        """Test looking up keys by attribute values"""
+
+        self.objects['Model.1'] = Model(group='a')
+        self.objects['Model.2'] = Model(group='b', tag='x')
+        self.objects['Model.3'] = Model(group='a', tag='x')
+        self.objects['Other.1'] = Model(group='a')
+        with self.subTest(msg='indexed attributes'):
+            self.assertEqual(
+                self.index.find('Model', 'group', 'a'),
+                ['Model.1', 'Model.3']
+            )
+            self.assertEqual(self.index.find('Model', 'tag', 'none'),
+                             ['Model.1'])
+            self.assertEqual(self.index.find('Model', 'group', 'c'), [])
+        with self.subTest(msg='attributes that can\'t be looked up'):
+            self.assertIsNone(self.index.find('Model', 'id', '1'))
+            self.assertIsNone(self.index.find('Model', 'group', []))
+            self.assertIsNone(self.index.find('State', 'group', 'a'))
+        with self.subTest(msg='unhashable values skipped'):
+            self.objects['Model.4'] = Model(group=['a'])
+            self.assertEqual(len(self.index.find('Model', 'group', 'a')), 2)
+        with self.subTest(msg='objects without declared attributes'):
+            self.objects['Model.5'] = 'not a model'
+            self.assertEqual(len(self.index.find('Model', 'group', 'a')), 2)
+
+    def test_update(self):
+        """Test keeping the index current as objects change"""
+
+        obj = Model(group='a')
+        self.objects['Model.1'] = obj
+        with self.subTest(msg='changed attribute reindexed'):
+            obj.group = 'b'
+            self.index.replace('Model.1', obj, obj)
+            self.assertEqual(self.index.find('Model', 'group', 'a'), [])
+            self.assertEqual(self.index.find('Model', 'group', 'b'),
+                             ['Model.1'])
+        with self.subTest(msg='replaced object reindexed'):
+            self.objects['Model.1'] = Model(group='c', tag='y')
+            self.assertEqual(self.index.find('Model', 'group', 'b'), [])
+            self.assertEqual(self.index.find('Model', 'tag', 'y'),
+                             ['Model.1'])
+        with self.subTest(msg='removed object unindexed'):
+            del self.objects['Model.1']
+            self.assertEqual(self.index.find('Model', 'group', 'c'), [])
+            self.objects['Model.2'] = Model(group='c')
+            self.objects.clear()
+            self.assertIsNone(self.index.find('Model', 'group', 'c'))
+
+
+class TestColumnIndex (unittest.TestCase):
+    """Tests for the ColumnIndex class"""
+
+    def setUp(self):
+        """Create a dictionary with a column index"""
+
+        self.index = ColumnIndex()
+        self.objects = IndexedDict([self.index])
+
+    def assertSelects(self, keys, cls, **ranges):
+        """Check the keys selected with and without NumPy"""
+
+        for numpy in {index.numpy, None}:
+            with self.subTest(numpy=numpy is not None, **ranges):
+                saved, index.numpy = index.numpy, numpy
+                try:
+                    found = self.index.select(cls, **ranges)
+                finally:
+                    index.numpy = saved
+                self.assertEqual(sorted(found), keys)
+
+    def test_select(self):
+        """Test selecting keys by ranges of values"""
+
+        for n in range(6):
+            self.objects['Spot.' + str(n)] = Spot(x=n, y=n * 0.5)
+        self.objects['Spot.6'] = Spot(x='6', y=None)
+        self.objects['Spot.7'] = Spot()
+        self.assertSelects(['Spot.1', 'Spot.2', 'Spot.3'], 'Spot', x=(1, 3))
+        self.assertSelects(['Spot.4', 'Spot.5'], 'Spot', x=(4, None))
+        self.assertSelects(['Spot.0', 'Spot.1'], 'Spot', y=(None, 0.5))
+        self.assertSelects(
+            ['Spot.2', 'Spot.3'], 'Spot', x=(2, None), y=(None, 1.5)
+        )
+        self.assertSelects(
+            ['Spot.' + str(n) for n in range(8)], 'Spot'
+        )
+        with self.subTest(msg='columns that can\'t be searched'):
+            self.assertEqual(self.index.columns('Spot'), ('x', 'y'))
+            self.assertIsNone(self.index.select('Spot', z=(0, 1)))
+            self.assertIsNone(self.index.select('Place', x=(0, 1)))
+
+    def test_update(self):
+        """Test keeping the columns current as objects change"""
+
+        objs = [Spot(x=n) for n in range(4)]
+        for n, obj in enumerate(objs):
+            self.objects['Spot.' + str(n)] = obj
+        objs[0].x = 10
+        self.index.replace('Spot.0', objs[0], objs[0])
+        self.assertSelects(['Spot.0'], 'Spot', x=(5, None))
+        del self.objects['Spot.1']
+        self.objects['Spot.3'] = Spot(x=1)
+        self.assertSelects(['Spot.2', 'Spot.3'], 'Spot', x=(0, 3))
+        self.objects.popitem()
+        self.assertSelects(['Spot.0', 'Spot.2'], 'Spot', x=(None, None))
+        self.objects.clear()
+        self.assertIsNone(self.index.select('Spot', x=(0, 1)))
+
+
+class TestGridIndex (unittest.TestCase):
+    """Tests for the GridIndex class"""
+
+    def setUp(self):
+        """Create a dictionary with a grid index of 1 degree cells"""
+
+        self.index = GridIndex(1.0)
+        self.objects = IndexedDict([self.index])
+
+    def assertNear(self, keys, cls, latitude, longitude, radius):
+        """Check the keys found within a radius, nearest first"""
+
+        found = self.index.near(cls, latitude, longitude, radius)
+        self.assertEqual([k for d, k in found], keys)
+
+    def test_distance(self):
+        """Test great-circle distances"""
+
+        self.assertEqual(distance(10, 20, 10, 20), 0)
+        self.assertAlmostEqual(distance(0, 0, 0, 1), 111.195, places=3)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5), 111.195,
+                               places=3)
+        self.assertAlmostEqual(distance(90, 0, -90, 0), 20015.1, places=1)
+
+    def test_near(self):
+        """Test finding keys within a radius"""
+
+        self.objects['Pin.0'] = Pin(lat=0, lon=0)
+        self.objects['Pin.1'] = Pin(lat=0, lon=0.5)
+        self.objects['Pin.2'] = Pin(lat=0, lon=2)
+        self.objects['Pin.3'] = Pin(lat=1.5, lon=0)
+        self.objects['Pin.4'] = Pin(lat='0', lon=0)
+        self.objects['Pin.5'] = Pin(lat=95, lon=0)
+        self.objects['Pin.6'] = Pin(lat=0)
+        with self.subTest(msg='neighboring cells'):
+            self.assertNear(['Pin.0', 'Pin.1'], 'Pin', 0, 0, 100)
+            self.assertNear(['Pin.1', 'Pin.0', 'Pin.2'], 'Pin', 0, 0.5, 170)
+            self.assertNear(['Pin.0', 'Pin.1', 'Pin.3', 'Pin.2'], 'Pin',
+                            0, 0, 250)
+            self.assertNear([], 'Pin', 45, 45, 1000)
+            self.assertNear([], 'Place', 0, 0, 1000)
+        with self.subTest(msg='across the antimeridian and poles'):
+            self.objects['Pin.7'] = Pin(lat=10, lon=179.9)
+            self.objects['Pin.8'] = Pin(lat=89.9, lon=-90)
+            self.assertNear(['Pin.7'], 'Pin', 10, -179.9, 50)
+            self.assertNear(['Pin.8'], 'Pin', 89.9, 90, 50)
+        with self.subTest(msg='whole planet'):
+            self.assertEqual(len(self.index.near('Pin', 0, 0, 30000)), 6)
+
+    def test_defaults(self):
+        """Test skipping objects still at their class' default location"""
+
+        class Spot (Pin):
+            """Dummy data model with a default location"""
+
+            lat = 0.0
+            lon = 0.0
+
+        self.objects['Spot.1'] = Spot()
+        self.objects['Spot.2'] = Spot(lat=0.5)
+        self.objects['Spot.3'] = Spot(lat=0.0, lon=0.0)
+        self.assertNear(['Spot.2'], 'Spot', 0, 0, 1000)
+
+    def test_nearest(self):
+        """Test finding the keys nearest to a point"""
+
+        for n in range(10):
+            self.objects['Pin.' + str(n)] = Pin(lat=n * 0.1, lon=n * 10)
+        found = self.index.nearest('Pin', 0, 19, 3)
+        self.assertEqual([k for d, k in found], ['Pin.2', 'Pin.1', 'Pin.3'])
+        self.assertEqual(len(self.index.nearest('Pin', 0, 0, 20)), 10)
+        self.assertEqual(self.index.nearest('Pin', 0, 0, 0), [])
+        self.assertEqual(self.index.nearest('Place', 0, 0, 1), [])
+
+    def test_size(self):
+        """Test cell sizes that do and don't divide 360 degrees"""
+
+        for size in (7, 0.7, 400, 0):
+            with self.subTest(size=size):
+                self.assertRaises(
+                    (ValueError, ZeroDivisionError), GridIndex, size
+                )
+        index = GridIndex(1.5)
+        objects = IndexedDict([index])
+        objects['Pin.1'] = Pin(lat=10, lon=179.9)
+        objects['Pin.2'] = Pin(lat=10, lon=-179.9)
+        found = index.near('Pin', 10, 179.5, 100)
+        self.assertEqual([k for d, k in found], ['Pin.1', 'Pin.2'])
+
+    def test_update(self):
+        """Test keeping the grid current as objects move"""
+
+        obj = Pin(lat=0, lon=0)
+        self.objects['Pin.1'] = obj
+        obj.lat = 20
+        self.index.replace('Pin.1', obj, obj)
+        self.assertNear([], 'Pin', 0, 0, 100)
+        self.assertNear(['Pin.1'], 'Pin', 20, 0, 100)
+        self.objects['Pin.1'] = Pin(lat=0, lon=0)
+        self.assertNear(['Pin.1'], 'Pin', 0, 0, 100)
+        del self.objects['Pin.1']
+        self.assertNear([], 'Pin', 0, 0, 100)
+        self.objects['Pin.2'] = Pin(lat=0, lon=0)
+        self.objects.clear()
+        self.assertNear([], 'Pin', 0, 0, 100)
+
+
+class TestTextIndex (unittest.TestCase):
+    """Tests for the TextIndex class"""
+
+    def setUp(self):
+        """Create a dictionary with a text index"""
+
+        self.index = TextIndex()
+        self.objects = IndexedDict([self.index])
+
+    def assertFinds(self, keys, cls, text, limit=None):
+        """Check the keys found for some words, best first"""
+
+        found = self.index.search(cls, text, limit)
+        self.assertEqual([k for score, k in found], keys)
+
+    def test_search(self):
+        """Test ranking keys by the words searched for"""
+
+        self.objects['Note.1'] = Note(title='Beach house', body='Sunny')
+        self.objects['Note.2'] = Note(title='House', body='Quiet street')
+        self.objects['Note.3'] = Note(
+            title='Cabin', body='Quiet, quiet woods far from any beach'
+        )
+        self.objects['Note.4'] = Note(title=['Beach'], body=None)
+        self.objects['Other.1'] = Note(title='Beach')
+        with self.subTest(msg='words'):
+            self.assertEqual(words('Ocean-view, 2 rooms!'),
+                             ['ocean', 'view', '2', 'rooms'])
+        with self.subTest(msg='ranking'):
+            self.assertFinds(['Note.1', 'Note.3'], 'Note', 'beach')
+            self.assertFinds(['Note.2', 'Note.3'], 'Note', 'QUIET')
+            self.assertFinds(['Note.1', 'Note.2', 'Note.3'], 'Note',
+                             'beach house')
+            self.assertFinds(['Note.1'], 'Note', 'beach house', 1)
+        with self.subTest(msg='nothing found'):
+            self.assertFinds([], 'Note', 'castle')
+            self.assertFinds([], 'Note', '')
+            self.assertFinds([], 'Place', 'beach')
+
+    def test_update(self):
+        """Test keeping the words current as objects change"""
+
+        obj = Note(title='Beach house')
+        self.objects['Note.1'] = obj
+        obj.title = 'Cabin'
+        self.index.replace('Note.1', obj, obj)
+        self.assertFinds([], 'Note', 'beach')
+        self.assertFinds(['Note.1'], 'Note', 'cabin')
+        self.objects['Note.1'] = Note(body='Beach')
+        self.assertFinds(['Note.1'], 'Note', 'beach')
+        del self.objects['Note.1']
+        self.assertFinds([], 'Note', 'beach')
+        self.objects['Note.2'] = Note(title='Beach')
+        self.objects.clear()
+        self.assertFinds([], 'Note', 'beach')
+
+    def test_load(self):
+        """Test copying the contents of one index to another through JSON"""
+
+        self.objects['Note.1'] = Note(title='Beach house')
+        self.objects['Note.2'] = Note(title='House')
+        other = TextIndex()
+        other.load(json.loads(json.dumps(self.index.dump())))
+        self.assertEqual(other.dump()['fields'], {'Note': ('title', 'body')})
+        self.assertEqual(other.search('Note', 'beach house'),
+                         self.index.search('Note', 'beach house'))
+        other.remove('Note.1', None)
+        self.assertEqual([k for score, k in other.search('Note', 'house')],
+                         ['Note.2'])
+
+
+class TestIndexedDict (unittest.TestCase):
+    """Tests for the IndexedDict and ClassIndex classes"""
+
+    def setUp(self):
+        """Create a dictionary with a class index"""
+
+        self.index = ClassIndex()
+        self.objects = IndexedDict([self.index])
+
+    def assertIndexed(self, cls, keys):
+        """Check the keys indexed under a class name"""
+
+        self.assertEqual(self.index.keys(cls), keys)
+        self.assertEqual(self.index.count(cls), len(keys))
+
+    def test_add(self):
+        """Test that added items are indexed"""
+
+        with self.subTest(msg='set item'):
+            self.objects['State.1'] = 'a'
+            self.objects['City.1'] = 'b'
+            self.objects['State.2'] = 'c'
+            self.assertIndexed('State', ['State.1', 'State.2'])
+            self.assertIndexed('City', ['City.1'])
+            self.assertIndexed('User', [])
+        with self.subTest(msg='replace item'):
+            self.objects['State.1'] = 'd'
+            self.assertIndexed('State', ['State.1', 'State.2'])
+        with self.subTest(msg='update and setdefault'):
+            self.objects.update({'User.1': 'e'}, **{'User.2': 'f'})
+            self.objects.update([('User.3', 'g')])
+            self.objects.setdefault('User.4', 'h')
+            self.objects |= {'User.5': 'i'}
+            self.assertEqual(self.index.count('User'), 5)
+        with self.subTest(msg='initial contents'):
+            objects = IndexedDict([ClassIndex()], {'Place.1': 'a'})
+            self.assertEqual(objects.indexes[0].keys('Place'), ['Place.1'])
+
+    def test_remove(self):
+        """Test that removed items are unindexed"""
+
+        self.objects.update({'State.1': 'a', 'State.2': 'b', 'City.1': 'c'})
+        with self.subTest(msg='delete item'):
+            del self.objects['State.1']
+            self.assertIndexed('State', ['State.2'])
+        with self.subTest(msg='pop'):
+            self.assertEqual(self.objects.pop('State.2'), 'b')
+            self.assertEqual(self.objects.pop('State.2', None), None)
+            self.assertRaises(KeyError, self.objects.pop, 'State.2')
+            self.assertIndexed('State', [])
+        with self.subTest(msg='popitem'):
+            self.assertEqual(self.objects.popitem(), ('City.1', 'c'))
+            self.assertIndexed('City', [])
+        with self.subTest(msg='clear'):
+            self.objects['User.1'] = 'd'
+            self.objects.clear()
+            self.assertIndexed('User', [])
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""Tests for the rwlock module"""
+
+
+from models.engine.rwlock import ReadWriteLock
+import threading
+import unittest
+
+
+class TestReadWriteLock (unittest.TestCase):
+    """Tests for the ReadWriteLock class"""
+
+    def start(self, lock, holder, entered):
+        """Start a thread that sets entered once it takes the lock
+
+        The thread keeps the lock until the event it returns is set.
+
+        """
+
+        release = threading.Event()
+
+        def hold():
+            """Take the lock and keep it until told to release it"""
+
+            with getattr(lock, holder):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(release.set)
+        return release
+
+    def test_exclusion(self):
+        """Test which threads have to wait for the lock"""
+
+        with self.subTest(msg='readers share the lock'):
+            lock = ReadWriteLock()
+            first, second = threading.Event(), threading.Event()
+            self.start(lock, 'reader', first)
+            self.start(lock, 'reader', second)
+            self.assertTrue(first.wait(5))
+            self.assertTrue(second.wait(5))
+        with self.subTest(msg='writers wait for readers'):
+            lock = ReadWriteLock()
+            reading, writing = threading.Event(), threading.Event()
+            release = self.start(lock, 'reader', reading)
+            self.assertTrue(reading.wait(5))
+            self.start(lock, 'writer', writing)
+            self.assertFalse(writing.wait(0.1))
+            release.set()
+            self.assertTrue(writing.wait(5))
+        with self.subTest(msg='readers wait for writers'):
+            lock = ReadWriteLock()
+            writing, reading = threading.Event(), threading.Event()
+            release = self.start(lock, 'writer', writing)
+            self.assertTrue(writing.wait(5))
+            self.start(lock, 'reader', reading)
+            self.assertFalse(reading.wait(0.1))
+            release.set()
+            self.assertTrue(reading.wait(5))
+        with self.subTest(msg='waiting writers keep new readers out'):
+            lock = ReadWriteLock()
+            first, writing, second = (threading.Event() for _ in range(3))
+            release = self.start(lock, 'reader', first)
+            self.assertTrue(first.wait(5))
+            write = self.start(lock, 'writer', writing)
+            self.assertFalse(writing.wait(0.1))
+            self.start(lock, 'reader', second)
+            self.assertFalse(second.wait(0.1))
+            release.set()
+            self.assertTrue(writing.wait(5))
+            self.assertFalse(second.wait(0.1))
+            write.set()
+            self.assertTrue(second.wait(5))
+
+    def test_reentry(self):
+        """Test taking the lock again in a thread that holds it"""
+
+        lock = ReadWriteLock()
+        self.assertIsNone(lock.held)
+        with lock.writer:
+            self.assertEqual(lock.held, 'write')
+            with lock.writer, lock.reader:
+                self.assertEqual(lock.held, 'write')
+            self.assertEqual(lock.held, 'write')
+        self.assertIsNone(lock.held)
+        with lock.reader:
+            with lock.reader:
+                self.assertEqual(lock.held, 'read')
+            with self.assertRaises(RuntimeError):
+                with lock.writer:
+                    pass
+            self.assertEqual(lock.held, 'read')
+        self.assertIsNone(lock.held)
+        entered = threading.Event()
+        self.start(lock, 'writer', entered)
+        self.assertTrue(entered.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+"""Tests for the ShardedStorage class"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+from models.engine.sharded_storage import ShardedStorage, shard
+import models
+import os
+import os.path
+import shutil
+import unittest
+
+
+PATH = 'test_shards'
+
+
+class ShardModel:
+    """Dummy data model that keeps the attributes it's given"""
+
+    def __init__(self, **kwargs):
+        """Set the given attributes, except for __class__"""
+
+        kwargs.pop('__class__', None)
+        self.__dict__.update(kwargs)
+
+    def to_dict(self):
+        """Return this instance dictionary with its class name"""
+
+        return dict(self.__dict__, __class__='ShardModel')
+
+
+class TestShardedStorage (unittest.TestCase):
+    """Tests for the ShardedStorage class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Allow loading ShardModels"""
+
+        models.classes['ShardModel'] = ShardModel
+
+    @classmethod
+    def tearDownClass(cls):
+        """Forget about ShardModels"""
+
+        del models.classes['ShardModel']
+
+    def setUp(self):
+        """Create storage in a directory that doesn't exist yet"""
+
+        shutil.rmtree(PATH, ignore_errors=True)
+        self.storage = ShardedStorage(PATH, shards=4)
+
+    def tearDown(self):
+        """Remove the directory"""
+
+        shutil.rmtree(PATH, ignore_errors=True)
+
+    def add(self, *objs):
+        """Add objects to storage and save them"""
+
+        for obj in objs:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def files(self):
+        """Return the names of the shard files"""
+
+        return sorted(
+            name for name in os.listdir(PATH) if name != 'shards.json'
+        )
+
+    def test_all(self):
+        """Test getting every object, including unsaved changes"""
+
+        self.add(*(ShardModel(id=str(n)) for n in range(8)))
+        self.storage.reload()
+        self.storage.delete('ShardModel', '1')
+        obj = ShardModel(id='8')
+        self.storage.new(obj)
+        objs = self.storage.all()
+        self.assertEqual(len(objs), 8)
+        self.assertNotIn('ShardModel.1', objs)
+        self.assertIs(objs['ShardModel.8'], obj)
+        self.assertEqual(self.storage.count(ShardModel), 8)
+        self.assertEqual(self.storage.all('Other'), {})
+        self.assertEqual(self.storage.count('Other'), 0)
+        with self.subTest(msg='read by an executor'):
+            with ThreadPoolExecutor(2) as executor:
+                storage = ShardedStorage(PATH, executor=executor)
+                self.assertEqual(len(storage.all(ShardModel)), 8)
+
+    def test_delete(self):
+        """Test deleting objects"""
+
+        self.add(ShardModel(id='1'))
+        self.assertRaises(KeyError, self.storage.delete, 'ShardModel', '2')
+        self.storage.delete(ShardModel, '1')
+        self.assertNotIn('ShardModel.1', self.storage)
+        self.storage.save()
+        with self.subTest(msg='empty shard file removed'):
+            self.assertEqual(self.files(), [])
+            self.assertEqual(ShardedStorage(PATH).count(), 0)
+
+    def test_find(self):
+        """Test finding objects by their attribute values"""
+
+        self.add(*(ShardModel(id=str(n), group=n % 2) for n in range(6)))
+        found = ShardedStorage(PATH).find('ShardModel', group=1)
+        self.assertEqual(sorted(o.id for o in found), ['1', '3', '5'])
+        self.assertEqual(self.storage.find('ShardModel', color='red'), [])
+
+    def test_get(self):
+        """Test retrieving objects read from their shard on demand"""
+
+        self.add(*(ShardModel(id=str(n), name=str(n)) for n in range(8)))
+        storage = ShardedStorage(PATH)
+        obj = storage.get('ShardModel', '3')
+        self.assertEqual(obj.to_dict(), {
+            '__class__': 'ShardModel', 'id': '3', 'name': '3'
+        })
+        self.assertIs(storage.get(ShardModel, '3'), obj)
+        self.assertIn(obj, storage)
+        self.assertIn('ShardModel.5', storage)
+        self.assertRaises(KeyError, storage.get, 'ShardModel', '8')
+        self.assertIsNone(storage.tryGet('Other', '1', None))
+        self.assertNotIn('ShardModel.8', storage)
+
+    def test_save(self):
+        """Test that saving only rewrites the shards that changed"""
+
+        objs = [ShardModel(id=str(n), group=0) for n in range(16)]
+        self.add(*objs)
+        numbers = {shard(obj.id, 4) for obj in objs}
+        self.assertEqual(
+            self.files(),
+            sorted('ShardModel.{}.json'.format(n) for n in numbers)
+        )
+        with self.subTest(msg='changed shard rewritten'):
+            for name in self.files():
+                os.utime(os.path.join(PATH, name), ns=(0, 0))
+            objs[0].group = 1
+            self.storage.changed(objs[0])
+            self.storage.save()
+            name = 'ShardModel.{}.json'.format(shard('0', 4))
+            for other in self.files():
+                changed = os.stat(os.path.join(PATH, other)).st_mtime_ns
+                self.assertEqual(changed != 0, other == name, other)
+            storage = ShardedStorage(PATH)
+            self.assertEqual(storage.get('ShardModel', '0').group, 1)
+        with self.subTest(msg='unsaved changes discarded'):
+            objs[1].group = 2
+            self.storage.changed(objs[1])
+            self.storage.changed(ShardModel(id='2', group=3))
+            self.storage.reload()
+            self.assertEqual(self.storage.get('ShardModel', '1').group, 0)
+            self.assertEqual(self.storage.get('ShardModel', '2').group, 0)
+        with self.subTest(msg='number of shards kept'):
+            storage = ShardedStorage(PATH, shards=64)
+            self.assertEqual(storage.count(), 16)
+            self.assertEqual(storage.shards, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
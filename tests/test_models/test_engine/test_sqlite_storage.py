@@ -0,0 +1,318 @@
+#!/usr/bin/python3
+"""Tests for the SQLiteStorage class"""
+
+
+from models.engine.sqlite_storage import SQLiteStorage
+import models
+import os
+import sqlite3
+import threading
+import unittest
+
+
+PATH = 'test_storage.db'
+
+
+class SQLModel:
+    """Dummy data model with an indexed attribute"""
+
+    __indexes__ = ('group',)
+
+    def __init__(self, **kwargs):
+        """Set the given attributes, except for __class__"""
+
+        kwargs.pop('__class__', None)
+        self.__dict__.update(kwargs)
+
+    def to_dict(self):
+        """Return this instance dictionary with its class name"""
+
+        return dict(self.__dict__, __class__='SQLModel')
+
+
+class TestSQLiteStorage (unittest.TestCase):
+    """Tests for the SQLiteStorage class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Allow loading SQLModels"""
+
+        models.classes['SQLModel'] = SQLModel
+
+    @classmethod
+    def tearDownClass(cls):
+        """Forget about SQLModels"""
+
+        del models.classes['SQLModel']
+
+    def setUp(self):
+        """Create storage in an empty database"""
+
+        if os.path.exists(PATH):
+            os.remove(PATH)
+        self.storage = SQLiteStorage(PATH)
+
+    def tearDown(self):
+        """Close and remove the database"""
+
+        self.storage.close()
+        if os.path.exists(PATH):
+            os.remove(PATH)
+
+    def add(self, *objs):
+        """Add objects to storage and save them"""
+
+        for obj in objs:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def test_all(self):
+        """Test getting every object, including unsaved changes"""
+
+        self.add(SQLModel(id='1'), SQLModel(id='2'))
+        self.storage.delete('SQLModel', '1')
+        obj = SQLModel(id='3')
+        self.storage.new(obj)
+        objs = self.storage.all()
+        self.assertEqual(sorted(objs), ['SQLModel.2', 'SQLModel.3'])
+        self.assertIs(objs['SQLModel.3'], obj)
+        self.assertEqual(list(self.storage.all('Other')), [])
+        self.assertEqual(len(self.storage.all(SQLModel)), 2)
+
+    def test_batch(self):
+        """Test writing a batch of changes once it ends"""
+
+        with self.storage.batch():
+            self.storage.new(SQLModel(id='1'))
+            self.storage.save()
+            self.assertNotIn('SQLModel.1', SQLiteStorage(PATH))
+        self.assertIn('SQLModel.1', SQLiteStorage(PATH))
+
+    def test_cache(self):
+        """Test keeping recently used objects and evicting changed ones"""
+
+        def saved():
+            """Return the IDs committed to the database"""
+
+            connection = sqlite3.connect(PATH)
+            try:
+                return sorted(id for id, in connection.execute(
+                    'SELECT id FROM SQLModel'
+                ))
+            finally:
+                connection.close()
+
+        self.storage.close()
+        self.storage = SQLiteStorage(PATH, cacheEntries=2)
+        cache = self.storage.cache
+        with self.subTest(msg='changed objects written when evicted'):
+            for id in '123':
+                self.storage.new(SQLModel(id=id, group=int(id)))
+            self.assertEqual(len(cache), 2)
+            self.assertEqual((cache.evictions, cache.writes), (1, 1))
+            self.assertEqual(self.storage.count(), 3)
+            self.assertEqual(self.storage.get('SQLModel', '1').group, 1)
+            self.assertEqual(len(self.storage.find('SQLModel', group=1)), 1)
+            self.assertEqual(saved(), [])
+        with self.subTest(msg='evicted objects rolled back'):
+            self.storage.reload()
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(self.storage.count(), 0)
+            self.assertNotIn('SQLModel.1', self.storage)
+        with self.subTest(msg='evicted objects saved'):
+            for id in '123':
+                self.storage.new(SQLModel(id=id, group=int(id)))
+            self.storage.save()
+            self.assertEqual(saved(), ['1', '2', '3'])
+        with self.subTest(msg='hits and misses'):
+            self.storage.reload()
+            cache.hits = cache.misses = 0
+            obj = self.storage.get('SQLModel', '1')
+            self.assertIs(self.storage.get('SQLModel', '1'), obj)
+            self.assertIsNone(self.storage.tryGet('SQLModel', '4', None))
+            self.assertIn(obj, self.storage)
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+            self.assertAlmostEqual(cache.hitRate, 0.5)
+        with self.subTest(msg='failed save keeps evicted objects'):
+            writes = cache.writes
+            for id in '56':
+                self.storage.new(SQLModel(id=id))
+            self.storage.new(SQLModel(id='4', group={4}))
+            self.assertEqual(cache.writes, writes + 1)
+            self.assertRaises(TypeError, self.storage.save)
+            self.storage.get('SQLModel', '4').group = 4
+            self.storage.changed(self.storage.get('SQLModel', '4'))
+            self.storage.save()
+            self.assertEqual(saved(), ['1', '2', '3', '4', '5', '6'])
+
+    def test_count(self):
+        """Test counting saved and unsaved objects"""
+
+        with self.subTest(msg='empty database'):
+            self.assertEqual(self.storage.count(), 0)
+            self.assertEqual(self.storage.count('SQLModel'), 0)
+        with self.subTest(msg='saved and unsaved objects'):
+            self.add(SQLModel(id='1'), SQLModel(id='2'))
+            self.storage.new(SQLModel(id='3'))
+            self.storage.new(SQLModel(id='1'))
+            self.storage.delete(SQLModel, '2')
+            self.assertEqual(self.storage.count(), 2)
+            self.assertEqual(self.storage.count(SQLModel), 2)
+            self.assertEqual(self.storage.count('Other'), 0)
+
+    def test_delete(self):
+        """Test deleting objects"""
+
+        self.add(SQLModel(id='1'))
+        with self.subTest(msg='missing objects'):
+            self.assertRaises(KeyError, self.storage.delete, 'SQLModel', '2')
+            self.assertRaises(KeyError, self.storage.delete, 'Other', '1')
+        with self.subTest(msg='deleted until saved'):
+            self.storage.delete('SQLModel', '1')
+            self.assertNotIn('SQLModel.1', self.storage)
+            self.assertRaises(KeyError, self.storage.get, 'SQLModel', '1')
+            self.assertRaises(KeyError, self.storage.delete, 'SQLModel', '1')
+            self.storage.reload()
+            self.assertIn('SQLModel.1', self.storage)
+        with self.subTest(msg='deleted once saved'):
+            self.storage.delete('SQLModel', '1')
+            self.storage.save()
+            self.storage.close()
+            self.assertNotIn('SQLModel.1', self.storage)
+        with self.subTest(msg='unsaved new object'):
+            self.storage.new(SQLModel(id='2'))
+            self.storage.delete('SQLModel', '2')
+            self.storage.save()
+            self.assertEqual(self.storage.count(), 0)
+
+    def test_find(self):
+        """Test finding objects by indexed and other attributes"""
+
+        objs = [
+            SQLModel(id=str(id), group=id % 2, tag=str(id % 3))
+            for id in range(6)
+        ]
+        self.add(*objs)
+        self.storage.reload()
+        with self.subTest(msg='indexed attribute'):
+            found = self.storage.find('SQLModel', group=1)
+            self.assertEqual(sorted(o.id for o in found), ['1', '3', '5'])
+        with self.subTest(msg='unindexed attribute'):
+            found = self.storage.find(SQLModel, group=0, tag='1')
+            self.assertEqual([o.id for o in found], ['4'])
+            self.assertEqual(self.storage.find(SQLModel, color='red'), [])
+            self.assertEqual(self.storage.find('Other', group=0), [])
+        with self.subTest(msg='unsaved changes'):
+            obj = self.storage.get('SQLModel', '1')
+            obj.group = 0
+            self.storage.changed(obj)
+            self.storage.new(SQLModel(id='6', group=0, tag='0'))
+            found = self.storage.find('SQLModel', group=0)
+            self.assertEqual(
+                sorted(o.id for o in found),
+                ['0', '1', '2', '4', '6']
+            )
+
+    def test_get(self):
+        """Test retrieving saved objects from a new connection"""
+
+        self.add(SQLModel(id='1', name='one', group=[1]))
+        self.storage.close()
+        with self.subTest(msg='stored object'):
+            obj = self.storage.get('SQLModel', '1')
+            self.assertEqual(obj.to_dict(), {
+                '__class__': 'SQLModel', 'id': '1', 'name': 'one',
+                'group': [1]
+            })
+            self.assertIs(self.storage.get(SQLModel, '1'), obj)
+            self.assertIn(obj, self.storage)
+            self.assertIn('SQLModel.1', self.storage)
+        with self.subTest(msg='missing object'):
+            self.assertRaises(KeyError, self.storage.get, 'SQLModel', '2')
+            self.assertRaises(KeyError, self.storage.get, 'Other', '1')
+            self.assertIsNone(self.storage.tryGet('SQLModel', '2', None))
+            self.assertNotIn('SQLModel.2', self.storage)
+
+    def test_query(self):
+        """Test finding IDs by ranges of numeric attribute values"""
+
+        self.add(*(SQLModel(id=str(n), group=n) for n in range(4)))
+        self.storage.new(SQLModel(id='4', group='4'))
+        found = self.storage.query('SQLModel', group=(1, None))
+        self.assertEqual(sorted(found), ['1', '2', '3'])
+
+    def test_save(self):
+        """Test saving changes to stored objects"""
+
+        obj = SQLModel(id='1', group=0)
+        self.add(obj)
+        with self.subTest(msg='changed objects saved'):
+            obj.group = 1
+            self.storage.changed(obj)
+            self.storage.save()
+            self.storage.close()
+            self.assertEqual(self.storage.get('SQLModel', '1').group, 1)
+            self.assertEqual(len(self.storage.find('SQLModel', group=1)), 1)
+        with self.subTest(msg='unsaved changes discarded'):
+            obj = self.storage.get('SQLModel', '1')
+            obj.group = 2
+            self.storage.changed(obj)
+            self.storage.reload()
+            self.assertEqual(self.storage.get('SQLModel', '1').group, 1)
+        with self.subTest(msg='changes to other objects ignored'):
+            self.storage.changed(SQLModel(id='1', group=3))
+            self.storage.save()
+            self.storage.close()
+            self.assertEqual(self.storage.get('SQLModel', '1').group, 1)
+
+    def test_threads(self):
+        """Test using storage from several threads at once"""
+
+        errors = []
+
+        def work(n):
+            """Add, save, and look up objects"""
+
+            try:
+                for id in range(50):
+                    obj = SQLModel(id='{}-{}'.format(n, id), group=n)
+                    self.storage.new(obj)
+                    self.storage.save()
+                    self.storage.get('SQLModel', obj.id)
+                    self.storage.find('SQLModel', group=n)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(SQLiteStorage(PATH).count(), 200)
+
+    def test_transaction(self):
+        """Test that a failed save doesn't write any of the changes"""
+
+        class BadModel (SQLModel):
+            """Dummy data model that can't be encoded"""
+
+            def to_dict(self):
+                """Fail to return a dictionary"""
+
+                raise ValueError('bad model')
+
+        self.add(SQLModel(id='1'))
+        self.storage.delete('SQLModel', '1')
+        self.storage.new(BadModel(id='2'))
+        self.assertRaises(ValueError, self.storage.save)
+        connection = sqlite3.connect(PATH)
+        try:
+            rows = connection.execute('SELECT id FROM SQLModel').fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(rows, [('1',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
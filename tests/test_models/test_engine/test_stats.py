@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""Tests for the stats module"""
+
+
+import importlib
+import models
+import models.engine.file_storage
+from models.base_model import BaseModel
+from models.engine import stats
+from models.engine.stats import Timing
+import os
+import os.path
+import subprocess
+import sys
+import unittest
+
+
+FILES = (
+    'storage.json', 'storage.json.text', 'storage.json.text.sig',
+    'storage.json.lock', 'test.prof'
+)
+
+
+class TestStats (unittest.TestCase):
+    """Tests for measuring storage engine and data model methods"""
+
+    def setUp(self):
+        """Start from fresh storage with nothing measured"""
+
+        importlib.reload(models.engine.file_storage)
+        stats.reset()
+
+    def tearDown(self):
+        """Stop measuring and remove the files"""
+
+        stats.disable()
+        stats.reset()
+        stats.stopProfile()
+        for path in FILES:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_enable(self):
+        """Test that enabling wraps methods and disabling restores them"""
+
+        FileStorage = models.engine.file_storage.FileStorage
+        originals = (FileStorage.get, FileStorage.save, BaseModel.to_dict)
+        storage = FileStorage()
+        storage.reload()
+        with self.subTest(msg='off'):
+            self.assertFalse(stats.enabled)
+            storage.count()
+            self.assertEqual(stats.timings, {})
+        stats.enable()
+        stats.enable()
+        with self.subTest(msg='on'):
+            self.assertTrue(stats.enabled)
+            self.assertIsNot(FileStorage.get, originals[0])
+            obj = BaseModel(id='1', __class__='BaseModel',
+                            created_at='2019-06-27T15:55:30.100000',
+                            updated_at='2019-06-27T15:55:30.100000')
+            storage.new(obj)
+            for _ in range(3):
+                storage.get('BaseModel', '1')
+            storage.save()
+            timings = stats.timings
+            self.assertEqual(timings['FileStorage.get'].count, 3)
+            self.assertEqual(timings['FileStorage.new'].count, 1)
+            self.assertEqual(timings['BaseModel.__init__'].count, 1)
+            self.assertEqual(timings['BaseModel.to_dict'].count, 1)
+            self.assertGreater(timings['FileStorage.save'].total, 0)
+            self.assertIsNone(timings['FileStorage.get'].bytesWritten)
+            if stats.counters() is not None:
+                size = os.path.getsize('storage.json')
+                written = timings['FileStorage.save'].bytesWritten
+                self.assertGreaterEqual(written, size)
+                storage.reload()
+                read = timings['FileStorage.reload'].bytesRead
+                self.assertGreaterEqual(read, size)
+            names = [line.split()[0] for line in stats.report().split('\n')]
+            self.assertEqual(names[0], 'method')
+            self.assertIn('FileStorage.save', names)
+        with self.subTest(msg='off again'):
+            stats.disable()
+            self.assertFalse(stats.enabled)
+            self.assertEqual(
+                (FileStorage.get, FileStorage.save, BaseModel.to_dict),
+                originals
+            )
+            storage.get('BaseModel', '1')
+            self.assertEqual(stats.timings['FileStorage.get'].count, 3)
+
+    def test_import(self):
+        """Test that importing models only imports stats when asked to"""
+
+        code = (
+            'import models, sys\n'
+            'print("models.engine.stats" in sys.modules)\n'
+            'print("cProfile" in sys.modules)\n'
+            'from models.engine import stats\n'
+            'print(stats.enabled)\n'
+        )
+        env = {
+            name: value for name, value in os.environ.items()
+            if name not in ('HBNB_STATS', 'HBNB_PROFILE')
+        }
+        for value, expected in (
+            (None, ['False', 'False', 'False']),
+            ('0', ['False', 'False', 'False']),
+            ('1', ['True', 'False', 'True'])
+        ):
+            with self.subTest(HBNB_STATS=value):
+                if value is not None:
+                    env['HBNB_STATS'] = value
+                output = subprocess.run(
+                    [sys.executable, '-c', code], env=env,
+                    stdout=subprocess.PIPE, universal_newlines=True,
+                    check=True
+                ).stdout
+                self.assertEqual(output.split(), expected)
+
+    def test_profile(self):
+        """Test capturing a profile with cProfile"""
+
+        self.assertIsNone(stats.stopProfile())
+        with self.subTest(msg='printed'):
+            stats.startProfile()
+            models.engine.file_storage.FileStorage().count()
+            text = stats.stopProfile(limit=5)
+            self.assertIn('function calls', text)
+            self.assertIn('count', text)
+            self.assertIsNone(stats.profiler)
+        with self.subTest(msg='written to a file'):
+            stats.startProfile()
+            self.assertEqual(stats.stopProfile('test.prof'), 'test.prof')
+            self.assertTrue(os.path.exists('test.prof'))
+
+    def test_timing(self):
+        """Test estimating percentiles from a sample of call times"""
+
+        timing = Timing()
+        self.assertEqual(timing.percentile(0.5), 0.0)
+        for n in range(1, 101):
+            timing.add(n / 100)
+        self.assertEqual(timing.count, 100)
+        self.assertAlmostEqual(timing.total, 50.5)
+        self.assertEqual(timing.max, 1.0)
+        self.assertEqual(timing.percentile(0.5), 0.51)
+        self.assertEqual(timing.percentile(0.99), 1.0)
+        with self.subTest(msg='bounded sample'):
+            timing = Timing()
+            timing.SAMPLES = 10
+            for n in range(1000):
+                timing.add(1.0, 10, 20)
+            self.assertEqual(len(timing.samples), 10)
+            self.assertEqual(timing.count, 1000)
+            self.assertEqual(timing.bytesRead, 10000)
+            self.assertEqual(timing.bytesWritten, 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
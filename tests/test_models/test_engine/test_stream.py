@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Tests for the stream module"""
+
+
+import io
+import json
+from models.engine.stream import records
+import unittest
+
+
+class TestRecords (unittest.TestCase):
+    """Tests for reading JSON objects one record at a time"""
+
+    def read(self, text, **kwargs):
+        """Return a list of the records in a JSON string"""
+
+        return list(records(io.BytesIO(text.encode('utf-8')), **kwargs))
+
+    def test_read(self):
+        """Test reading valid JSON objects"""
+
+        contents = {
+            'BaseModel.1': {'id': '1', 'name': 'café "quoted" {}'},
+            'Place.2': {'id': '2', 'price': 12, 'ids': [1, 2.5, None]},
+            'weird': 125
+        }
+        text = json.dumps(contents)
+        with self.subTest(msg='same records as json.load'):
+            self.assertEqual(self.read(text), list(contents.items()))
+        with self.subTest(msg='records split across chunks'):
+            for size in (1, 2, 7, 64):
+                self.assertEqual(
+                    self.read(text, chunkSize=size),
+                    list(contents.items())
+                )
+        with self.subTest(msg='extra whitespace'):
+            text = json.dumps(contents, indent=4) + '\n'
+            self.assertEqual(self.read(text, chunkSize=3),
+                             list(contents.items()))
+        with self.subTest(msg='empty object'):
+            self.assertEqual(self.read(' { } ', chunkSize=1), [])
+
+    def test_progress(self):
+        """Test reporting progress while reading"""
+
+        calls = []
+        text = json.dumps({str(n): n for n in range(100)})
+        self.read(text, chunkSize=100, progress=lambda *a: calls.append(a))
+        self.assertEqual(calls[-1][0], len(text))
+        self.assertEqual([c[0] for c in calls], sorted(c[0] for c in calls))
+
+    def test_invalid(self):
+        """Test failures when the JSON isn't an object"""
+
+        bad = (
+            '', '   ', 'this is a string, not json', '[1, 2]', '"text"',
+            '{', '{"a": 1', '{"a" 1}', '{"a": 1,}', '{1: 2}', '{"a": 1} 2',
+            '{"a": tru}', '{"a": 1 "b": 2}'
+        )
+        for text in bad:
+            with self.subTest(text=text):
+                self.assertRaises(ValueError, self.read, text, chunkSize=2)
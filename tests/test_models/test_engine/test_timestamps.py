@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Tests for the timestamps module"""
+
+
+import datetime
+from models.engine import timestamps
+import unittest
+
+
+class TestTimestamps (unittest.TestCase):
+    """Tests for the timestamps module"""
+
+    def tearDown(self):
+        """Go back to the default format"""
+
+        timestamps.epoch = False
+
+    def test_decode(self):
+        """Test reading time stamps in every stored format"""
+
+        expected = datetime.datetime(2019, 6, 27, 15, 55, 30, 100000)
+        for value in (
+            '2019-06-27T15:55:30.100000',
+            '2019-06-27T15:55:30.1',
+            1561650930100000
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(timestamps.decode(value), expected)
+        with self.subTest(msg='no microseconds'):
+            self.assertEqual(
+                timestamps.decode('2019-06-27T15:55:30'),
+                expected.replace(microsecond=0)
+            )
+        with self.subTest(msg='invalid time stamp'):
+            self.assertRaises(ValueError, timestamps.decode, 'yesterday')
+
+    def test_encode(self):
+        """Test writing time stamps in each format"""
+
+        value = datetime.datetime(2019, 6, 27, 15, 55, 30)
+        with self.subTest(msg='ISO 8601'):
+            self.assertEqual(
+                timestamps.encode(value),
+                '2019-06-27T15:55:30.000000'
+            )
+        with self.subTest(msg='time zone'):
+            aware = value.replace(tzinfo=datetime.timezone.utc)
+            self.assertEqual(
+                timestamps.encode(aware),
+                '2019-06-27T15:55:30.000000+00:00'
+            )
+            self.assertEqual(
+                timestamps.decode(timestamps.encode(aware)),
+                aware
+            )
+        with self.subTest(msg='epoch'):
+            timestamps.epoch = True
+            self.assertEqual(timestamps.encode(value), 1561650930000000)
+            self.assertEqual(
+                timestamps.decode(timestamps.encode(value)),
+                value
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()